@@ -0,0 +1,41 @@
+"""Feature vector serving tables
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Create feature_vector_schemas table
+    op.create_table('feature_vector_schemas',
+        sa.Column('version', sa.String(length=16), nullable=False),
+        sa.Column('feature_names', sa.JSON(), nullable=False),
+        sa.Column('dtype', sa.String(length=8), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('version')
+    )
+
+    # Create player_feature_vectors table
+    op.create_table('player_feature_vectors',
+        sa.Column('player_id', sa.String(), nullable=False),
+        sa.Column('version', sa.String(length=16), nullable=False),
+        sa.Column('vector', sa.LargeBinary(), nullable=False),
+        sa.Column('feature_date', sa.Date(), nullable=True),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('player_id')
+    )
+
+
+def downgrade():
+    op.drop_table('player_feature_vectors')
+    op.drop_table('feature_vector_schemas')
@@ -0,0 +1,32 @@
+"""Per-player time indexes on event tables, built concurrently
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from models.online_migrations import create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+# feature windows read one player's events in a time range
+INDEXES = [
+    ('ix_bets_player_id_bet_timestamp', 'bets', ['player_id', 'bet_timestamp']),
+    ('ix_sessions_player_id_session_start', 'sessions', ['player_id', 'session_start']),
+    ('ix_deposits_player_id_deposit_timestamp', 'deposits', ['player_id', 'deposit_timestamp']),
+]
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY: ingestion keeps writing while the indexes build
+    for name, table, columns in INDEXES:
+        create_index_concurrently(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        drop_index_concurrently(name, table)
@@ -0,0 +1,59 @@
+"""Daily per-player activity rollups
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Create player_daily_activity table
+    op.create_table('player_daily_activity',
+        sa.Column('player_id', sa.String(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('sessions', sa.Integer(), nullable=False),
+        sa.Column('session_minutes', sa.Float(), nullable=False),
+        sa.Column('last_login', sa.DateTime(), nullable=True),
+        sa.Column('bets', sa.Integer(), nullable=False),
+        sa.Column('bets_with_amount', sa.Integer(), nullable=False),
+        sa.Column('bet_amount', sa.Float(), nullable=False),
+        sa.Column('win_amount', sa.Float(), nullable=False),
+        sa.Column('winning_bets', sa.Integer(), nullable=False),
+        sa.Column('ggr', sa.Float(), nullable=False),
+        sa.Column('deposits', sa.Integer(), nullable=False),
+        sa.Column('deposit_amount', sa.Float(), nullable=False),
+        sa.Column('withdrawals', sa.Integer(), nullable=False),
+        sa.Column('withdrawal_amount', sa.Float(), nullable=False),
+        sa.Column('bonuses', sa.Integer(), nullable=False),
+        sa.Column('bonuses_redeemed', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('player_id', 'day')
+    )
+    # feature windows scan recent days across all players
+    op.create_index(op.f('ix_player_daily_activity_day'), 'player_daily_activity', ['day'], unique=False)
+
+    # Create player_daily_games table
+    op.create_table('player_daily_games',
+        sa.Column('player_id', sa.String(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('game_name', sa.String(length=100), nullable=False),
+        sa.Column('bets', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('player_id', 'day', 'game_name')
+    )
+    op.create_index(op.f('ix_player_daily_games_day'), 'player_daily_games', ['day'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_player_daily_games_day'), table_name='player_daily_games')
+    op.drop_table('player_daily_games')
+    op.drop_index(op.f('ix_player_daily_activity_day'), table_name='player_daily_activity')
+    op.drop_table('player_daily_activity')
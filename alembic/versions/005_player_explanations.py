@@ -0,0 +1,34 @@
+"""Precomputed churn explanations
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Create player_explanations table
+    op.create_table('player_explanations',
+        sa.Column('player_id', sa.String(), nullable=False),
+        sa.Column('model_version', sa.String(length=40), nullable=False),
+        sa.Column('churn_probability', sa.Float(), nullable=False),
+        sa.Column('base_value', sa.Float(), nullable=False),
+        sa.Column('reasons', sa.LargeBinary(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('player_id')
+    )
+    op.create_index(op.f('ix_player_explanations_model_version'), 'player_explanations', ['model_version'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_player_explanations_model_version'), table_name='player_explanations')
+    op.drop_table('player_explanations')
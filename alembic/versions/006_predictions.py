@@ -0,0 +1,49 @@
+"""Append-only predictions history and latest prediction per player
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Create predictions table; on Postgres a partitioned parent whose daily
+    # partitions are created by src/predictions.py as they are written
+    op.create_table('predictions',
+        sa.Column('prediction_date', sa.Date(), nullable=False),
+        sa.Column('player_id', sa.String(), nullable=False),
+        sa.Column('predicted_at', sa.DateTime(), nullable=False),
+        sa.Column('model_version', sa.String(length=40), nullable=False),
+        sa.Column('churn_probability', sa.Float(), nullable=False),
+        sa.Column('churn_label', sa.Boolean(), nullable=False),
+        sa.Column('feature_date', sa.Date(), nullable=True),
+        sa.PrimaryKeyConstraint('prediction_date', 'player_id', 'predicted_at'),
+        postgresql_partition_by='RANGE (prediction_date)'
+    )
+    op.create_index('ix_predictions_player_id_predicted_at', 'predictions', ['player_id', 'predicted_at'], unique=False)
+
+    # Create latest_predictions table
+    op.create_table('latest_predictions',
+        sa.Column('player_id', sa.String(), nullable=False),
+        sa.Column('model_version', sa.String(length=40), nullable=False),
+        sa.Column('churn_probability', sa.Float(), nullable=False),
+        sa.Column('churn_label', sa.Boolean(), nullable=False),
+        sa.Column('feature_date', sa.Date(), nullable=True),
+        sa.Column('predicted_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('player_id')
+    )
+
+
+def downgrade():
+    op.drop_table('latest_predictions')
+    op.drop_index('ix_predictions_player_id_predicted_at', table_name='predictions')
+    op.drop_table('predictions')    # drops its partitions too
@@ -0,0 +1,24 @@
+"""Keyset index for the at-risk export
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from models.online_migrations import create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (churn_probability, player_id) walked backwards serves ORDER BY ... DESC with a row-value bound
+    create_index_concurrently('ix_latest_predictions_churn_probability_player_id', 'latest_predictions',
+                              ['churn_probability', 'player_id'])
+
+
+def downgrade():
+    drop_index_concurrently('ix_latest_predictions_churn_probability_player_id', 'latest_predictions')
@@ -0,0 +1,24 @@
+"""Index on player_feature_vectors.refreshed_at
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from models.online_migrations import create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the scoring service reads the newest refreshed_at on every batch to invalidate its cache,
+    # and refresh_vectors prunes by it
+    create_index_concurrently('ix_player_feature_vectors_refreshed_at', 'player_feature_vectors', ['refreshed_at'])
+
+
+def downgrade():
+    drop_index_concurrently('ix_player_feature_vectors_refreshed_at', 'player_feature_vectors')
@@ -0,0 +1,110 @@
+"""
+bench_signatures.py
+Throughput of the behavioural signatures (generator/signatures.py) on a
+memory-mapped event store, at up to 100M bets.
+
+A synthetic store (one bot-like player in 50) is streamed to disk chunk by
+chunk, then compute_signatures runs over it in blocks of players; the store is
+paged in only for the rows being aggregated.
+
+Usage:
+    python benchmarks/bench_signatures.py --bets 100000000 --players 500000 --store /tmp/sig_store
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/../src"))
+
+from event_store import EventStore, EventStoreWriter
+from generator.signatures import compute_signatures, bot_mask, BLOCK_PLAYERS
+from instrumentation import peak_rss_mb
+
+END = np.datetime64('2025-01-01T00:00:00', 'ns')
+DAY_S = 86_400
+BOT_SHARE = 0.02
+
+
+def synthetic_chunk(rng, first_id, n_players, bets_per_player, sessions_per_player):
+    """sessions and bets of players first_id .. first_id + n_players - 1 over the last 30 days"""
+    ids = np.arange(first_id, first_id + n_players)
+    bot = rng.random(n_players) < BOT_SHARE
+
+    # bots log in about four times as often as people (20 vs 5 sessions a week in the generator)
+    n_s = rng.poisson(np.where(bot, 4 * sessions_per_player, sessions_per_player))
+    s_player = np.repeat(np.arange(n_players), n_s)
+    s_bot = bot[s_player]
+    day = rng.integers(0, 30, len(s_player))
+    # people log in in the evening, bots at any hour
+    hour = np.where(s_bot, rng.integers(0, 24, len(s_player)), np.clip(rng.normal(20, 2.5, len(s_player)), 0, 23.99))
+    login = END - ((30 - day) * DAY_S - (hour * 3600).astype(np.int64)).astype('timedelta64[s]')
+    minutes = np.maximum(1, rng.normal(np.where(s_bot, 5, 30), 20)).astype(np.int64)
+    sessions = pd.DataFrame({'player_id': ids[s_player], 'login_time': login,
+                             'logout_time': login + (minutes * 60).astype('timedelta64[s]')})
+
+    n_b = rng.poisson(bets_per_player, n_players)
+    b_player = np.repeat(np.arange(n_players), n_b)
+    bets = pd.DataFrame({
+        'player_id': ids[b_player],
+        'bet_amount': np.abs(rng.normal(np.where(bot[b_player], 0.5, 5), np.where(bot[b_player], 0.5, 10))).round(2),
+        'bet_time': END - rng.integers(1, 30 * DAY_S, len(b_player)).astype('timedelta64[s]'),
+    })
+    return ids, {'sessions': sessions, 'bets': bets}, bot
+
+
+def build_store(root, n_bets, n_players, sessions_per_player, chunk_players, seed=42):
+    rng = np.random.default_rng(seed)
+    bets_per_player = n_bets / n_players
+    bots = []
+    with EventStoreWriter(root) as writer:
+        for first in range(0, n_players, chunk_players):
+            ids, frames, bot = synthetic_chunk(rng, first + 1, min(chunk_players, n_players - first),
+                                               bets_per_player, sessions_per_player)
+            writer.append(ids, frames)
+            bots.append(bot)
+    return pd.DataFrame({'player_id': np.arange(1, n_players + 1)}), np.concatenate(bots)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bets', type=int, default=100_000_000)
+    parser.add_argument('--players', type=int, default=500_000)
+    parser.add_argument('--sessions-per-player', type=int, default=20)
+    parser.add_argument('--chunk-players', type=int, default=25_000, help='players per chunk written to the store')
+    parser.add_argument('--block-players', type=int, default=BLOCK_PLAYERS, help='players per signature block')
+    parser.add_argument('--store', default='/tmp/signature_store')
+    parser.add_argument('--keep', action='store_true', help='reuse/keep the store directory')
+    args = parser.parse_args()
+
+    if not (args.keep and os.path.exists(args.store)):
+        shutil.rmtree(args.store, ignore_errors=True)
+        t0 = time.perf_counter()
+        players, bots = build_store(args.store, args.bets, args.players, args.sessions_per_player, args.chunk_players)
+        print(f"built store in {time.perf_counter() - t0:.1f}s")
+    else:
+        players, bots = None, None
+    store = EventStore.open(args.store)
+    if players is None:
+        players = pd.DataFrame({'player_id': store['bets'].player_ids.to_numpy()})
+    print(f"{len(players)} players, {len(store['sessions'])} sessions, {len(store['bets'])} bets")
+
+    t0 = time.perf_counter()
+    sig = compute_signatures(players, store, pd.Timestamp(END).to_pydatetime(), block_players=args.block_players)
+    elapsed = time.perf_counter() - t0
+    n_bets = len(store['bets'])
+    print(f"compute_signatures: {elapsed:.1f}s ({n_bets / elapsed / 1e6:.1f}M bets/s), peak RSS {peak_rss_mb()} MB")
+    flagged = bot_mask(sig)
+    if bots is not None:
+        print(f"bot_mask: {flagged.sum()} flagged, recall {(flagged & bots).sum() / max(bots.sum(), 1):.3f}, "
+              f"false positives {(flagged & ~bots).sum()}")
+    if not args.keep:
+        shutil.rmtree(args.store, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
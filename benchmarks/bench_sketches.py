@@ -0,0 +1,98 @@
+"""
+bench_sketches.py
+Accuracy vs speed of the sketch aggregates against the same aggregates computed
+exactly with pandas groupby (nunique over login days / game names, median and
+p90 of bet size and session length).
+
+Usage:
+    python benchmarks/bench_sketches.py --players 10000 --bets-per-player 200
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/../src"))
+
+from sketches import approx_player_aggregates
+
+GAMES = ['slots', 'blackjack', 'roulette', 'poker', 'craps', 'baccarat']
+
+
+def synthetic_events(n_players, bets_per_player, sessions_per_player, seed=42):
+    """Event frames shaped like the generator output"""
+    rng = np.random.default_rng(seed)
+    end = np.datetime64('2025-01-01T00:00:00')
+    n_s = n_players * sessions_per_player
+    login = end - rng.integers(0, 30 * 86400, n_s).astype('timedelta64[s]')
+    sessions = pd.DataFrame({
+        'player_id': rng.integers(1, n_players + 1, n_s),
+        'login_time': login,
+        'logout_time': login + (np.maximum(1, rng.normal(30, 20, n_s)).astype(int) * 60).astype('timedelta64[s]'),
+    })
+    n_b = n_players * bets_per_player
+    bets = pd.DataFrame({
+        'player_id': rng.integers(1, n_players + 1, n_b),
+        'game_name': rng.choice(GAMES, n_b),
+        'bet_amount': np.abs(rng.normal(5, 10, n_b)).round(2),
+    })
+    players = pd.DataFrame({'player_id': np.arange(1, n_players + 1)})
+    return players, sessions, bets
+
+
+def exact_aggregates(players, sessions, bets):
+    """Exact per-player equivalents of PlayerSketches.to_frame, grouped the fastest way pandas allows"""
+    s = sessions.assign(day=sessions['login_time'].dt.floor('D'),
+                        length=(sessions['logout_time'] - sessions['login_time']).dt.total_seconds() / 60)
+    by_session, by_bet = s.groupby('player_id'), bets.groupby('player_id')
+    out = players[['player_id']].copy()
+    out['days_active'] = out['player_id'].map(by_session['day'].nunique()).fillna(0)
+    out['unique_games_played'] = out['player_id'].map(by_bet['game_name'].nunique()).fillna(0)
+    out['median_bet_size'] = out['player_id'].map(by_bet['bet_amount'].median())
+    out['p90_bet_size'] = out['player_id'].map(by_bet['bet_amount'].quantile(0.9))
+    out['median_session_length'] = out['player_id'].map(by_session['length'].median())
+    out['p90_session_length'] = out['player_id'].map(by_session['length'].quantile(0.9))
+    return out
+
+
+def best_of(repeat, fn, *args, **kwargs):
+    """(result, fastest wall time) of `repeat` calls"""
+    times = []
+    for _ in range(max(repeat, 1)):
+        t0 = time.perf_counter()
+        result = fn(*args, **kwargs)
+        times.append(time.perf_counter() - t0)
+    return result, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--players', type=int, default=10_000)
+    parser.add_argument('--bets-per-player', type=int, default=200)
+    parser.add_argument('--sessions-per-player', type=int, default=20)
+    parser.add_argument('--shards', type=int, default=4)
+    parser.add_argument('--relative-accuracy', type=float, default=0.01)
+    parser.add_argument('--repeat', type=int, default=3, help='timings are the best of this many runs')
+    args = parser.parse_args()
+
+    players, sessions, bets = synthetic_events(args.players, args.bets_per_player, args.sessions_per_player)
+    print(f"{len(players)} players, {len(sessions)} sessions, {len(bets)} bets")
+
+    exact, t_exact = best_of(args.repeat, exact_aggregates, players, sessions, bets)
+    approx, t_approx = best_of(args.repeat, approx_player_aggregates, players, sessions, bets,
+                               n_shards=args.shards, relative_accuracy=args.relative_accuracy)
+
+    print(f"exact pandas: {t_exact:.3f}s   sketches ({args.shards} shards merged): {t_approx:.3f}s")
+    for col in exact.columns[1:]:
+        e = exact[col].to_numpy(dtype=float)
+        a = approx[col].to_numpy(dtype=float)
+        ok = e > 0
+        rel = np.abs(a[ok] - e[ok]) / e[ok]
+        print(f"{col:>22}: mean rel. error {rel.mean():.4f}   p99 {np.quantile(rel, 0.99):.4f}")
+
+
+if __name__ == "__main__":
+    main()
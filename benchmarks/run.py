@@ -0,0 +1,267 @@
+"""
+run.py
+Benchmark suite for data generation, feature aggregation, DB loading and scoring.
+
+Each benchmark is run `--repeat` times per scale; the median time is appended to
+a JSONL history file and compared with the median of the previous runs recorded
+on the same machine. The run exits with status 1 when any benchmark is slower
+than its baseline by more than `--threshold` (fractional, 0.25 = 25%).
+
+Everything runs offline: DB loading uses an in-memory SQLite database unless
+`--db-url` points at a local Postgres.
+
+Usage:
+    python benchmarks/run.py --scales 1000,10000 --repeat 3
+    python benchmarks/run.py --only make_features,db_bulk_load --threshold 0.5
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.dirname(__file__) + "/..")
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "src"))
+
+import generator
+from instrumentation import count_rows, peak_rss_mb
+
+HISTORY_PATH = os.path.join(ROOT, "benchmarks", "results", "history.jsonl")
+DEFAULT_THRESHOLD = 0.25
+BASELINE_WINDOW = 5     # previous runs used for the baseline median
+SEED = 42
+
+
+class Benchmark:
+    """A timed function plus an untimed per-repeat setup returning its arguments"""
+
+    def __init__(self, name, func, setup, requires=()):
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.requires = requires
+
+
+def _event_window(ctx):
+    return ctx['start'], ctx['end']
+
+
+def _lookback_frames(ctx):
+    agg_start = ctx['end'] - timedelta(days=generator.CHURN_LOOKBACK_DAYS)
+    return (
+        ctx['players'],
+        ctx['sessions'][ctx['sessions']['login_time'] >= agg_start],
+        ctx['bets'][ctx['bets']['bet_time'] >= agg_start],
+        ctx['deposits'][ctx['deposits']['deposit_time'] >= agg_start],
+        ctx['withdrawals'][ctx['withdrawals']['withdrawal_time'] >= agg_start],
+        ctx['bonuses'][ctx['bonuses']['issued_date'] >= agg_start],
+    )
+
+
+def _make_features(players, s, b, d, w, r, reference_time, all_sessions_df):
+    return generator.make_features(players, s, b, d, w, r, reference_time=reference_time,
+                                   all_sessions_df=all_sessions_df)
+
+
+def _setup_db_load(ctx):
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import StaticPool
+    from models.models import Base
+
+    url = ctx['db_url']
+    if url.startswith('sqlite'):
+        engine = create_engine(url, poolclass=StaticPool, connect_args={'check_same_thread': False})
+    else:
+        engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    frames = {t: ctx[t] for t in ['players', 'sessions', 'bets', 'deposits', 'withdrawals', 'bonuses']}
+    return (engine, frames)
+
+
+def _db_load(engine, frames):
+    from loader import bulk_load
+    return bulk_load(engine, frames, create=False)
+
+
+def _setup_scoring(ctx):
+    from sklearn.ensemble import RandomForestClassifier
+
+    features = ctx['make_features']
+    X = features.drop(columns=['player_id', 'churn_label']).astype(float).to_numpy()
+    y = features['churn_label'].to_numpy()
+    model = RandomForestClassifier(n_estimators=100, class_weight='balanced', random_state=SEED, n_jobs=1)
+    model.fit(X, y)
+    return (model, X)
+
+
+def _score(model, X):
+    return model.predict_proba(X)[:, 1]
+
+
+def build_suite():
+    """Benchmarks in dependency order; results are stored in ctx under the benchmark name"""
+    def events(ctx):
+        return (ctx['players'],) + _event_window(ctx)
+
+    return [
+        Benchmark('generate_players', generator.generate_players, lambda ctx: (ctx['scale'],)),
+        Benchmark('generate_sessions', generator.generate_sessions, events, requires=('players',)),
+        Benchmark('generate_bets', generator.generate_bets, events, requires=('players',)),
+        Benchmark('generate_deposits', generator.generate_deposits, events, requires=('players',)),
+        Benchmark('generate_withdrawals', generator.generate_withdrawals, events, requires=('players',)),
+        Benchmark('generate_bonuses', generator.generate_bonuses, events, requires=('players',)),
+        Benchmark('inject_outliers', generator.inject_outliers,
+                  lambda ctx: (ctx['bets'].copy(), ctx['deposits'].copy()), requires=('bets', 'deposits')),
+        Benchmark('inject_missingness', generator.inject_missingness,
+                  lambda ctx: (ctx['bets'],), requires=('bets',)),
+        Benchmark('make_features', _make_features,
+                  lambda ctx: _lookback_frames(ctx) + (ctx['end'], ctx['sessions']),
+                  requires=('players', 'sessions', 'bets', 'deposits', 'withdrawals', 'bonuses')),
+        Benchmark('db_bulk_load', _db_load, _setup_db_load,
+                  requires=('players', 'sessions', 'bets', 'deposits', 'withdrawals', 'bonuses')),
+        Benchmark('model_scoring', _score, _setup_scoring, requires=('make_features',)),
+    ]
+
+
+# generator benchmarks also provide the fixtures later benchmarks depend on
+FIXTURE_NAMES = {
+    'generate_players': 'players', 'generate_sessions': 'sessions', 'generate_bets': 'bets',
+    'generate_deposits': 'deposits', 'generate_withdrawals': 'withdrawals', 'generate_bonuses': 'bonuses',
+    'make_features': 'make_features',
+}
+
+
+def run_benchmark(bench, ctx, repeat):
+    times, rows, result = [], None, None
+    for _ in range(repeat):
+        random.seed(SEED)
+        np.random.seed(SEED)
+        args = bench.setup(ctx)
+        t0 = time.perf_counter()
+        result = bench.func(*args)
+        times.append(time.perf_counter() - t0)
+        rows = count_rows(result)
+        if isinstance(result, np.ndarray):
+            rows = len(result)
+        elif isinstance(result, dict):
+            rows = sum(result.values())
+    return times, rows, result
+
+
+# ---------- history & regression gating ----------
+def machine_id():
+    return f"{platform.node()}|{platform.machine()}|py{platform.python_version()}"
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def baseline(history, benchmark, scale, machine, window=BASELINE_WINDOW):
+    """Median of the last `window` recorded medians for this benchmark/scale/machine"""
+    past = [h['median_s'] for h in history
+            if h['benchmark'] == benchmark and h['scale'] == scale and h['machine'] == machine]
+    return statistics.median(past[-window:]) if past else None
+
+
+def append_history(path, entries):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a') as f:
+        for e in entries:
+            f.write(json.dumps(e) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default='1000', help='comma-separated player counts, e.g. 1000,10000,100000')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', default=None, help='comma-separated benchmark names (dependencies still run as fixtures)')
+    parser.add_argument('--threshold', type=float, default=float(os.getenv('BENCH_THRESHOLD', DEFAULT_THRESHOLD)))
+    parser.add_argument('--history', default=HISTORY_PATH)
+    parser.add_argument('--no-save', action='store_true', help='compare against history without recording this run')
+    parser.add_argument('--db-url', default=os.getenv('BENCH_DATABASE_URL', 'sqlite://'))
+    args = parser.parse_args()
+
+    suite = build_suite()
+    selected = set(args.only.split(',')) if args.only else {b.name for b in suite}
+    unknown = selected - {b.name for b in suite}
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    history = load_history(args.history)
+    machine, revision = machine_id(), git_revision()
+    end = datetime(2025, 1, 1)
+    entries, regressions = [], []
+
+    for scale in [int(s) for s in args.scales.split(',')]:
+        ctx = {'scale': scale, 'start': end - timedelta(days=180), 'end': end, 'db_url': args.db_url}
+        print(f"\n=== scale: {scale} players ===")
+        print(f"{'benchmark':<22}{'median_s':>10}{'min_s':>10}{'rows':>12}{'baseline':>10}{'change':>9}")
+        for bench in suite:
+            is_fixture = bench.name in FIXTURE_NAMES and any(
+                FIXTURE_NAMES[bench.name] in b.requires for b in suite if b.name in selected)
+            if bench.name not in selected and not is_fixture:
+                continue
+            missing = [r for r in bench.requires if r not in ctx]
+            if missing:
+                print(f"{bench.name:<22} skipped (missing {', '.join(missing)})")
+                continue
+            # fixtures only need a single run when they are not being measured
+            repeat = args.repeat if bench.name in selected else 1
+            times, rows, result = run_benchmark(bench, ctx, repeat)
+            if bench.name in FIXTURE_NAMES:
+                ctx[FIXTURE_NAMES[bench.name]] = result
+            if bench.name not in selected:
+                continue
+
+            med = statistics.median(times)
+            base = baseline(history, bench.name, scale, machine)
+            change = (med / base - 1) if base else None
+            flag = ''
+            if change is not None and change > args.threshold:
+                regressions.append((bench.name, scale, change))
+                flag = '  REGRESSION'
+            change_str = f"{change:+.1%}" if change is not None else '-'
+            base_str = f"{base:.3f}" if base else '-'
+            print(f"{bench.name:<22}{med:>10.3f}{min(times):>10.3f}{str(rows):>12}{base_str:>10}{change_str:>9}{flag}")
+            entries.append({
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'revision': revision, 'machine': machine,
+                'benchmark': bench.name, 'scale': scale, 'repeat': repeat,
+                'median_s': round(med, 5), 'min_s': round(min(times), 5), 'rows': rows,
+                'rss_peak_mb': peak_rss_mb(),
+            })
+
+    if not args.no_save:
+        append_history(args.history, entries)
+        print(f"\nRecorded {len(entries)} results in {args.history}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for name, scale, change in regressions:
+            print(f"  {name} @ {scale}: {change:+.1%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text, Date, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text, Date, ForeignKey, JSON, LargeBinary, BigInteger, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
@@ -166,3 +166,109 @@ class PlayerFeatures(Base):
     predicted_at = Column(DateTime, nullable=True)
 
     created_at = Column(DateTime, default=datetime.now(timezone.utc))
+
+
+class FeatureVectorSchema(Base):
+    """Column layout of packed feature vectors (see src/serving.py)"""
+    __tablename__ = "feature_vector_schemas"
+
+    version = Column(String(16), primary_key=True)  # hash of feature_names + dtype
+    feature_names = Column(JSON, nullable=False)    # vector element order
+    dtype = Column(String(8), nullable=False)       # numpy dtype string, e.g. <f4
+    created_at = Column(DateTime, default=datetime.now(timezone.utc))
+
+
+class PlayerFeatureVector(Base):
+    """Narrow serving table: one packed model input vector per player"""
+    __tablename__ = "player_feature_vectors"
+
+    # no FK to players: refreshes must not pay for constraint checks on the scoring path
+    player_id = Column(String, primary_key=True)
+    version = Column(String(16), nullable=False)
+    vector = Column(LargeBinary, nullable=False)    # len(feature_names) values of `dtype`, packed
+    feature_date = Column(Date, nullable=True)
+    refreshed_at = Column(DateTime, nullable=False, index=True)    # newest value marks the latest refresh
+
+
+class PlayerDailyActivity(Base):
+    """Per-player, per-day event totals maintained incrementally (see src/rollups.py)"""
+    __tablename__ = "player_daily_activity"
+
+    player_id = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True, index=True)
+
+    sessions = Column(Integer, nullable=False, default=0)
+    session_minutes = Column(Float, nullable=False, default=0.0)
+    last_login = Column(DateTime, nullable=True)        # latest session start of the day
+
+    bets = Column(Integer, nullable=False, default=0)
+    bets_with_amount = Column(Integer, nullable=False, default=0)   # bets whose amount is known
+    bet_amount = Column(Float, nullable=False, default=0.0)
+    win_amount = Column(Float, nullable=False, default=0.0)
+    winning_bets = Column(Integer, nullable=False, default=0)
+    ggr = Column(Float, nullable=False, default=0.0)    # sum of bet - win where both are known
+
+    deposits = Column(Integer, nullable=False, default=0)
+    deposit_amount = Column(Float, nullable=False, default=0.0)
+    withdrawals = Column(Integer, nullable=False, default=0)
+    withdrawal_amount = Column(Float, nullable=False, default=0.0)
+    bonuses = Column(Integer, nullable=False, default=0)
+    bonuses_redeemed = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime, nullable=True)
+
+
+class PlayerDailyGame(Base):
+    """Bets per player, day and game (per-game counts of player_daily_activity)"""
+    __tablename__ = "player_daily_games"
+
+    player_id = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True, index=True)
+    game_name = Column(String(100), primary_key=True)
+    bets = Column(BigInteger, nullable=False, default=0)
+
+
+class PlayerExplanation(Base):
+    """Latest churn score and its top-k reasons per player (see src/explain.py)"""
+    __tablename__ = "player_explanations"
+
+    player_id = Column(String, primary_key=True)
+    model_version = Column(String(40), nullable=False, index=True)  # model_registry version; names the features
+    churn_probability = Column(Float, nullable=False)
+    base_value = Column(Float, nullable=False)      # expected log-odds before contributions
+    reasons = Column(LargeBinary, nullable=False)   # up to k packed (feature index <u2, value <f4, contribution <f4)
+    computed_at = Column(DateTime, nullable=False)
+
+
+class Prediction(Base):
+    """Append-only churn predictions, range-partitioned by prediction_date on Postgres (see src/predictions.py)"""
+    __tablename__ = "predictions"
+    __table_args__ = (
+        Index('ix_predictions_player_id_predicted_at', 'player_id', 'predicted_at'),   # per-player history
+        {'postgresql_partition_by': 'RANGE (prediction_date)'},
+    )
+
+    # the partition key has to be part of the primary key
+    prediction_date = Column(Date, primary_key=True)
+    player_id = Column(String, primary_key=True)
+    predicted_at = Column(DateTime, primary_key=True)
+    model_version = Column(String(40), nullable=False)
+    churn_probability = Column(Float, nullable=False)
+    churn_label = Column(Boolean, nullable=False)
+    feature_date = Column(Date, nullable=True)
+
+
+class LatestPrediction(Base):
+    """Newest row of predictions per player: the constant-time lookup for scoring consumers"""
+    __tablename__ = "latest_predictions"
+    __table_args__ = (
+        # keyset pagination of the at-risk export (src/export.py), highest risk first
+        Index('ix_latest_predictions_churn_probability_player_id', 'churn_probability', 'player_id'),
+    )
+
+    player_id = Column(String, primary_key=True)
+    model_version = Column(String(40), nullable=False)
+    churn_probability = Column(Float, nullable=False)
+    churn_label = Column(Boolean, nullable=False)
+    feature_date = Column(Date, nullable=True)
+    predicted_at = Column(DateTime, nullable=False)
@@ -0,0 +1,191 @@
+"""
+online_migrations.py
+Schema changes for large, busy tables without stalling ingestion.
+
+Used from alembic/versions scripts (the project root is on sys.path there):
+
+    from models.online_migrations import add_column, backfill, create_index_concurrently
+
+    def upgrade():
+        add_column('bets', sa.Column('net_amount', sa.Float(), nullable=True))
+        backfill('bets', 'net_amount = bet_amount - win_amount', where='net_amount IS NULL')
+        create_index_concurrently('ix_bets_player_id_bet_timestamp', 'bets', ['player_id', 'bet_timestamp'])
+
+- add_column: nullable, no volatile default, so Postgres only touches the
+  catalog; a short lock_timeout makes the ALTER give up instead of queueing
+  writers behind it while a long transaction holds the table.
+- create_index_concurrently / drop_index_concurrently: CREATE/DROP INDEX
+  CONCURRENTLY inside an autocommit block (it cannot run in a transaction);
+  an INVALID index left by an interrupted build is dropped and rebuilt.
+- backfill: UPDATE in keyset-paginated batches over the primary key, each
+  committed on its own, sleeping between batches and resizing them to stay
+  near target_batch_seconds; progress is reported after every batch.
+
+On other databases (SQLite in tests) the same calls fall back to plain DDL.
+backfill also runs outside Alembic with bind=engine, e.g. from a shell for a
+backfill too long for a deploy window.
+"""
+
+import time
+
+from sqlalchemy import text
+
+# ---------- CONFIG ----------
+LOCK_TIMEOUT = '5s'             # DDL waits at most this long for its lock
+BACKFILL_BATCH_SIZE = 10_000
+BACKFILL_MIN_BATCH = 500
+BACKFILL_MAX_BATCH = 200_000
+BACKFILL_SLEEP = 0.05           # seconds between batches, leaves room for ingestion
+TARGET_BATCH_SECONDS = 0.5      # batch size adapts to keep each UPDATE about this long
+# ----------------------------
+
+
+def _op():
+    from alembic import op
+    return op
+
+
+def _is_postgres(bind):
+    return bind.dialect.name == 'postgresql'
+
+
+def add_column(table, column, lock_timeout=LOCK_TIMEOUT):
+    """ALTER TABLE ADD COLUMN that fails fast instead of blocking writers while it waits for its lock"""
+    op = _op()
+    if _is_postgres(op.get_bind()):
+        op.execute(f"SET LOCAL lock_timeout = '{lock_timeout}'")
+    op.add_column(table, column)
+
+
+def _index_is_invalid(bind, name):
+    row = bind.execute(text(
+        "SELECT NOT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid WHERE c.relname = :name"
+    ), {'name': name}).first()
+    return bool(row and row[0])
+
+
+def create_index_concurrently(name, table, columns, unique=False, **kw):
+    """CREATE INDEX CONCURRENTLY IF NOT EXISTS, outside the migration transaction"""
+    op = _op()
+    bind = op.get_bind()
+    if not _is_postgres(bind):
+        op.create_index(name, table, columns, unique=unique, **kw)
+        return
+    with op.get_context().autocommit_block():
+        if _index_is_invalid(bind, name):
+            # an interrupted concurrent build leaves an INVALID index that IF NOT EXISTS would keep
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+        op.create_index(name, table, columns, unique=unique, postgresql_concurrently=True, if_not_exists=True, **kw)
+
+
+def drop_index_concurrently(name, table):
+    """DROP INDEX CONCURRENTLY IF EXISTS, outside the migration transaction"""
+    op = _op()
+    if not _is_postgres(op.get_bind()):
+        op.drop_index(name, table_name=table)
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def _estimate_rows(conn, table):
+    """Row estimate from the planner statistics on Postgres (count(*) would scan the table)"""
+    if _is_postgres(conn):
+        n = conn.execute(text("SELECT reltuples::bigint FROM pg_class WHERE relname = :t"), {'t': table}).scalar()
+        if n is not None and n >= 0:
+            return int(n)
+    return conn.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+
+
+def print_progress(p):
+    eta = f", eta {p['eta_s']:.0f}s" if p['eta_s'] is not None else ''
+    print(f"[backfill {p['table']}] {p['scanned']}/{p['estimated_rows']} rows scanned ({p['fraction']:.1%}), "
+          f"{p['updated']} updated, {p['rows_per_s']:.0f} rows/s, batch {p['batch_size']}{eta}")
+
+
+def backfill(table, set_clause, where=None, key='id', bind=None, batch_size=BACKFILL_BATCH_SIZE,
+             sleep=BACKFILL_SLEEP, target_batch_seconds=TARGET_BATCH_SECONDS, progress=print_progress):
+    """UPDATE table SET set_clause [WHERE where] in committed keyset batches; returns rows updated.
+
+    Batches are ranges (last_key, upper] of the primary key, so each one is an
+    index range scan no matter how far along the backfill is; `where` should
+    make the UPDATE idempotent (e.g. "col IS NULL") so an interrupted run can
+    simply be started again. bind=None runs inside an Alembic migration.
+    """
+    if bind is None:
+        op = _op()
+        with op.get_context().autocommit_block():
+            return _backfill(lambda: _NoTransaction(op.get_bind()), table, set_clause, where, key, batch_size,
+                             sleep, target_batch_seconds, progress)
+    return _backfill(bind.begin, table, set_clause, where, key, batch_size, sleep, target_batch_seconds, progress)
+
+
+class _NoTransaction:
+    """Context manager handing out an autocommit connection (each statement commits)"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _backfill(begin, table, set_clause, where, key, batch_size, sleep, target_batch_seconds, progress):
+    extra = f" AND ({where})" if where else ''
+    next_key = text(f"SELECT {key} FROM {table} WHERE {key} > :last ORDER BY {key} LIMIT 1 OFFSET :skip")
+    first_key = text(f"SELECT {key} FROM {table} ORDER BY {key} LIMIT 1 OFFSET :skip")
+    update = text(f"UPDATE {table} SET {set_clause} WHERE {key} > :last AND {key} <= :upper{extra}")
+    update_first = text(f"UPDATE {table} SET {set_clause} WHERE {key} <= :upper{extra}")
+    last_row = text(f"SELECT max({key}) FROM {table}")
+    count = text(f"SELECT count(*) FROM {table} WHERE {key} > :last AND {key} <= :upper")
+    count_first = text(f"SELECT count(*) FROM {table} WHERE {key} <= :upper")
+
+    with begin() as conn:
+        estimated = _estimate_rows(conn, table)
+    started = time.perf_counter()
+    last, scanned, updated = None, 0, 0
+    while True:
+        t0 = time.perf_counter()
+        with begin() as conn:
+            params = {'skip': batch_size - 1}
+            if last is None:
+                upper = conn.execute(first_key, params).scalar()
+            else:
+                upper = conn.execute(next_key, {**params, 'last': last}).scalar()
+            final = upper is None
+            if final:
+                # fewer than batch_size rows left: finish at the current maximum key
+                upper = conn.execute(last_row).scalar()
+                if upper is None or (last is not None and upper <= last):
+                    break
+            if last is None:
+                result = conn.execute(update_first, {'upper': upper})
+                scanned += conn.execute(count_first, {'upper': upper}).scalar()
+            else:
+                result = conn.execute(update, {'last': last, 'upper': upper})
+                # the last batch is usually partial, and rows may come and go while the backfill runs
+                scanned += conn.execute(count, {'last': last, 'upper': upper}).scalar()
+            updated += max(result.rowcount, 0)
+        elapsed = time.perf_counter() - t0
+        last = upper
+
+        total_s = time.perf_counter() - started
+        fraction = 1.0 if final or not estimated else min(scanned / estimated, 1.0)
+        rate = scanned / total_s if total_s > 0 else 0.0
+        if progress:
+            progress({'table': table, 'scanned': scanned, 'estimated_rows': estimated, 'fraction': fraction,
+                      'updated': updated, 'batch_size': batch_size, 'rows_per_s': rate,
+                      'eta_s': (estimated - scanned) / rate if rate and not final and estimated > scanned else None})
+        if final:
+            break
+        # keep batches short enough that row locks and WAL bursts stay small
+        if elapsed > 2 * target_batch_seconds:
+            batch_size = max(BACKFILL_MIN_BATCH, batch_size // 2)
+        elif elapsed < target_batch_seconds / 2:
+            batch_size = min(BACKFILL_MAX_BATCH, batch_size * 2)
+        if sleep:
+            time.sleep(sleep)
+    return updated
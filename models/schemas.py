@@ -234,6 +234,27 @@ class BatchPredictionResponse(BaseModel):
     total_processed: int
     processing_time_seconds: float
 
+# Explanation Schemas
+class Reason(BaseModel):
+    feature: str
+    value: float
+    contribution: float  # log-odds contribution to churn risk (positive raises it)
+
+class ExplanationResponse(BaseModel):
+    player_id: str
+    model_version: str
+    churn_probability: float
+    base_value: float  # model output (log-odds) before any feature contribution
+    reasons: List[Reason]
+    computed_at: datetime
+
+class BatchExplanationRequest(BaseModel):
+    player_ids: List[str]
+
+class BatchExplanationResponse(BaseModel):
+    explanations: List[ExplanationResponse]
+    total_processed: int
+
 # Model Performance Schemas
 class ModelMetrics(BaseModel):
     model_version: str
@@ -0,0 +1,224 @@
+"""
+api.py
+Churn scoring service (FastAPI).
+
+Scores players from their packed feature vectors (serving.py) with the live
+version of the model registry (model_registry.py). The registry's CURRENT
+version is followed from a background thread, and /model/activate switches
+versions on demand; either way the swap is atomic and in-flight requests finish
+on the version they started with.
+
+Batch scores are cached for the live model version until the feature vectors
+are refreshed (responses.BatchCache, keyed on the vectors' newest
+refreshed_at), so repeated pulls of a daily batch are served without
+rescoring; every prediction reports its vector's own feature_date. The batch
+body is encoded straight from the score arrays and compressed as the client
+accepts.
+
+    GET  /health                 HealthResponse
+    GET  /model/metrics          ModelMetricsResponse (live version + history)
+    POST /model/activate         {"version": "..."}: make a registered version CURRENT and live
+    POST /predict                PredictionRequest -> PredictionResponse
+    POST /predict/batch          BatchPredictionRequest -> BatchPredictionResponse (JSON via orjson, or
+                                 Arrow IPC with Accept: application/vnd.apache.arrow.stream; gzip/zstd)
+    GET  /explain/{player_id}    ExplanationResponse: stored score + top reasons (explain.py batch job)
+    POST /explain/batch          BatchExplanationRequest -> BatchExplanationResponse
+    GET  /export/at-risk         one keyset page of at-risk players (export.py): {"rows", "next_cursor"}
+    GET  /export/at-risk.csv     the whole at-risk export, streamed (also .parquet)
+
+Environment: DATABASE_URL (default sqlite:///churn.db), MODEL_REGISTRY_DIR.
+
+Usage:
+    uvicorn api:app --port 8000         # from src/, with the project root on PYTHONPATH
+"""
+
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import create_engine, text
+
+from models.schemas import (BatchExplanationRequest, BatchExplanationResponse, BatchPredictionRequest,
+                            BatchPredictionResponse, ExplanationResponse, HealthResponse, ModelMetricsResponse,
+                            PredictionRequest, PredictionResponse)
+from explain import fetch_explanations
+from export import MAX_PAGE_SIZE, MIN_PROBABILITY, PAGE_SIZE, STREAMS, fetch_page
+from model_registry import REGISTRY_DIR, LiveModel, ModelRegistry
+from responses import BatchCache, compress, encode_batch, negotiate_format
+from serving import fetch_vectors, latest_refresh
+
+# ---------- CONFIG ----------
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///churn.db")
+CHURN_THRESHOLD = 0.5
+# ----------------------------
+
+engine = create_engine(DATABASE_URL)
+registry = ModelRegistry(REGISTRY_DIR)
+live = LiveModel(registry)
+batch_cache = BatchCache()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    live.watch()
+    yield
+    live.stop()
+
+
+app = FastAPI(title="Player churn scoring", lifespan=lifespan)
+
+
+class ActivateRequest(BaseModel):
+    version: str
+
+
+def _model():
+    model = live.get()
+    if model is None:
+        raise HTTPException(status_code=503, detail="no model version is active")
+    return model
+
+
+def score(model, player_ids):
+    """(ids, probabilities, feature dates, refreshed_at) for the players with a vector in the model's layout"""
+    ids, X, feature_dates, refreshed = fetch_vectors(engine, player_ids, feature_names=list(model.feature_names),
+                                                     with_dates=True)
+    # a vector without a feature_date is reported with the day it was written
+    feature_dates = np.array([d if d is not None else r.date() for d, r in zip(feature_dates, refreshed)],
+                             dtype=object)
+    return ids, (model.predict_proba(X) if len(ids) else np.empty(0)), feature_dates, refreshed
+
+
+def _responses(ids, proba, feature_dates, predicted_at):
+    return [PredictionResponse(player_id=pid, churn_probability=float(p), churn_label=bool(p >= CHURN_THRESHOLD),
+                               confidence_score=float(abs(p - 0.5) * 2), feature_date=d, predicted_at=predicted_at)
+            for pid, p, d in zip(ids, proba, feature_dates)]
+
+
+@app.get("/health", response_model=HealthResponse)
+def health():
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        connected = True
+    except Exception:
+        connected = False
+    return HealthResponse(status="ok" if connected and live.loaded else "degraded", timestamp=datetime.now(),
+                          database_connected=connected, model_loaded=live.loaded)
+
+
+@app.get("/model/metrics", response_model=ModelMetricsResponse)
+def model_metrics():
+    model = _model()
+    if model.metrics is None:
+        raise HTTPException(status_code=404, detail=f"model version {model.version} has no metrics")
+    history = [m for m in registry.metrics_history() if m.model_version != model.version]
+    return ModelMetricsResponse(current_metrics=model.metrics, historical_metrics=history)
+
+
+@app.post("/model/activate")
+def activate(request: ActivateRequest):
+    try:
+        registry.activate(request.version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    model = live.swap(request.version)
+    return {"version": model.version, "loaded_at": model.loaded_at}
+
+
+@app.post("/predict", response_model=PredictionResponse)
+def predict(request: PredictionRequest):
+    model = _model()        # one version for the whole request, even if a swap happens meanwhile
+    ids, proba, feature_dates, _ = score(model, [request.player_id])
+    if not len(ids):
+        raise HTTPException(status_code=404, detail=f"no feature vector for player {request.player_id}")
+    if request.feature_date is not None and feature_dates[0] != request.feature_date:
+        raise HTTPException(status_code=404, detail=f"the feature vector of player {request.player_id} is for "
+                                                    f"{feature_dates[0]}, not {request.feature_date}")
+    return _responses(ids, proba, feature_dates, datetime.now())[0]
+
+
+def cached_score(model, player_ids):
+    """score() through batch_cache: (ids, probabilities, feature dates, predicted_at), ordered by player_id"""
+    player_ids = [str(p) for p in player_ids]
+    stamp = latest_refresh(engine)
+    batch_cache.sync(stamp)         # refreshed vectors invalidate every cached score
+    cached_ids, cached_proba, cached_dates, cached_at, missing = batch_cache.lookup(model.version, player_ids)
+    if missing:
+        ids, proba, feature_dates, refreshed = score(model, missing)
+    else:
+        ids, proba, feature_dates, refreshed = np.empty(0, dtype=object), np.empty(0), [], []
+    predicted_at = datetime.now()
+    if missing:
+        # players without a vector are remembered as such until the next refresh
+        absent = set(missing).difference(ids)
+        batch_cache.store(stamp, model.version, list(ids), proba, feature_dates, refreshed, predicted_at, absent)
+    ids = np.concatenate([np.asarray(cached_ids, dtype=object), ids])
+    proba = np.concatenate([cached_proba, proba])
+    dates = np.asarray(cached_dates + list(feature_dates), dtype=object)
+    times = np.asarray(cached_at + [predicted_at] * (len(ids) - len(cached_ids)), dtype=object)
+    order = np.argsort(ids, kind='stable')
+    return ids[order], proba[order], list(dates[order]), list(times[order])
+
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+def predict_batch(request: BatchPredictionRequest, http: Request):
+    started = time.perf_counter()
+    model = _model()
+    ids, proba, feature_dates, predicted_at = cached_score(model, request.player_ids)
+    if request.feature_date is not None:
+        # only players whose stored vector is for the requested date
+        keep = [i for i, d in enumerate(feature_dates) if d == request.feature_date]
+        ids, proba = ids[keep], proba[keep]
+        feature_dates, predicted_at = [feature_dates[i] for i in keep], [predicted_at[i] for i in keep]
+    body, media_type = encode_batch(list(ids), proba, feature_dates, predicted_at, time.perf_counter() - started,
+                                    fmt=negotiate_format(http.headers.get('accept')), threshold=CHURN_THRESHOLD)
+    body, encoding = compress(body, http.headers.get('accept-encoding'))
+    headers = {'Vary': 'Accept, Accept-Encoding', 'X-Model-Version': model.version}
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+@app.get("/explain/{player_id}", response_model=ExplanationResponse)
+def explain(player_id: str):
+    # precomputed by the explain.py batch job: one row read, no inference
+    explanations = fetch_explanations(engine, [player_id], registry)
+    if not explanations:
+        raise HTTPException(status_code=404, detail=f"no explanation for player {player_id}")
+    return explanations[0]
+
+
+@app.post("/explain/batch", response_model=BatchExplanationResponse)
+def explain_batch(request: BatchExplanationRequest):
+    explanations = fetch_explanations(engine, request.player_ids, registry)
+    return BatchExplanationResponse(explanations=explanations, total_processed=len(explanations))
+
+
+@app.get("/export/at-risk")
+def export_page(min_probability: float = MIN_PROBABILITY, country: Optional[List[str]] = Query(None),
+                vip_level: Optional[List[int]] = Query(None), cursor: Optional[str] = None,
+                limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    try:
+        rows, next_cursor = fetch_page(engine, min_probability, country, vip_level, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"rows": rows, "next_cursor": next_cursor}
+
+
+@app.get("/export/at-risk.{fmt}")
+def export_file(fmt: str, min_probability: float = MIN_PROBABILITY, country: Optional[List[str]] = Query(None),
+                vip_level: Optional[List[int]] = Query(None)):
+    if fmt not in STREAMS:
+        raise HTTPException(status_code=404, detail=f"unknown export format {fmt!r}")
+    stream, media_type = STREAMS[fmt]
+    # rows are encoded and sent partition by partition; the export is never held in memory
+    return StreamingResponse(stream(engine, min_probability=min_probability, countries=country, vip_levels=vip_level),
+                             media_type=media_type,
+                             headers={'Content-Disposition': f'attachment; filename="at_risk.{fmt}"'})
@@ -0,0 +1,237 @@
+"""
+drift.py
+Monitors feature drift between a training baseline and new player_features batches.
+
+The reference is stored compactly as per-feature bin edges plus the training
+counts in each bin (one extra bin tracks missing values). Edges are quantiles,
+except that bool and low-cardinality features get one bin per value and point
+masses (the 0 of zero-inflated amounts) get a bin of their own. New batches
+are binned for all columns at once and only bin counts are accumulated, so the
+monitor can consume an unbounded stream of chunks with constant memory.
+
+Metrics per feature:
+    - PSI  (population stability index)
+    - KS   (max CDF distance, computed on the reference bins)
+    - JS   (Jensen-Shannon divergence, base 2, in [0, 1])
+
+Usage:
+    python drift.py ../raw_data/player_features.csv ../raw_data/player_features_test_drift.csv
+"""
+
+import json
+import sys
+import numpy as np
+import pandas as pd
+
+# ---------- CONFIG ----------
+N_BINS = 10                 # quantile bins per feature
+MASS_SHARE = 0.1            # a value holding this share of the rows gets its own bin
+PSI_WARN = 0.1              # moderate shift
+PSI_DRIFT = 0.2             # significant shift
+KS_DRIFT = 0.1              # floor; small batches use the KS critical value instead
+KS_C_ALPHA = 1.36           # two-sample KS critical coefficient at alpha=0.05
+JS_DRIFT = 0.1
+EPS = 1e-6                  # smoothing for empty bins
+CHUNK_ROWS = 100_000        # rows binned per vectorized pass
+# ----------------------------
+
+# columns that are identifiers or targets, never monitored
+NON_FEATURE_COLUMNS = ['player_id', 'churn_label', 'churn_probability']
+
+
+def feature_columns(df):
+    """Numeric, non-identifier columns of a player_features frame"""
+    numeric = df.select_dtypes(include=['number', 'bool']).columns
+    return [c for c in numeric if c not in NON_FEATURE_COLUMNS]
+
+
+def _bin_counts(values, edges):
+    """Count rows of `values` (n_rows, n_cols) into the inner `edges` (n_cols, n_bins - 1).
+
+    Returns an (n_cols, n_bins + 1) count matrix; the last bin holds missing values.
+    Edges are padded with +inf so columns with fewer distinct edges share the matrix.
+    """
+    n_cols, n_inner = edges.shape
+    n_bins = n_inner + 1
+    counts = np.zeros((n_cols, n_bins + 1), dtype=np.int64)
+    for start in range(0, len(values), CHUNK_ROWS):
+        block = values[start:start + CHUNK_ROWS]
+        missing = np.isnan(block)
+        idx = (block[:, :, None] >= edges[None, :, :]).sum(axis=2)
+        idx[missing] = n_bins
+        flat = idx + np.arange(n_cols) * (n_bins + 1)
+        counts += np.bincount(flat.ravel(), minlength=n_cols * (n_bins + 1)).reshape(n_cols, n_bins + 1)
+    return counts
+
+
+def _edges(col, n_bins=N_BINS):
+    """Inner bin edges (at most n_bins - 1) for the non-missing values of one column.
+
+    Bool and low-cardinality columns get one bin per value. Otherwise values
+    holding at least MASS_SHARE of the rows (typically the 0 of zero-inflated
+    amounts) get a bin of their own, [v, nextafter(v)), and the remaining
+    edges are quantiles of the other values; plain quantile edges would
+    collapse onto the point mass and put everything in one bin.
+    """
+    n_inner = n_bins - 1
+    distinct, counts = np.unique(col, return_counts=True)
+    if len(distinct) <= n_inner:
+        return distinct
+    share = counts / col.size
+    masses = distinct[share >= MASS_SHARE]
+    masses = masses[np.argsort(-share[share >= MASS_SHARE], kind='stable')][:n_inner // 2]
+    mass_edges = np.concatenate([masses, np.nextafter(masses, np.inf)])
+    rest = col[~np.isin(col, masses)]
+    n_quantiles = n_inner - len(mass_edges)
+    if n_quantiles > 0 and rest.size:
+        quantiles = np.quantile(rest, np.linspace(0, 1, n_quantiles + 2)[1:-1])
+    else:
+        quantiles = np.empty(0)
+    return np.unique(np.concatenate([mass_edges, quantiles]))[:n_inner]
+
+
+def _as_matrix(df, columns):
+    """Float matrix of `columns`; absent columns are treated as missing"""
+    out = np.full((len(df), len(columns)), np.nan)
+    for j, c in enumerate(columns):
+        if c in df.columns:
+            out[:, j] = pd.to_numeric(df[c], errors='coerce').astype(float).to_numpy()
+    return out
+
+
+def drift_metrics(ref_counts, cur_counts):
+    """Vectorized PSI, KS and JS for every feature row of two count matrices"""
+    p = ref_counts / np.maximum(ref_counts.sum(axis=1, keepdims=True), 1)
+    q = cur_counts / np.maximum(cur_counts.sum(axis=1, keepdims=True), 1)
+    ps = np.clip(p, EPS, None)
+    qs = np.clip(q, EPS, None)
+    psi = ((qs - ps) * np.log(qs / ps)).sum(axis=1)
+
+    # KS on the ordered (non-missing) bins
+    ks = np.abs(np.cumsum(p[:, :-1], axis=1) - np.cumsum(q[:, :-1], axis=1)).max(axis=1)
+
+    m = 0.5 * (p + q)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kl_pm = np.where(p > 0, p * np.log2(p / m), 0.0).sum(axis=1)
+        kl_qm = np.where(q > 0, q * np.log2(q / m), 0.0).sum(axis=1)
+    js = 0.5 * kl_pm + 0.5 * kl_qm
+    return psi, ks, js
+
+
+class DriftMonitor:
+    """Reference histograms for a set of features plus a running batch accumulator"""
+
+    def __init__(self, columns, edges, ref_counts):
+        self.columns = list(columns)
+        self.edges = np.asarray(edges, dtype=float)
+        self.ref_counts = np.asarray(ref_counts, dtype=np.int64)
+        self.reset()
+
+    @classmethod
+    def fit(cls, reference_df, columns=None, n_bins=N_BINS):
+        """Build the baseline from a training feature table"""
+        columns = list(columns) if columns is not None else feature_columns(reference_df)
+        values = _as_matrix(reference_df, columns)
+        edges = np.full((len(columns), n_bins - 1), np.inf)
+        for j in range(len(columns)):
+            col = values[:, j]
+            col = col[~np.isnan(col)]
+            if col.size == 0:
+                continue
+            # columns with fewer distinct edges are padded with +inf
+            inner = _edges(col, n_bins)
+            edges[j, :len(inner)] = inner
+        return cls(columns, edges, _bin_counts(values, edges))
+
+    def reset(self):
+        """Forget all batches seen since the last reset"""
+        self.counts = np.zeros_like(self.ref_counts)
+        self.rows_seen = 0
+
+    def update(self, batch_df):
+        """Accumulate bin counts for one chunk of new feature rows"""
+        if len(batch_df) == 0:
+            return self
+        self.counts += _bin_counts(_as_matrix(batch_df, self.columns), self.edges)
+        self.rows_seen += len(batch_df)
+        return self
+
+    def report(self):
+        """Per-feature drift metrics for everything accumulated so far"""
+        psi, ks, js = drift_metrics(self.ref_counts, self.counts)
+        n = self.ref_counts[:, :-1].sum(axis=1)
+        m = self.counts[:, :-1].sum(axis=1)
+        ks_limit = np.maximum(KS_DRIFT, KS_C_ALPHA * np.sqrt((n + m) / np.maximum(n * m, 1)))
+        status = np.where(
+            (psi >= PSI_DRIFT) | (ks >= ks_limit) | (js >= JS_DRIFT), 'drift',
+            np.where(psi >= PSI_WARN, 'warn', 'ok'),
+        )
+        ref_missing = self.ref_counts[:, -1] / np.maximum(self.ref_counts.sum(axis=1), 1)
+        cur_missing = self.counts[:, -1] / max(self.rows_seen, 1)
+        return pd.DataFrame({
+            'feature': self.columns,
+            'psi': psi.round(4),
+            'ks': ks.round(4),
+            'js': js.round(4),
+            'ref_missing_rate': ref_missing.round(4),
+            'missing_rate': cur_missing.round(4),
+            'status': status,
+        }).sort_values('psi', ascending=False, ignore_index=True)
+
+    def drifted_features(self):
+        """Names of features currently flagged as drifted"""
+        r = self.report()
+        return r.loc[r['status'] == 'drift', 'feature'].tolist()
+
+    def check(self, batch_df):
+        """One-shot report for a single batch (does not touch the running state)"""
+        counts = _bin_counts(_as_matrix(batch_df, self.columns), self.edges)
+        saved = self.counts, self.rows_seen
+        self.counts, self.rows_seen = counts, len(batch_df)
+        try:
+            return self.report()
+        finally:
+            self.counts, self.rows_seen = saved
+
+    # ---------- persistence ----------
+    def to_dict(self):
+        edges = [[float(e) for e in row if np.isfinite(e)] for row in self.edges]
+        return {
+            'columns': self.columns,
+            'n_bins': int(self.edges.shape[1] + 1),
+            'edges': edges,
+            'ref_counts': self.ref_counts.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        edges = np.full((len(d['columns']), d['n_bins'] - 1), np.inf)
+        for j, row in enumerate(d['edges']):
+            edges[j, :len(row)] = row
+        return cls(d['columns'], edges, d['ref_counts'])
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def monitor_csv(reference_path, batch_path, chunksize=CHUNK_ROWS):
+    """Fit on a reference CSV and stream a batch CSV through the monitor in chunks"""
+    monitor = DriftMonitor.fit(pd.read_csv(reference_path))
+    for chunk in pd.read_csv(batch_path, chunksize=chunksize):
+        monitor.update(chunk)
+    return monitor
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: python drift.py <reference_features.csv> <batch_features.csv>")
+        sys.exit(1)
+    monitor = monitor_csv(sys.argv[1], sys.argv[2])
+    print(f"Compared {monitor.rows_seen} rows against the reference")
+    print(monitor.report().to_string(index=False))
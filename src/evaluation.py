@@ -0,0 +1,210 @@
+"""
+evaluation.py
+Rolling-origin temporal cross-validation of the churn model.
+
+Feature snapshots are taken at several reference times; each snapshot's label
+is forward-looking (no login in the `horizon_days` after the snapshot), so a
+model is only ever trained on snapshots whose labels were known before the
+test snapshot:
+
+    snapshots = build_snapshots(players_df, EventStore.open(root), snapshot_times(end, n=6, step_days=14))
+    metrics, folds = cross_validate(snapshots, workers=4)
+    metrics[0]          # ModelMetrics (models/schemas.py) of the first fold
+    folds               # one row per fold: test snapshot, sizes, timings and the metrics
+
+Fold k trains on every snapshot t with t + horizon <= test time (expanding
+window, or the latest `max_train` snapshots) and tests on the k-th snapshot.
+The feature matrix and labels are written once as .npy files to a shared
+directory (/dev/shm when available); fold workers memory-map them and receive
+only row indices, so no fold copies the data through pickling.
+
+Usage:
+    python evaluation.py <generator_output_dir> [n_snapshots] [workers]   # players.csv + event_store/
+"""
+
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import (accuracy_score, average_precision_score, f1_score, precision_score, recall_score,
+                             roc_auc_score)
+
+from event_store import shared_dir
+from instrumentation import RunReport, get_report, set_report, stage
+from generator.features import make_features_from_store
+from generator.config import CHURN_LOOKBACK_DAYS, CHURN_LABEL_THRESHOLD
+from models.schemas import ModelMetrics
+
+# ---------- CONFIG ----------
+N_SNAPSHOTS = 6
+SNAPSHOT_STEP_DAYS = 14
+MIN_TRAIN_SNAPSHOTS = 1
+DECISION_THRESHOLD = 0.5
+SEED = 42
+NON_FEATURE_COLUMNS = ('player_id', 'churn_label', 'snapshot_time')
+# ----------------------------
+
+
+def default_model():
+    """The notebook's classifier, single-threaded (parallelism comes from the folds)"""
+    return RandomForestClassifier(n_estimators=200, class_weight='balanced', random_state=SEED, n_jobs=1)
+
+
+def snapshot_times(end, n=N_SNAPSHOTS, step_days=SNAPSHOT_STEP_DAYS, horizon_days=CHURN_LABEL_THRESHOLD):
+    """n reference times `step_days` apart, the latest leaving `horizon_days` of data after it for the label"""
+    last = end - timedelta(days=horizon_days)
+    return [last - timedelta(days=step_days * i) for i in reversed(range(n))]
+
+
+def build_snapshots(players_df, store, times, horizon_days=CHURN_LABEL_THRESHOLD, lookback_days=CHURN_LOOKBACK_DAYS,
+                    cache=None):
+    """Feature snapshots at `times` with forward-looking churn labels, stacked with a snapshot_time column.
+
+    The label of snapshot t is player_features' churn_label at t + horizon_days
+    (no login in the horizon), computed from the same store; players who were
+    already churned at t are kept, the model sees their days_since_last_login.
+    Players who registered after t are left out of that snapshot.
+    """
+    registered = pd.to_datetime(players_df['registration_date']).to_numpy()
+    parts = []
+    for t in times:
+        with stage('snapshot') as st:
+            players = players_df[registered <= np.datetime64(pd.Timestamp(t))]
+            features = make_features_from_store(players, store, reference_time=t, lookback_days=lookback_days,
+                                                cache=cache)
+            future = make_features_from_store(players, store, reference_time=t + timedelta(days=horizon_days),
+                                              lookback_days=lookback_days, churn_threshold=horizon_days,
+                                              features=['churn_label'], cache=cache)
+            features = features.drop(columns='churn_label').assign(
+                churn_label=future['churn_label'].to_numpy(), snapshot_time=pd.Timestamp(t))
+            st.add_rows(len(features))
+        parts.append(features)
+    return pd.concat(parts, ignore_index=True)
+
+
+def feature_columns(snapshots):
+    """Numeric/bool columns of a snapshot frame except ids, label and snapshot time"""
+    return [c for c in snapshots.columns if c not in NON_FEATURE_COLUMNS
+            and (pd.api.types.is_numeric_dtype(snapshots[c]) or pd.api.types.is_bool_dtype(snapshots[c]))]
+
+
+def rolling_origin_folds(times, horizon_days=CHURN_LABEL_THRESHOLD, min_train=MIN_TRAIN_SNAPSHOTS, max_train=None):
+    """[(train_times, test_time)]: train snapshots are those whose labels are complete by the test time"""
+    times = sorted(pd.Timestamp(t) for t in set(times))
+    horizon = pd.Timedelta(days=horizon_days)
+    folds = []
+    for test in times:
+        train = [t for t in times if t + horizon <= test]
+        if max_train:
+            train = train[-max_train:]
+        if len(train) >= min_train:
+            folds.append((train, test))
+    return folds
+
+
+def classification_metrics(y_true, proba, model_version, threshold=DECISION_THRESHOLD):
+    """ModelMetrics for predicted churn probabilities (AUCs are NaN when a fold has one class)"""
+    y_pred = (proba >= threshold).astype(int)
+    both = len(np.unique(y_true)) == 2
+    return ModelMetrics(
+        model_version=model_version,
+        accuracy=accuracy_score(y_true, y_pred),
+        precision=precision_score(y_true, y_pred, zero_division=0),
+        recall=recall_score(y_true, y_pred, zero_division=0),
+        f1_score=f1_score(y_true, y_pred, zero_division=0),
+        roc_auc=roc_auc_score(y_true, proba) if both else float('nan'),
+        pr_auc=average_precision_score(y_true, proba) if both else float('nan'),
+        created_at=datetime.now(),
+    )
+
+
+def _fit_fold(X, y, train_idx, test_idx, model, model_version):
+    started = time.perf_counter()
+    with stage('cv_fit') as st:
+        # fancy indexing reads only this fold's rows from the mapped matrix
+        model = clone(model).fit(X[train_idx], y[train_idx])
+        st.add_rows(len(train_idx))
+    with stage('cv_predict') as st:
+        proba = model.predict_proba(X[test_idx])
+        proba = proba[:, list(model.classes_).index(1)] if 1 in model.classes_ else np.zeros(len(test_idx))
+        st.add_rows(len(test_idx))
+    return classification_metrics(y[test_idx], proba, model_version), time.perf_counter() - started
+
+
+def _fit_fold_in_worker(root, train_idx, test_idx, model, model_version):
+    set_report(RunReport('worker', profile_dir=''))
+    X = np.load(os.path.join(root, 'X.npy'), mmap_mode='r')
+    y = np.load(os.path.join(root, 'y.npy'), mmap_mode='r')
+    metrics, seconds = _fit_fold(X, y, train_idx, test_idx, model, model_version)
+    return metrics, seconds, get_report().stages
+
+
+def cross_validate(snapshots, columns=None, model=None, workers=None, horizon_days=CHURN_LABEL_THRESHOLD,
+                   min_train=MIN_TRAIN_SNAPSHOTS, max_train=None, model_version='cv'):
+    """Fit and score every rolling-origin fold; returns (list of ModelMetrics, per-fold DataFrame)"""
+    columns = list(columns or feature_columns(snapshots))
+    model = model if model is not None else default_model()
+    workers = workers or os.cpu_count() or 1
+    times = snapshots['snapshot_time'].to_numpy(dtype='datetime64[ns]')
+    folds = rolling_origin_folds(pd.unique(times), horizon_days, min_train, max_train)
+    if not folds:
+        raise ValueError("no fold has enough earlier snapshots; add snapshots or lower min_train")
+
+    X = np.ascontiguousarray(snapshots[columns].to_numpy(dtype=np.float32))
+    y = snapshots['churn_label'].to_numpy(dtype=np.int8)
+    index = [(np.flatnonzero(np.isin(times, np.array(train, dtype='datetime64[ns]'))),
+              np.flatnonzero(times == np.datetime64(test, 'ns'))) for train, test in folds]
+    versions = [f"{model_version}-fold{k}" for k in range(len(folds))]
+
+    with stage('cross_validate'):
+        if workers == 1 or len(folds) == 1:
+            results = [_fit_fold(X, y, tr, te, model, v) for (tr, te), v in zip(index, versions)]
+        else:
+            root = shared_dir('churn_cv_')
+            try:
+                with stage('share_matrix'):
+                    np.save(os.path.join(root, 'X.npy'), X)
+                    np.save(os.path.join(root, 'y.npy'), y)
+                with ProcessPoolExecutor(max_workers=min(workers, len(folds))) as pool:
+                    futures = [pool.submit(_fit_fold_in_worker, root, tr, te, model, v)
+                               for (tr, te), v in zip(index, versions)]
+                    results = []
+                    for future in futures:
+                        metrics, seconds, stages = future.result()
+                        get_report().absorb(stages)
+                        results.append((metrics, seconds))
+            finally:
+                shutil.rmtree(root, ignore_errors=True)
+
+    metrics = [m for m, _ in results]
+    report = pd.DataFrame([{
+        'fold': k, 'test_snapshot': test, 'train_snapshots': len(train),
+        'n_train': len(tr), 'n_test': len(te), 'test_churn_rate': float(y[te].mean()) if len(te) else float('nan'),
+        'fit_seconds': seconds, **m.model_dump(exclude={'model_version', 'created_at'}),
+    } for k, ((train, test), (tr, te), (m, seconds)) in enumerate(zip(folds, index, results))])
+    return metrics, report
+
+
+if __name__ == "__main__":
+    from event_store import EventStore
+
+    if len(sys.argv) < 2:
+        print("usage: python evaluation.py <generator_output_dir> [n_snapshots] [workers]")
+        sys.exit(1)
+    out_dir = sys.argv[1]
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else N_SNAPSHOTS
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    players = pd.read_csv(os.path.join(out_dir, 'players.csv'))
+    store = EventStore.open(os.path.join(out_dir, 'event_store'))
+    end = pd.Series(store['sessions'].last_times()).max().to_pydatetime()
+    snapshots = build_snapshots(players, store, snapshot_times(end, n))
+    metrics, folds = cross_validate(snapshots, workers=workers)
+    print(folds.to_string(index=False))
+    print(get_report().summary())
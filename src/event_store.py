@@ -0,0 +1,425 @@
+"""
+event_store.py
+Per-player index over event tables for O(1) slice access, in memory or memory-mapped from disk.
+
+Each table is sorted once by (player_id, timestamp) and an offsets array
+(CSR-style) records where every player's events start and end, so
+
+    bets = EventTable.from_frame(bets_df, 'bet_time', player_ids)
+    a, b = bets.bounds(42)                      # row range of player 42
+    amounts = bets['bet_amount'][a:b]           # zero-copy view
+    a, b = bets.range(42, start, end)           # events in [start, end) via searchsorted
+
+replaces `df[df['player_id'] == pid]` boolean masks that scan the whole table.
+Rows without a player_id cannot be attributed and are dropped; missing
+timestamps sort after all valid times within a player.
+
+On disk (EventStore.save / EventStore.open / EventStoreWriter) every table is a
+directory of raw little-endian column files plus meta.json:
+
+    <root>/<table>/meta.json            time column, dtypes, row/player counts
+    <root>/<table>/offsets.bin          int64[n_players + 1]
+    <root>/<table>/valid_ends.bin       int64[n_players], end of each player's non-missing timestamps
+    <root>/<table>/player_ids.bin
+    <root>/<table>/<column>.bin         values, or int32 codes for string columns (player_id is implied)
+    <root>/<table>/<column>.categories.npy
+
+Opened tables are np.memmap views, so feature jobs run out-of-core with the OS
+page cache holding the hot pages and several processes sharing them.
+"""
+
+import json
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+# timestamp column of each generator event table
+TIME_COLUMNS = {
+    'sessions': 'login_time',
+    'bets': 'bet_time',
+    'deposits': 'deposit_time',
+    'withdrawals': 'withdrawal_time',
+    'bonuses': 'issued_date',
+}
+
+NAT_SORT_KEY = np.iinfo(np.int64).max  # missing timestamps sort last
+META_FILE = 'meta.json'
+PROMOTE_BLOCK_ROWS = 1 << 20    # rows converted per step when an int column turns float
+
+
+def shared_dir(prefix='churn_'):
+    """New temporary directory for files that worker processes memory-map (in /dev/shm when available)"""
+    return tempfile.mkdtemp(prefix=prefix, dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+
+
+def _time_key(value):
+    """datetime-like scalar -> int64 nanoseconds comparable with datetime64[ns] columns"""
+    return pd.Timestamp(value).as_unit('ns').value
+
+
+class CategoricalColumn:
+    """Dictionary-encoded string column: int32 codes (-1 = missing) plus categories.
+
+    Slicing decodes only the requested rows to an object array (None for
+    missing), matching the in-memory representation of string columns.
+    """
+
+    def __init__(self, codes, categories):
+        self.codes = codes
+        self.categories = categories
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, key):
+        codes = np.asarray(self.codes[key])
+        out = np.asarray(self.categories)[np.maximum(codes, 0)].astype(object)
+        out[codes < 0] = None
+        return out
+
+
+class EventTable:
+    """One event table sorted by (player, time) with CSR offsets per player"""
+
+    def __init__(self, player_ids, offsets, valid_ends, columns, time_column):
+        self.player_ids = pd.Index(player_ids)
+        self.offsets = offsets
+        self.valid_ends = valid_ends
+        self.columns = columns
+        self.time_column = time_column
+
+    @classmethod
+    def from_frame(cls, df, time_column, player_ids=None):
+        """Index `df`; `player_ids` fixes the player universe (players without events get empty slices)"""
+        df = df[df['player_id'].notna()]
+        pids = df['player_id'].to_numpy()
+        if player_ids is None:
+            player_ids = np.unique(pids)
+        index = pd.Index(player_ids)
+        codes = index.get_indexer(pids)
+        known = codes >= 0
+        df, codes = df[known], codes[known]
+
+        times = pd.to_datetime(df[time_column]).to_numpy(dtype='datetime64[ns]')
+        missing = np.isnat(times)
+        t_key = np.where(missing, NAT_SORT_KEY, times.view('int64'))
+        order = np.lexsort((t_key, codes))
+
+        offsets = np.zeros(len(index) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=len(index)), out=offsets[1:])
+        n_missing = np.bincount(codes[missing], minlength=len(index))
+        valid_ends = offsets[1:] - n_missing
+        columns = {c: df[c].to_numpy()[order] for c in df.columns if c != time_column}
+        columns[time_column] = times[order]
+        return cls(index, offsets, valid_ends, columns, time_column)
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    @property
+    def n_players(self):
+        return len(self.player_ids)
+
+    def counts(self):
+        """Number of events per player, aligned with player_ids"""
+        return np.diff(self.offsets)
+
+    def position(self, player_id):
+        """Row of `player_id` in the offsets array (-1 if unknown)"""
+        try:
+            return self.player_ids.get_loc(player_id)
+        except KeyError:
+            return -1
+
+    def positions(self, player_ids):
+        """Vectorized position() for many players"""
+        return self.player_ids.get_indexer(player_ids)
+
+    def bounds_at(self, i):
+        """(start, end) row range of the player at position i"""
+        if i < 0:
+            return 0, 0
+        return int(self.offsets[i]), int(self.offsets[i + 1])
+
+    def range_at(self, i, start=None, end=None):
+        """Row range of the player at position i with start <= time < end"""
+        a, b = self.bounds_at(i)
+        if start is None and end is None:
+            return a, b
+        # only the non-missing prefix of the slice is sorted by time
+        v = int(self.valid_ends[i]) if i >= 0 else a
+        t = self.columns[self.time_column][a:v].view('int64')
+        lo = a if start is None else a + int(np.searchsorted(t, _time_key(start), side='left'))
+        hi = v if end is None else a + int(np.searchsorted(t, _time_key(end), side='left'))
+        return lo, max(lo, hi)
+
+    def bounds(self, player_id):
+        """(start, end) row range of a player's events"""
+        return self.bounds_at(self.position(player_id))
+
+    def range(self, player_id, start=None, end=None):
+        """(start, end) row range of a player's events with start <= time < end"""
+        return self.range_at(self.position(player_id), start, end)
+
+    def slice(self, player_id, start=None, end=None):
+        """Column views of one player's events (zero-copy except decoded string columns)"""
+        a, b = self.range(player_id, start, end)
+        return {c: v[a:b] for c, v in self.columns.items()}
+
+    def frame(self, player_id=None, start=None, end=None):
+        """DataFrame copy of one player's events (all events if player_id is None) — for debugging"""
+        if player_id is None:
+            a, b = 0, len(self)
+        else:
+            a, b = self.range(player_id, start, end)
+        return pd.DataFrame({c: v[a:b] for c, v in self.columns.items()})
+
+    def select(self, player_ids):
+        """DataFrame of all events of `player_ids` (with a player_id column), in store order"""
+        pos = self.positions(player_ids)
+        pos = np.sort(pos[pos >= 0])
+        starts, counts = self.offsets[pos], self.offsets[pos + 1] - self.offsets[pos]
+        # row index of every selected event without a per-player loop
+        rows = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        out = pd.DataFrame({'player_id': np.repeat(self.player_ids.to_numpy()[pos], counts)})
+        for c, v in self.columns.items():
+            out[c] = v[rows]
+        return out
+
+    def last_times(self):
+        """Latest non-missing timestamp per player (NaT when a player has none)"""
+        times = self.columns[self.time_column]
+        has_valid = self.valid_ends > self.offsets[:-1]
+        out = np.full(self.n_players, np.datetime64('NaT'), dtype='datetime64[ns]')
+        out[has_valid] = times[self.valid_ends[has_valid] - 1]
+        return out
+
+    # ---------- on-disk layout ----------
+    def save(self, path):
+        """Write this table as raw column files + meta.json under `path`"""
+        writer = _TableWriter(path, self.time_column)
+        writer.append_sorted(self.player_ids.to_numpy(), self.counts(), self.valid_ends - self.offsets[:-1],
+                             {c: v[:] for c, v in self.columns.items()})
+        writer.close()
+
+    @classmethod
+    def open(cls, path, mmap_mode='r'):
+        """Memory-map a table written by save() / EventStoreWriter"""
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+
+        def load(name, dtype, length):
+            file = os.path.join(path, f"{name}.bin")
+            if length == 0:
+                return np.empty(0, dtype=dtype)
+            return np.memmap(file, dtype=dtype, mode=mmap_mode, shape=(length,))
+
+        n, p = meta['n_rows'], meta['n_players']
+        offsets = load('offsets', '<i8', p + 1)
+        valid_ends = load('valid_ends', '<i8', p)
+        player_ids = load('player_ids', meta['player_ids_dtype'], p)
+        columns = {}
+        for name, spec in meta['columns'].items():
+            values = load(name, spec['dtype'], n)
+            if spec['kind'] == 'categorical':
+                categories = np.load(os.path.join(path, f"{name}.categories.npy"), mmap_mode=mmap_mode)
+                values = CategoricalColumn(values, categories)
+            columns[name] = values
+        return cls(player_ids, offsets, valid_ends, columns, meta['time_column'])
+
+
+class _TableWriter:
+    """Appends sorted blocks of one table to raw column files"""
+
+    def __init__(self, path, time_column):
+        self.path = path
+        self.time_column = time_column
+        os.makedirs(path, exist_ok=True)
+        self.files = {}
+        self.specs = {}
+        self.categories = {}        # column -> {value: code}
+        self.player_ids = []
+        self.counts = []
+        self.valid_counts = []
+        self.n_rows = 0
+        self.promoted = {}          # column -> (rows written before promotion, their int dtype)
+
+    def _file(self, name):
+        if name not in self.files:
+            self.files[name] = open(os.path.join(self.path, f"{name}.bin"), 'wb')
+        return self.files[name]
+
+    def _encode(self, name, values):
+        values = np.asarray(values)
+        if values.dtype.kind in 'OUS':
+            mapping = self.categories.setdefault(name, {})
+            codes = np.full(len(values), -1, dtype=np.int32)
+            present = pd.notna(values)
+            uniques, inverse = np.unique(values[present].astype(str), return_inverse=True)
+            lookup = np.array([mapping.setdefault(u, len(mapping)) for u in uniques], dtype=np.int32)
+            codes[present] = lookup[inverse] if len(uniques) else codes[present]
+            kind, values = 'categorical', codes
+        else:
+            kind = 'array'
+            if values.dtype.kind == 'M':
+                values = values.astype('datetime64[ns]')
+            values = values.astype(values.dtype.newbyteorder('<'))
+        spec = {'kind': kind, 'dtype': values.dtype.str}
+        previous = self.specs.setdefault(name, spec)
+        if previous != spec:
+            previous_dtype = np.dtype(previous['dtype'])
+            if previous_dtype.kind in 'iu' and values.dtype.kind == 'f':
+                # an int column picked up missing values in this block: rows written so far
+                # are converted to float64 in close()
+                self.promoted.setdefault(name, (self.n_rows, previous_dtype))
+                self.specs[name] = spec
+            elif previous_dtype.kind == 'f' and values.dtype.kind in 'iu':
+                values = values.astype(previous_dtype)
+            else:
+                raise ValueError(f"Column {name!r} changed type between blocks: {previous} -> {spec}")
+        return values
+
+    def append_sorted(self, player_ids, counts, valid_counts, columns):
+        """Append rows already sorted by (player, time) for the given (new) players"""
+        self.player_ids.append(np.asarray(player_ids))
+        self.counts.append(np.asarray(counts, dtype=np.int64))
+        self.valid_counts.append(np.asarray(valid_counts, dtype=np.int64))
+        for name, values in columns.items():
+            if name == 'player_id':
+                continue    # implied by offsets + player_ids
+            self._file(name).write(self._encode(name, values).tobytes())
+        self.n_rows += int(np.sum(counts))
+
+    def _promote(self, name, n_int, int_dtype):
+        """Rewrite the int64 prefix of a column file as float64"""
+        path = os.path.join(self.path, f"{name}.bin")
+        tmp = path + '.tmp'
+        with open(path, 'rb') as src, open(tmp, 'wb') as dst:
+            for start in range(0, n_int, PROMOTE_BLOCK_ROWS):
+                rows = min(PROMOTE_BLOCK_ROWS, n_int - start)
+                block = np.frombuffer(src.read(rows * int_dtype.itemsize), dtype=int_dtype)
+                dst.write(block.astype('<f8').tobytes())
+            while chunk := src.read(1 << 24):
+                dst.write(chunk)
+        os.replace(tmp, path)
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        for name, (n_int, int_dtype) in self.promoted.items():
+            self._promote(name, n_int, int_dtype)
+        counts = np.concatenate(self.counts) if self.counts else np.empty(0, dtype=np.int64)
+        valid = np.concatenate(self.valid_counts) if self.valid_counts else np.empty(0, dtype=np.int64)
+        player_ids = np.concatenate(self.player_ids) if self.player_ids else np.empty(0, dtype=np.int64)
+        offsets = np.zeros(len(counts) + 1, dtype='<i8')
+        np.cumsum(counts, out=offsets[1:])
+        offsets.tofile(os.path.join(self.path, 'offsets.bin'))
+        (offsets[:-1] + valid).astype('<i8').tofile(os.path.join(self.path, 'valid_ends.bin'))
+        player_ids = player_ids.astype(player_ids.dtype.newbyteorder('<'))
+        player_ids.tofile(os.path.join(self.path, 'player_ids.bin'))
+        for name, mapping in self.categories.items():
+            np.save(os.path.join(self.path, f"{name}.categories.npy"), np.array(list(mapping), dtype=str))
+        meta = {
+            'time_column': self.time_column,
+            'n_rows': self.n_rows,
+            'n_players': len(counts),
+            'player_ids_dtype': player_ids.dtype.str,
+            'columns': self.specs,
+        }
+        with open(os.path.join(self.path, META_FILE), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+
+class EventStore:
+    """The generator's event tables indexed by player, keyed by table name"""
+
+    def __init__(self, tables, root=None):
+        self.tables = tables
+        self.root = root    # directory the tables are mapped from, if any
+
+    @classmethod
+    def from_frames(cls, frames, player_ids=None, time_columns=TIME_COLUMNS):
+        """Build from a dict of table name -> DataFrame (tables not in time_columns are skipped)"""
+        return cls({
+            name: EventTable.from_frame(df, time_columns[name], player_ids)
+            for name, df in frames.items() if name in time_columns and df is not None
+        })
+
+    def __getitem__(self, name):
+        return self.tables[name]
+
+    def __contains__(self, name):
+        return name in self.tables
+
+    def player(self, player_id, start=None, end=None):
+        """All events of one player as DataFrames, keyed by table — for debugging"""
+        return {name: t.frame(player_id, start, end) for name, t in self.tables.items()}
+
+    def save(self, root):
+        for name, table in self.tables.items():
+            table.save(os.path.join(root, name))
+
+    @classmethod
+    def open(cls, root, mmap_mode='r'):
+        """Memory-map every table directory under `root`"""
+        return cls({
+            name: EventTable.open(os.path.join(root, name), mmap_mode=mmap_mode)
+            for name in sorted(os.listdir(root))
+            if os.path.exists(os.path.join(root, name, META_FILE))
+        }, root=root)
+
+    def partition(self, player_ids, n_parts):
+        """Split player_ids into <= n_parts contiguous (lo, hi) index ranges with similar event counts.
+
+        Workers given one range each read a contiguous block of every table
+        when player_ids follow the store order.
+        """
+        weights = np.ones(len(player_ids), dtype=np.int64)
+        for table in self.tables.values():
+            pos = table.positions(player_ids)
+            weights += np.where(pos >= 0, table.counts()[np.maximum(pos, 0)], 0)
+        cum = np.cumsum(weights)
+        targets = cum[-1] * np.arange(1, n_parts) / n_parts if len(cum) else []
+        cuts = np.unique(np.concatenate([[0], np.searchsorted(cum, targets, side='right'), [len(player_ids)]]))
+        return [(int(lo), int(hi)) for lo, hi in zip(cuts[:-1], cuts[1:])]
+
+
+class EventStoreWriter:
+    """Streams event tables to disk chunk by chunk without holding the full tables in memory.
+
+    Chunks must cover consecutive, non-overlapping runs of players (as produced
+    by the generator's per-chunk event generation); each chunk is sorted on its
+    own and appended, which keeps the whole file sorted by player.
+
+        writer = EventStoreWriter(root)
+        for chunk_players, frames in chunks:
+            writer.append(chunk_players, frames)
+        writer.close()
+    """
+
+    def __init__(self, root, time_columns=TIME_COLUMNS):
+        self.root = root
+        self.time_columns = time_columns
+        self.writers = {name: _TableWriter(os.path.join(root, name), col) for name, col in time_columns.items()}
+
+    def append(self, player_ids, frames):
+        for name, writer in self.writers.items():
+            df = frames.get(name)
+            if df is None:
+                continue
+            table = EventTable.from_frame(df, self.time_columns[name], player_ids)
+            writer.append_sorted(player_ids, table.counts(), table.valid_ends - table.offsets[:-1], table.columns)
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,236 @@
+"""
+explain.py
+Batch churn explanations: per-feature contributions of a tree model, precomputed.
+
+Computing SHAP values per request is too slow for the scoring path, so a batch
+job scores every player once with a model_registry.py version, keeps the top-k
+contributions per player and stores them next to the churn probability in
+player_explanations (models/models.py). The API then returns the score and its
+reasons from one row, with no inference at request time:
+
+    explanations = explain_batch(registry, player_features_df, workers=4)   # CURRENT version
+    store_explanations(engine, explanations)
+    fetch_explanations(engine, ['17', '42'], registry)      # [ExplanationResponse]
+
+Contributions are in log-odds and sum with base_value to the model's raw score:
+LightGBM models use the booster's native TreeSHAP (predict(pred_contrib=True)),
+whose row sums also give the probability, so scoring and explaining is a single
+pass. Other tree models (e.g. the notebook's RandomForest) go through
+shap.TreeExplainer when the optional shap package is installed; their
+contributions are in probability units.
+
+Reasons are packed as up to k fixed-width records (feature index <u2, value
+<f4, contribution <f4), ordered by |contribution|, so a row stays ~50 bytes.
+Features that do not move the score (|contribution| below MIN_CONTRIBUTION,
+e.g. the ~1e-16 rounding residue of unused features) are not reasons. The
+feature matrix is written once to a shared directory (/dev/shm when available)
+and worker processes memory-map it and explain their own row ranges.
+
+Usage:
+    python explain.py <player_features.csv> [database_url] [workers]
+"""
+
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, select
+
+from event_store import shared_dir
+from instrumentation import RunReport, get_report, set_report, stage
+from model_registry import REGISTRY_DIR, ModelRegistry, _with_names
+from models.models import Base, PlayerExplanation
+from models.schemas import ExplanationResponse, Reason
+from serving import _upsert
+
+# ---------- CONFIG ----------
+TOP_K = 5
+CHUNK_ROWS = 50_000         # rows per explained block (pred_contrib output is rows x (features + 1) float64)
+WRITE_CHUNK_SIZE = 10_000
+FETCH_CHUNK_SIZE = 5_000    # ids per query
+MIN_CONTRIBUTION = 1e-9     # smaller |contributions| are numerical noise, not reasons
+REASON_DTYPE = np.dtype([('feature', '<u2'), ('value', '<f4'), ('contribution', '<f4')])
+NO_REASON = np.iinfo(np.uint16).max     # feature index of an empty reason slot
+# ----------------------------
+
+EXPLANATIONS = PlayerExplanation.__table__
+_explainers = {}            # version -> shap.TreeExplainer, per process
+
+
+def _is_lightgbm(model):
+    return type(model).__module__.startswith('lightgbm')
+
+
+def _booster(model):
+    return model.booster_ if hasattr(model, 'booster_') else model
+
+
+def _tree_explainer(loaded):
+    explainer = _explainers.get(loaded.version)
+    if explainer is None:
+        try:
+            import shap
+        except ImportError:
+            raise TypeError(f"{type(loaded.model).__name__} needs the optional shap package for contributions; "
+                            "LightGBM models are explained natively") from None
+        explainer = _explainers[loaded.version] = shap.TreeExplainer(loaded.model)
+    return explainer
+
+
+def contributions(loaded, X):
+    """(contributions [rows x features], base values [rows], churn probability [rows]) for a LoadedModel"""
+    X = np.asarray(X, dtype=np.float64)
+    if loaded.preprocessing is not None:
+        X = loaded.preprocessing.transform(_with_names(loaded.preprocessing, X))
+    if _is_lightgbm(loaded.model):
+        contrib = np.asarray(_booster(loaded.model).predict(X, pred_contrib=True), dtype=np.float64)
+        raw = contrib.sum(axis=1)       # the raw score, so no separate predict call
+        return contrib[:, :-1], contrib[:, -1], 1 / (1 + np.exp(-raw))
+    explainer = _tree_explainer(loaded)
+    values = explainer.shap_values(X, check_additivity=False)
+    positive = list(loaded.model.classes_).index(1)
+    values = values[positive] if isinstance(values, list) else np.asarray(values)
+    if values.ndim == 3:
+        values = values[:, :, positive]
+    base = np.atleast_1d(explainer.expected_value)
+    base = np.full(len(X), float(base[positive] if len(base) > 1 else base[0]))
+    return values, base, loaded.model.predict_proba(_with_names(loaded.model, X))[:, positive]
+
+
+def top_reasons(contrib, X, k=TOP_K):
+    """Structured [rows x k] array of the k largest |contributions| per row, largest first.
+
+    Slots whose |contribution| is below MIN_CONTRIBUTION are empty (feature NO_REASON) and sort last.
+    """
+    k = min(k, contrib.shape[1])
+    top = np.argpartition(-np.abs(contrib), k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.abs(np.take_along_axis(contrib, top, axis=1)), axis=1, kind='stable')
+    top = np.take_along_axis(top, order, axis=1)
+    reasons = np.empty(top.shape, dtype=REASON_DTYPE)
+    reasons['feature'] = top
+    reasons['value'] = np.take_along_axis(np.asarray(X), top, axis=1)
+    reasons['contribution'] = np.take_along_axis(contrib, top, axis=1)
+    empty = np.abs(reasons['contribution']) < MIN_CONTRIBUTION
+    reasons['feature'][empty] = NO_REASON
+    reasons['value'][empty] = 0
+    reasons['contribution'][empty] = 0
+    return reasons
+
+
+def _explain_rows(loaded, X, k, chunk_rows):
+    parts = []
+    for lo in range(0, len(X), chunk_rows):
+        with stage('explain') as st:
+            block = np.asarray(X[lo:lo + chunk_rows], dtype=np.float64)
+            contrib, base, proba = contributions(loaded, block)
+            parts.append((proba, base, top_reasons(contrib, block, k)))
+            st.add_rows(len(block))
+    return parts
+
+
+def _explain_in_worker(root, registry_root, version, lo, hi, k, chunk_rows):
+    set_report(RunReport('worker', profile_dir=''))
+    X = np.load(os.path.join(root, 'X.npy'), mmap_mode='r')
+    parts = _explain_rows(ModelRegistry(registry_root).load(version), X[lo:hi], k, chunk_rows)
+    return parts, get_report().stages
+
+
+def explain_batch(registry, features_df, version=None, k=TOP_K, workers=None, chunk_rows=CHUNK_ROWS):
+    """Explanations of every row of a player_features frame; one row per player, reasons packed as bytes"""
+    loaded = registry.load(version)
+    workers = workers or os.cpu_count() or 1
+    X = np.ascontiguousarray(loaded.matrix(features_df))
+    with stage('explain_batch'):
+        if workers == 1 or len(X) <= chunk_rows:
+            parts = _explain_rows(loaded, X, k, chunk_rows)
+        else:
+            step = -(-len(X) // workers)
+            step = -(-step // chunk_rows) * chunk_rows      # whole chunks per worker
+            root = shared_dir('churn_explain_')
+            try:
+                with stage('share_matrix'):
+                    np.save(os.path.join(root, 'X.npy'), X)
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    futures = [pool.submit(_explain_in_worker, root, registry.root, loaded.version, lo, lo + step,
+                                           k, chunk_rows) for lo in range(0, len(X), step)]
+                    parts = []
+                    for future in futures:
+                        worker_parts, stages = future.result()
+                        get_report().absorb(stages)
+                        parts.extend(worker_parts)
+            finally:
+                shutil.rmtree(root, ignore_errors=True)
+
+    if parts:
+        reasons = np.concatenate([r for _, _, r in parts])
+        width = reasons.shape[1] * REASON_DTYPE.itemsize
+        # empty slots are at the end of each row: keep only the real reasons' bytes
+        used = ((reasons['feature'] != NO_REASON).sum(axis=1) * REASON_DTYPE.itemsize).tolist()
+        buf = reasons.tobytes()
+        packed = [buf[i:i + n] for i, n in zip(range(0, len(buf), width), used)]
+    else:
+        packed = []
+    return pd.DataFrame({
+        'player_id': features_df['player_id'].astype(str).to_numpy(),
+        'model_version': loaded.version,
+        'churn_probability': np.concatenate([p for p, _, _ in parts]) if parts else np.empty(0),
+        'base_value': np.concatenate([b for _, b, _ in parts]) if parts else np.empty(0),
+        'reasons': packed,
+    })
+
+
+def store_explanations(engine, explanations, computed_at=None, chunk_size=WRITE_CHUNK_SIZE, create=True):
+    """Upsert explain_batch output into player_explanations; returns rows written"""
+    if create:
+        Base.metadata.create_all(bind=engine, tables=[EXPLANATIONS])
+    computed_at = computed_at or datetime.now()
+    columns = ['player_id', 'model_version', 'churn_probability', 'base_value', 'reasons']
+    with engine.begin() as conn:
+        for start in range(0, len(explanations), chunk_size):
+            block = explanations.iloc[start:start + chunk_size]
+            rows = [{**dict(zip(columns, values)), 'computed_at': computed_at}
+                    for values in zip(*(block[c].tolist() for c in columns))]
+            _upsert(conn, EXPLANATIONS, rows, 'player_id')
+    return len(explanations)
+
+
+def decode_reasons(blob, feature_names):
+    """[Reason] of one packed reasons blob"""
+    return [Reason(feature=feature_names[r['feature']], value=float(r['value']),
+                   contribution=float(r['contribution']))
+            for r in np.frombuffer(blob, dtype=REASON_DTYPE) if r['feature'] != NO_REASON]
+
+
+def fetch_explanations(engine, player_ids, registry):
+    """ExplanationResponse per stored player (players without a row are skipped), ordered by player_id"""
+    player_ids = [str(p) for p in player_ids]
+    names = {}
+    out = []
+    with engine.connect() as conn:
+        for start in range(0, len(player_ids), FETCH_CHUNK_SIZE):
+            chunk = player_ids[start:start + FETCH_CHUNK_SIZE]
+            for row in conn.execute(select(EXPLANATIONS).where(EXPLANATIONS.c.player_id.in_(chunk))
+                                    .order_by(EXPLANATIONS.c.player_id)):
+                if row.model_version not in names:
+                    names[row.model_version] = registry.feature_names(row.model_version)
+                out.append(ExplanationResponse(
+                    player_id=row.player_id, model_version=row.model_version,
+                    churn_probability=row.churn_probability, base_value=row.base_value,
+                    reasons=decode_reasons(row.reasons, names[row.model_version]), computed_at=row.computed_at))
+    return out
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python explain.py <player_features.csv> [database_url] [workers]")
+        sys.exit(1)
+    url = sys.argv[2] if len(sys.argv) > 2 else os.getenv("DATABASE_URL", "sqlite:///churn.db")
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    explanations = explain_batch(ModelRegistry(REGISTRY_DIR), pd.read_csv(sys.argv[1]), workers=workers)
+    n = store_explanations(create_engine(url), explanations)
+    print(f"player_explanations: {n} rows (model {explanations['model_version'].iat[0] if n else '-'})")
+    print(get_report().summary())
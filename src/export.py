@@ -0,0 +1,212 @@
+"""
+export.py
+At-risk player export for the CRM: features and latest churn scores, highest risk first.
+
+Rows come from latest_predictions (predictions.py) joined to player_features
+and players, filtered by a minimum churn_probability and optionally by country
+and vip_level, ordered by (churn_probability, player_id) descending.
+
+Pages use keyset pagination: the next page starts after the last row's
+(churn_probability, player_id), a row-value comparison that the
+ix_latest_predictions_churn_probability_player_id index answers directly, so
+page 1000 costs the same as page 1 (OFFSET would read and discard every earlier
+row). The cursor handed to API clients is that pair, base64-encoded:
+
+    rows, next_cursor = fetch_page(engine, min_probability=0.7, countries=['DE'], limit=1000)
+    rows, next_cursor = fetch_page(engine, min_probability=0.7, countries=['DE'], cursor=next_cursor)
+
+    for chunk in csv_stream(engine, min_probability=0.7):       # bytes, for a streaming response
+        ...
+    export(engine, 'at_risk.parquet', min_probability=0.7, vip_levels=[3, 4])
+
+Streams walk the keyset pages on one connection with a server-side cursor
+(stream_results), and encode each partition of rows as it arrives: CSV chunks,
+or one Parquet row group per partition. Memory stays bounded by the partition
+size, not the export size.
+
+Usage:
+    python export.py <out.csv|out.parquet> [--min-probability 0.7] [--country DE ...] [--vip-level 3 ...]
+"""
+
+import argparse
+import base64
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+
+from sqlalchemy import create_engine, select, tuple_
+
+from models.models import LatestPrediction, Player, PlayerFeatures
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# ---------- CONFIG ----------
+MIN_PROBABILITY = 0.5
+PAGE_SIZE = 1_000               # rows per API page
+STREAM_PAGE_SIZE = 100_000      # rows per keyset query of a stream
+PARTITION_ROWS = 10_000         # rows fetched from the server-side cursor (and encoded) at a time
+MAX_PAGE_SIZE = 50_000          # largest page an API client may ask for
+# player_features columns that are not model inputs or do not fit a flat file
+SKIPPED_FEATURE_COLUMNS = ('id', 'player_id', 'games_played_breakdown', 'churn_label', 'churn_probability',
+                           'predicted_at', 'created_at')
+# ----------------------------
+
+LATEST = LatestPrediction.__table__
+FEATURES = PlayerFeatures.__table__
+PLAYERS = Player.__table__
+
+COLUMNS = ([LATEST.c.player_id, LATEST.c.churn_probability, LATEST.c.churn_label, LATEST.c.model_version,
+            LATEST.c.predicted_at, PLAYERS.c.country, PLAYERS.c.vip_level]
+           + [c for c in FEATURES.columns if c.name not in SKIPPED_FEATURE_COLUMNS])
+COLUMN_NAMES = [c.name for c in COLUMNS]
+
+
+def _query(min_probability, countries, vip_levels, after, limit):
+    query = (select(*COLUMNS)
+             .select_from(LATEST.join(FEATURES, FEATURES.c.player_id == LATEST.c.player_id)
+                          .join(PLAYERS, PLAYERS.c.player_id == LATEST.c.player_id))
+             .where(LATEST.c.churn_probability >= min_probability))
+    if countries:
+        query = query.where(PLAYERS.c.country.in_(list(countries)))
+    if vip_levels:
+        query = query.where(PLAYERS.c.vip_level.in_([int(v) for v in vip_levels]))
+    if after is not None:
+        query = query.where(tuple_(LATEST.c.churn_probability, LATEST.c.player_id) < tuple_(*after))
+    return query.order_by(LATEST.c.churn_probability.desc(), LATEST.c.player_id.desc()).limit(limit)
+
+
+def encode_cursor(row):
+    """Opaque cursor after `row` (a result row or dict with churn_probability and player_id)"""
+    row = row._mapping if hasattr(row, '_mapping') else row
+    key = json.dumps([row['churn_probability'], row['player_id']])   # repr of a float round-trips exactly
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        probability, player_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(probability), str(player_id)
+    except (ValueError, TypeError):
+        raise ValueError(f"invalid cursor {cursor!r}") from None
+
+
+def fetch_page(engine, min_probability=MIN_PROBABILITY, countries=None, vip_levels=None, cursor=None,
+               limit=PAGE_SIZE):
+    """(rows as dicts, cursor of the next page or None)"""
+    after = decode_cursor(cursor) if cursor else None
+    with engine.connect() as conn:
+        rows = conn.execute(_query(min_probability, countries, vip_levels, after, limit)).all()
+    next_cursor = encode_cursor(rows[-1]) if len(rows) == limit else None
+    return [dict(r._mapping) for r in rows], next_cursor
+
+
+def iter_partitions(engine, min_probability=MIN_PROBABILITY, countries=None, vip_levels=None,
+                    page_size=STREAM_PAGE_SIZE, partition_rows=PARTITION_ROWS):
+    """Lists of row tuples (COLUMN_NAMES order) covering the whole export"""
+    after = None
+    with engine.connect() as conn:
+        conn = conn.execution_options(stream_results=True, max_row_buffer=partition_rows)
+        while True:
+            result = conn.execute(_query(min_probability, countries, vip_levels, after, page_size))
+            n = 0
+            for partition in result.partitions(partition_rows):
+                n += len(partition)
+                last = partition[-1]
+                yield [tuple(r) for r in partition]
+            if n < page_size:
+                return
+            after = (last.churn_probability, last.player_id)
+
+
+def _text(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def csv_stream(engine, **filters):
+    """CSV bytes of the export, one chunk per partition (header first)"""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMN_NAMES)
+    for rows in iter_partitions(engine, **filters):
+        writer.writerows([_text(v) for v in row] for row in rows)
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+def _arrow_type(column):
+    python_type = column.type.python_type
+    return {int: pyarrow.int64(), float: pyarrow.float64(), bool: pyarrow.bool_(), str: pyarrow.string(),
+            date: pyarrow.date32(), datetime: pyarrow.timestamp('us')}[python_type]
+
+
+class _Drain(io.RawIOBase):
+    """Write-only file whose contents are taken out as they are produced"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.chunks.append(bytes(b))
+        return len(b)
+
+    def take(self):
+        out, self.chunks = b''.join(self.chunks), []
+        return out
+
+
+def parquet_stream(engine, **filters):
+    """Parquet bytes of the export, one row group per partition"""
+    if pyarrow is None:
+        raise ValueError("the parquet format needs pyarrow")
+    schema = pyarrow.schema([(c.name, _arrow_type(c)) for c in COLUMNS])
+    sink = _Drain()
+    with pyarrow.parquet.ParquetWriter(pyarrow.PythonFile(sink, mode='w'), schema) as writer:
+        for rows in iter_partitions(engine, **filters):
+            columns = list(zip(*rows))
+            writer.write_table(pyarrow.table(
+                [pyarrow.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema))
+            yield sink.take()
+    yield sink.take()       # footer
+
+
+STREAMS = {'csv': (csv_stream, 'text/csv'), 'parquet': (parquet_stream, 'application/vnd.apache.parquet')}
+
+
+def export(engine, path, fmt=None, **filters):
+    """Write the export to `path` (format from the extension unless given); returns bytes written"""
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt not in STREAMS:
+        raise ValueError(f"unknown export format {fmt!r} (expected one of {sorted(STREAMS)})")
+    written = 0
+    with open(path, 'wb') as f:
+        for chunk in STREAMS[fmt][0](engine, **filters):
+            f.write(chunk)
+            written += len(chunk)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export at-risk players (features + latest churn score)")
+    parser.add_argument('out', help='output file, .csv or .parquet')
+    parser.add_argument('--min-probability', type=float, default=MIN_PROBABILITY)
+    parser.add_argument('--country', action='append', help='repeatable')
+    parser.add_argument('--vip-level', type=int, action='append', help='repeatable')
+    parser.add_argument('--database-url', default=os.getenv("DATABASE_URL", "sqlite:///churn.db"))
+    args = parser.parse_args()
+    n = export(create_engine(args.database_url), args.out, min_probability=args.min_probability,
+               countries=args.country, vip_levels=args.vip_level)
+    print(f"{args.out}: {n} bytes")
@@ -0,0 +1,204 @@
+"""
+feature_cache.py
+On-disk cache of materialized feature tables.
+
+Entries are keyed by everything a feature table depends on:
+
+    (feature-definition hash, data snapshot fingerprint, reference_time, lookback, ...)
+
+so training, evaluation and the drift notebook reuse a table instead of
+recomputing it, and any change to the feature code or the input data misses.
+
+    cache = FeatureCache('~/.cache/churn_features', max_bytes=2 * 2**30)
+    key = cache.key(definition=definition_hash(), data=frames_fingerprint(frames),
+                    reference_time=ref, lookback_days=30)
+    features = cache.get_or_compute(key, lambda: make_features(...))
+    cache.stats            # {'hits': 1, 'misses': 0, 'writes': 0, 'evictions': 0, ...}
+
+Entries are Parquet files (pickle when pyarrow is missing) written to a
+temporary file and os.replace()d into place, so concurrent jobs never read a
+partial entry; a reader that loses a race with eviction just sees a miss, and
+an entry that cannot be read back (corrupt or truncated file) is deleted and
+counted as a miss.
+Least-recently-used entries are evicted once the directory exceeds max_bytes
+(a hit refreshes the entry's mtime).
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from event_store import CategoricalColumn
+
+try:
+    import pyarrow  # noqa: F401  (Parquet engine)
+except ImportError:
+    pyarrow = None
+
+# ---------- CONFIG ----------
+FEATURE_CACHE_MAX_BYTES = 2 * 2 ** 30   # evict least-recently-used entries above 2 GB
+CACHE_FORMAT = 'parquet' if pyarrow is not None else 'pickle'
+TMP_PREFIX = '.tmp-'
+# ----------------------------
+
+
+def _digest(*chunks):
+    h = hashlib.sha256()
+    for chunk in chunks:
+        h.update(chunk if isinstance(chunk, bytes) else str(chunk).encode())
+    return h.hexdigest()
+
+
+def _values_digest(values):
+    """Content hash of one column (numeric, datetime or object values)"""
+    values = np.asarray(values[:])
+    if values.dtype.kind in 'biufcmM':
+        return _digest(values.dtype.str, np.ascontiguousarray(values).tobytes())
+    return _digest('object', pd.util.hash_array(values.astype(object)).tobytes())
+
+
+def frames_fingerprint(frames):
+    """Fingerprint of in-memory DataFrames (name -> frame): names, dtypes and every value"""
+    parts = []
+    for name in sorted(frames):
+        df = frames[name]
+        parts.append(_digest(name, list(df.columns), [str(t) for t in df.dtypes],
+                             pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()))
+    return _digest(*parts)
+
+
+def store_fingerprint(store):
+    """Fingerprint of an EventStore: file metadata when it is on disk, its arrays otherwise"""
+    parts = []
+    for name in sorted(store.tables):
+        if store.root is not None:
+            path = os.path.join(store.root, name)
+            for file in sorted(os.listdir(path)):
+                st = os.stat(os.path.join(path, file))
+                parts.append(_digest(name, file, st.st_size, st.st_mtime_ns))
+            continue
+        table = store[name]
+        parts.append(_digest(name, table.time_column, _values_digest(table.player_ids.to_numpy()),
+                             _values_digest(table.offsets)))
+        for column, values in sorted(table.columns.items()):
+            if isinstance(values, CategoricalColumn):
+                parts.append(_digest(column, _values_digest(values.codes), _values_digest(values.categories)))
+            else:
+                parts.append(_digest(column, _values_digest(values)))
+    return _digest(*parts)
+
+
+class FeatureCache:
+    """Directory of cached feature tables with LRU eviction by total size"""
+
+    def __init__(self, root, max_bytes=FEATURE_CACHE_MAX_BYTES, fmt=CACHE_FORMAT):
+        self.root = os.path.expanduser(root)
+        self.max_bytes = max_bytes
+        self.fmt = fmt
+        os.makedirs(self.root, exist_ok=True)
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0, 'corrupt': 0,
+                      'bytes_read': 0, 'bytes_written': 0}
+
+    @staticmethod
+    def key(**parts):
+        """Stable key for keyword parts (strings, numbers, datetimes, lists)"""
+        return _digest(json.dumps(parts, sort_keys=True, default=str))
+
+    def path(self, key):
+        return os.path.join(self.root, f"{key}.{self.fmt}")
+
+    def get(self, key):
+        """Cached frame for `key`, or None"""
+        path = self.path(key)
+        try:
+            df = pd.read_parquet(path) if self.fmt == 'parquet' else pd.read_pickle(path)
+            size = os.path.getsize(path)
+            os.utime(path)      # mark as recently used
+        except FileNotFoundError:
+            self.stats['misses'] += 1
+            return None
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+            # unreadable entry (pyarrow's ArrowInvalid is a ValueError): drop it so the next put rewrites it
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self.stats['corrupt'] += 1
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        self.stats['bytes_read'] += size
+        return df
+
+    def put(self, key, df):
+        """Store `df` atomically, then evict down to max_bytes"""
+        fd, tmp = tempfile.mkstemp(prefix=TMP_PREFIX, suffix=f".{self.fmt}", dir=self.root)
+        os.close(fd)
+        os.chmod(tmp, 0o644)        # mkstemp creates 0600; entries are shared between jobs
+        try:
+            if self.fmt == 'parquet':
+                df.to_parquet(tmp, index=False)
+            else:
+                df.to_pickle(tmp)
+            size = os.path.getsize(tmp)
+            os.replace(tmp, self.path(key))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self.stats['writes'] += 1
+        self.stats['bytes_written'] += size
+        self.evict(keep=key)
+
+    def get_or_compute(self, key, compute):
+        """Cached frame for `key`, computing and storing it with compute() on a miss"""
+        df = self.get(key)
+        if df is None:
+            df = compute()
+            self.put(key, df)
+        return df
+
+    def entries(self):
+        """(path, size, mtime) of every complete entry, least recently used first"""
+        out = []
+        for name in os.listdir(self.root):
+            if name.startswith(TMP_PREFIX):
+                continue
+            try:
+                st = os.stat(os.path.join(self.root, name))
+            except FileNotFoundError:
+                continue
+            out.append((os.path.join(self.root, name), st.st_size, st.st_mtime_ns))
+        return sorted(out, key=lambda e: e[2])
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep=None):
+        """Delete least-recently-used entries until the cache fits in max_bytes"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        keep = self.path(keep) if keep is not None else None
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass        # evicted by another job
+            total -= size
+            self.stats['evictions'] += 1
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
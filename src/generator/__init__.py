@@ -0,0 +1,27 @@
+"""
+Synthetic casino event logs + aggregated player features for churn modelling.
+
+Importing the package has no side effects; run the whole pipeline with
+`python -m generator` (see cli.py) or `generator.run(GeneratorConfig(...))`.
+
+Outputs: players, sessions, bets, deposits, withdrawals, bonuses,
+player_features and one player_features_<scenario> per scenario (by default
+player_features_test_drift, see scenarios.py).
+"""
+
+from .config import (
+    GeneratorConfig, N_PLAYERS, START_DATE, END_DATE, CHURN_LOOKBACK_DAYS,
+    CHURN_LABEL_THRESHOLD, SEED, OUTLIER_FRACTION, MISSING_FRACTION, DRIFT_FRACTION,
+)
+from .players import generate_players, rand_dates, weighted_choice
+from .temporal import TemporalSampler, SeasonalityProfile, hour_weights, UNIFORM_PROFILE, SESSION_PROFILE, BOT_PROFILE
+from .ids import IdAllocator, derive_uuids, to_uuid_ids, ID_COLUMNS
+from .simulation import simulate, Simulation, PlayerState
+from .scenarios import Scenario, default_scenarios, run_scenarios, scenarios_for
+from .events import generate_sessions, generate_bets, generate_deposits, generate_withdrawals, generate_bonuses
+from .quality import inject_outliers, inject_missingness
+from .feature_graph import FeatureExecutor, FEATURE_COLUMNS, register, plan, lineage, definition_hash
+from .features import make_features, make_features_from_store
+from .signatures import SIGNATURE_COLUMNS, compute_signatures, signatures_from_frames, bot_mask
+from .approx import APPROX_COLUMNS, compute_approx
+from .pipeline import run, run_to_store, save_outputs, generate_events, select_scenario_players, seed_all
@@ -0,0 +1,87 @@
+"""
+Sketch-based per-player aggregates (sketches.py) as optional feature-graph nodes.
+
+Registered as feature-graph nodes (not part of player_features), computed from
+the same windowed event slices as the exact features:
+
+    approx_days_active      HyperLogLog estimate of days_active_last_30
+    approx_unique_games     HyperLogLog estimate of unique_games_played
+    median_bet_size         DDSketch quantiles of bet_amount (relative error DD_RELATIVE_ACCURACY)
+    p90_bet_size
+    median_session_length   DDSketch quantiles of session length in minutes
+    p90_session_length
+
+Each sketch is built once per executor and shared by the columns that read it:
+
+    ex = FeatureExecutor(players_df, store, reference_time, window_start)
+    ex.get('p90_bet_size')
+    approx = compute_approx(players_df, EventStore.open(root), reference_time)   # blocks of players
+"""
+
+import numpy as np
+
+from sketches import DD_RELATIVE_ACCURACY, PLAYER_HLL_PRECISION, DDSketch, HyperLogLog
+from .feature_graph import register, _codes, _float, _segments
+from .signatures import BLOCK_PLAYERS, compute_signatures
+from .config import END_DATE, CHURN_LOOKBACK_DAYS
+
+APPROX_COLUMNS = ['approx_days_active', 'approx_unique_games', 'median_bet_size', 'p90_bet_size',
+                  'median_session_length', 'p90_session_length']
+
+
+@register('sketches.bet_size', deps=('bets.window',), table='bets', window='lookback')
+def _bet_size_sketch(ex, window):
+    rows, counts = window
+    return DDSketch(len(ex), DD_RELATIVE_ACCURACY).add(_float(ex.store['bets']['bet_amount'], rows),
+                                                       _segments(counts))
+
+
+@register('sketches.session_length', deps=('sessions.minutes', 'sessions.login'), table='sessions',
+          window='lookback')
+def _session_length_sketch(ex, minutes, login):
+    return DDSketch(len(ex), DD_RELATIVE_ACCURACY).add(minutes, login[1])
+
+
+@register('approx_days_active', deps=('sessions.login',))
+def _approx_days_active(ex, login):
+    times, seg = login
+    valid = ~np.isnat(times)
+    days = times[valid].astype('datetime64[D]').view('int64')
+    return np.rint(HyperLogLog(len(ex), PLAYER_HLL_PRECISION).add(days, seg[valid]).estimate()).astype(np.int64)
+
+
+@register('approx_unique_games', deps=('bets.window',))
+def _approx_unique_games(ex, window):
+    rows, counts = window
+    # store codes are shared by every executor on the store, so blocks hash the same game the same way
+    codes = _codes(ex.store['bets']['game_name'], rows)
+    known = codes >= 0
+    sketch = HyperLogLog(len(ex), PLAYER_HLL_PRECISION).add(codes[known], _segments(counts)[known])
+    return np.rint(sketch.estimate()).astype(np.int64)
+
+
+@register('median_bet_size', deps=('sketches.bet_size',))
+def _median_bet_size(ex, sketch):
+    return sketch.quantile(0.5)
+
+
+@register('p90_bet_size', deps=('sketches.bet_size',))
+def _p90_bet_size(ex, sketch):
+    return sketch.quantile(0.9)
+
+
+@register('median_session_length', deps=('sketches.session_length',))
+def _median_session_length(ex, sketch):
+    return sketch.quantile(0.5)
+
+
+@register('p90_session_length', deps=('sketches.session_length',))
+def _p90_session_length(ex, sketch):
+    return sketch.quantile(0.9)
+
+
+def compute_approx(players_df, store, reference_time=END_DATE, lookback_days=CHURN_LOOKBACK_DAYS,
+                   columns=APPROX_COLUMNS, block_players=BLOCK_PLAYERS):
+    """Sketch aggregates over the lookback window of an EventStore holding the full history, block by block"""
+    # the executor loop is the same as for the signatures: any registered node can be read this way
+    return compute_signatures(players_df, store, reference_time, lookback_days, columns, block_players)
@@ -0,0 +1,81 @@
+"""
+Command line entry point:
+
+    python -m generator --players 10000 --start 2025-01-01 --end 2025-06-30 \
+        --seed 7 --format parquet --workers 4 --out ../raw_data
+
+`--format npy` streams the event tables chunk by chunk into a memory-mapped
+event store (<out>/event_store/) instead of building them in memory.
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+from instrumentation import get_report
+from .config import GeneratorConfig, N_PLAYERS, SEED, OUTPUT_FORMATS, CHUNK_SIZE, ENGINES
+from .pipeline import run, run_to_store, save_outputs, EVENT_STORE_DIR
+
+
+def _date(value):
+    return datetime.fromisoformat(value)
+
+
+def _tournament(value):
+    """START,END,MULTIPLIER -> (datetime, datetime, float)"""
+    try:
+        start, end, multiplier = value.split(',')
+        return _date(start), _date(end), float(multiplier)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected START,END,MULTIPLIER, got {value!r}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='generator', description="Generate synthetic casino event logs and churn features.")
+    parser.add_argument('--players', type=int, default=N_PLAYERS, help='number of players to simulate')
+    parser.add_argument('--start', type=_date, default=None, help='first event date (ISO format, default: end - 180 days)')
+    parser.add_argument('--end', type=_date, default=None, help='last event date / feature reference time (default: now)')
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv', dest='output_format')
+    parser.add_argument('--workers', type=int, default=1, help='processes used for event generation and feature aggregation')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='players per generation chunk')
+    parser.add_argument('--tournament', type=_tournament, action='append', default=[], dest='tournaments',
+                        help='activity spike START,END,MULTIPLIER (ISO dates, repeatable)')
+    parser.add_argument('--engine', choices=ENGINES, default='simulation',
+                        help='day-by-day behavioural simulation, or independent per-table generators')
+    parser.add_argument('--uuid-ids', action='store_const', const='uuid', default='int', dest='id_format',
+                        help='write event ids as UUID strings derived from (seed, table, id) instead of integers')
+    parser.add_argument('--feature-cache', default=None, dest='feature_cache_dir',
+                        help='directory caching feature tables between runs with identical data and settings')
+    parser.add_argument('--cap-outliers', action='store_true',
+                        help='cap anomalous bet/deposit amounts (robust per-archetype limits) before computing features')
+    parser.add_argument('--out', default='.', dest='output_dir', help='output directory')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        config = GeneratorConfig(
+            n_players=args.players, start=args.start, end=args.end, seed=args.seed,
+            output_format=args.output_format, workers=args.workers, chunk_size=args.chunk_size,
+            output_dir=args.output_dir, tournaments=tuple(args.tournaments),
+            id_format=args.id_format, engine=args.engine, feature_cache_dir=args.feature_cache_dir,
+            cap_outliers=args.cap_outliers,
+        )
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+
+    if config.output_format == 'npy':
+        frames = run_to_store(config)
+        paths = save_outputs(frames, config) + [os.path.join(config.output_dir, EVENT_STORE_DIR)]
+    else:
+        frames = run(config)
+        print(f"Saving {config.output_format.upper()} files...")
+        paths = save_outputs(frames, config)
+    report_path = os.path.join(config.output_dir, 'run_report.json')
+    get_report().write_json(report_path)
+    print(get_report().summary())
+    print("Done. Files saved: " + ", ".join(os.path.basename(p) for p in paths) + ", run_report.json")
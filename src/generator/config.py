@@ -0,0 +1,73 @@
+"""
+Generator configuration: module defaults plus the GeneratorConfig passed through the pipeline.
+"""
+
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+
+# ---------- CONFIG ----------
+N_PLAYERS = 4000     # adjust for scale (1k for dev, 100k+ for production)
+HISTORY_DAYS = 180          # length of the simulated event history
+START_DATE = datetime.now() - timedelta(days=HISTORY_DAYS)
+END_DATE = datetime.now()
+CHURN_LOOKBACK_DAYS = 30    # window to compute features
+CHURN_LABEL_THRESHOLD = 14  # days since last login -> churn
+SEED = 42
+OUTLIER_FRACTION = 0.005    # 0.5% extreme outliers
+MISSING_FRACTION = 0.01     # fraction of fields to blank
+DRIFT_FRACTION = 0.2        # fraction of players in test drift scenario
+CHUNK_SIZE = 5000           # players per event-generation chunk (unit of parallel work)
+OUTPUT_FORMATS = ('csv', 'parquet', 'npy')  # npy: memory-mapped event store (see event_store.py)
+ENGINES = ('simulation', 'independent')  # day-by-day simulation, or independent per-table generators
+ID_FORMATS = ('int', 'uuid')  # event ids: dense int64, or UUIDs derived from (seed, table, id)
+# ----------------------------
+
+
+@dataclass
+class GeneratorConfig:
+    """Everything a generator run depends on; defaults mirror the module constants"""
+    n_players: int = N_PLAYERS
+    start: datetime = None
+    end: datetime = None
+    lookback_days: int = CHURN_LOOKBACK_DAYS
+    churn_threshold: int = CHURN_LABEL_THRESHOLD
+    seed: int = SEED
+    outlier_fraction: float = OUTLIER_FRACTION
+    missing_fraction: float = MISSING_FRACTION
+    drift_fraction: float = DRIFT_FRACTION
+    output_dir: str = '.'
+    output_format: str = 'csv'
+    workers: int = 1
+    chunk_size: int = CHUNK_SIZE
+    tournaments: tuple = ()     # (start, end, activity multiplier) spikes, see temporal.py
+    id_format: str = 'int'
+    engine: str = 'simulation'
+    scenarios: tuple = None     # scenarios.Scenario objects; None = the default drift test set
+    feature_cache_dir: str = None   # reuse feature tables across runs (see feature_cache.py)
+    cap_outliers: bool = False      # winsorize bet/deposit amounts per archetype before features (see outliers.py)
+
+    def __post_init__(self):
+        if self.end is None:
+            self.end = datetime.now()
+        if self.start is None:
+            self.start = self.end - timedelta(days=HISTORY_DAYS)
+        if self.start >= self.end:
+            raise ValueError(f"start ({self.start}) must be before end ({self.end})")
+        if self.output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"output_format must be one of {OUTPUT_FORMATS}, got {self.output_format!r}")
+        if self.engine not in ENGINES:
+            raise ValueError(f"engine must be one of {ENGINES}, got {self.engine!r}")
+        if self.id_format not in ID_FORMATS:
+            raise ValueError(f"id_format must be one of {ID_FORMATS}, got {self.id_format!r}")
+        if self.n_players < 1 or self.workers < 1 or self.chunk_size < 1:
+            raise ValueError("n_players, workers and chunk_size must be positive")
+        for t_start, t_end, multiplier in self.tournaments:
+            if t_start >= t_end or multiplier <= 0:
+                raise ValueError(f"invalid tournament spike ({t_start}, {t_end}, {multiplier})")
+
+        names = [s.name for s in self.scenarios or ()]
+        if len(set(names)) != len(names):
+            raise ValueError(f"scenario names must be unique, got {names}")
+
+    def to_dict(self):
+        return asdict(self)
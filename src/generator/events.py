@@ -0,0 +1,163 @@
+"""
+Event log generation: sessions, bets, deposits, withdrawals and bonuses per player.
+
+Every generator draws per-player event counts, expands the player attributes to
+one row per event and samples all columns at once; timestamps come from the
+TemporalSampler profiles in temporal.py. `spikes` adds (start, end, multiplier)
+activity spikes such as tournaments. Ids come from `ids` (an IdAllocator, see
+ids.py); without one every call numbers its rows from 1.
+"""
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+from .temporal import TemporalSampler, UNIFORM_PROFILE, SESSION_PROFILE, BOT_PROFILE
+from .ids import IdAllocator
+
+GAMES = ['slots', 'blackjack', 'roulette', 'poker', 'craps', 'baccarat']
+BONUS_TYPES = ['free_spin', 'match_deposit', 'cashback', 'no_deposit']
+MINUTE = np.timedelta64(1, 'm')
+DAY = np.timedelta64(1, 'D')
+
+
+def _rates(players_df, table):
+    return players_df['archetype'].map(table).to_numpy(dtype=float)
+
+
+def _expand(players_df, counts):
+    """Row index into players_df for every event (each player repeated counts[i] times)"""
+    return np.repeat(np.arange(len(players_df)), counts)
+
+
+def _sample_times(start, end, n, spikes=(), profile=UNIFORM_PROFILE):
+    return TemporalSampler(start, end, profile.with_spikes(spikes)).sample(n)
+
+
+@timed('sessions')
+def generate_sessions(players_df, start, end, spikes=(), ids=None):
+    ids = ids or IdAllocator()
+    # sessions per week base by archetype
+    base = _rates(players_df, {'casual': 1, 'regular': 5, 'whale': 8, 'bot': 20})
+    weeks = (end - start).days / 7
+    counts = np.maximum(1, np.random.poisson(base * weeks))
+    idx = _expand(players_df, counts)
+    is_bot = players_df['archetype'].to_numpy()[idx] == 'bot'
+
+    # prefer evenings and weekends; bots skew to uniform/odd hours
+    login = np.empty(len(idx), dtype='datetime64[s]')
+    login[~is_bot] = _sample_times(start, end, int((~is_bot).sum()), spikes, SESSION_PROFILE)
+    login[is_bot] = _sample_times(start, end, int(is_bot.sum()), spikes, BOT_PROFILE)
+    # session length minutes based on archetype
+    length_min = np.maximum(1, np.random.normal(np.where(is_bot, 5, 30), 20).astype(np.int64))
+    return pd.DataFrame({
+        'session_id': ids.allocate('sessions', len(idx)),
+        'player_id': players_df['player_id'].to_numpy()[idx],
+        'login_time': login,
+        'logout_time': login + length_min * MINUTE,
+        'device_type': np.random.choice(['mobile', 'desktop', 'tablet'], size=len(idx)),
+        'platform': np.random.choice(['iOS', 'Android', 'Windows', 'macOS'], size=len(idx)),
+        'country': players_df['country'].to_numpy()[idx],
+    })
+
+
+@timed('bets')
+def generate_bets(players_df, start, end, spikes=(), ids=None):
+    ids = ids or IdAllocator()
+    # bet frequency base
+    base = _rates(players_df, {'casual': 3, 'regular': 20, 'whale': 150, 'bot': 300})
+    weeks = (end - start).days / 7
+    idx = _expand(players_df, np.random.poisson(base * weeks))
+    archetype = players_df['archetype'].to_numpy()[idx]
+    n = len(idx)
+
+    # bet size distribution: |N(loc, scale)| + floor per archetype
+    whale, bot = archetype == 'whale', archetype == 'bot'
+    loc = np.select([whale, bot], [50, 0.5], 5)
+    scale = np.select([whale, bot], [200, 0.5], 10)
+    bet_amount = np.abs(np.random.normal(loc, scale)) + np.where(whale, 10, 0)
+    # win probability: small positive or negative (casino edge ~0.52)
+    win = np.random.binomial(1, 0.48, size=n).astype(bool)
+    win_amount = np.where(win, bet_amount * np.random.uniform(0.5, 2.0, size=n), 0.0)
+    return pd.DataFrame({
+        'bet_id': ids.allocate('bets', n),
+        'player_id': players_df['player_id'].to_numpy()[idx],
+        'game_name': np.random.choice(GAMES, size=n),
+        'bet_amount': np.round(bet_amount, 2),
+        'win_amount': np.round(win_amount, 2),
+        'bet_time': _sample_times(start, end, n, spikes),
+    })
+
+
+@timed('deposits')
+def generate_deposits(players_df, start, end, spikes=(), ids=None):
+    ids = ids or IdAllocator()
+    # deposit frequency
+    base = _rates(players_df, {'casual': 0.3, 'regular': 1.2, 'whale': 5, 'bot': 0})
+    months = (end - start).days / 30
+    counts = np.random.poisson(base * months)
+    is_whale = players_df['archetype'].to_numpy() == 'whale'
+    counts[(counts == 0) & is_whale & (np.random.random(len(counts)) < 0.05)] = 1
+    idx = _expand(players_df, counts)
+    whale = is_whale[idx]
+    n = len(idx)
+
+    amount = np.abs(np.random.normal(np.where(whale, 500, 50), np.where(whale, 1000, 100))) + np.where(whale, 50, 0)
+    return pd.DataFrame({
+        'deposit_id': ids.allocate('deposits', n),
+        'player_id': players_df['player_id'].to_numpy()[idx],
+        'deposit_time': _sample_times(start, end, n, spikes),
+        'amount': np.round(amount, 2),
+        'payment_method': np.random.choice(['card', 'paypal', 'crypto', 'bank'], size=n),
+    })
+
+
+@timed('withdrawals')
+def generate_withdrawals(players_df, start, end, spikes=(), ids=None):
+    ids = ids or IdAllocator()
+    base = _rates(players_df, {'casual': 0.1, 'regular': 0.6, 'whale': 2, 'bot': 0})
+    months = (end - start).days / 30
+    idx = _expand(players_df, np.random.poisson(base * months))
+    n = len(idx)
+    return pd.DataFrame({
+        'withdrawal_id': ids.allocate('withdrawals', n),
+        'player_id': players_df['player_id'].to_numpy()[idx],
+        'withdrawal_time': _sample_times(start, end, n, spikes),
+        'amount': np.round(np.abs(np.random.normal(30, 80, size=n)), 2),
+        'method': np.random.choice(['bank', 'card'], size=n),
+    })
+
+
+@timed('bonuses')
+def generate_bonuses(players_df, start, end, spikes=(), ids=None):
+    ids = ids or IdAllocator()
+    # probability of receiving bonus
+    prob = _rates(players_df, {'casual': 0.05, 'regular': 0.15, 'whale': 0.35, 'bot': 0.0})
+    idx = np.flatnonzero(np.random.random(len(players_df)) < prob)
+    n = len(idx)
+    casual = players_df['archetype'].to_numpy()[idx] == 'casual'
+    issued = _sample_times(start, end, n, spikes)
+    redeemed = issued + np.random.randint(0, 11, size=n) * DAY
+    redeemed[np.random.random(n) >= 0.7] = np.datetime64('NaT')
+    bonuses = pd.DataFrame({
+        'row': idx,
+        'bonus_type': np.random.choice(BONUS_TYPES, size=n),
+        'bonus_amount': np.round(np.abs(np.random.normal(np.where(casual, 10, 100), 50)), 2),
+        'issued_date': issued,
+        'redeemed_date': redeemed,
+    })
+
+    # sometimes send additional marketing offers (track offers_received separately)
+    # we'll represent offers as additional rows with small probability
+    offer = np.random.random(n) < 0.05
+    offers = pd.DataFrame({
+        'row': idx[offer],
+        'bonus_type': 'marketing_offer',
+        'bonus_amount': 0.0,
+        'issued_date': issued[offer] + np.random.randint(1, 8, size=int(offer.sum())) * DAY,
+        'redeemed_date': np.full(int(offer.sum()), np.datetime64('NaT'), dtype='datetime64[s]'),
+    })
+    rows = pd.concat([bonuses, offers], ignore_index=True).sort_values('row', kind='stable')
+    rows.insert(0, 'player_id', players_df['player_id'].to_numpy()[rows.pop('row').to_numpy()])
+    rows.insert(0, 'bonus_id', ids.allocate('bonuses', len(rows)))
+    return rows.reset_index(drop=True)
@@ -0,0 +1,436 @@
+"""
+Declarative feature registry and a lazy executor over an EventStore.
+
+Every node declares the table and window it reads and the nodes it is computed
+from. Output features are thin nodes on top of shared sub-aggregations — one
+pass over the windowed bets feeds total_bet_amount, avg_bet_size, win_rate and
+net_ggr — so the executor plans only the nodes the requested features need and
+caches each node's result for the lifetime of the executor:
+
+    ex = FeatureExecutor(players_df, store, reference_time, window_start=None)
+    ex.compute(['total_bets', 'days_since_last_login'])   # reads bets + sessions only
+    ex.compute(['win_rate'])                              # reuses the cached bets window
+    lineage('net_ggr')   # {'tables': ['bets'], 'windows': ['lookback'], 'nodes': [...]}
+
+Aggregations are vectorized over all players at once: each player's rows are
+gathered from the store offsets and reduced per segment (np.add.reduceat,
+bincount), instead of a Python loop per player.
+"""
+
+from dataclasses import dataclass
+import hashlib
+import inspect
+import sys
+import numpy as np
+import pandas as pd
+
+from event_store import CategoricalColumn, _time_key
+from .config import CHURN_LOOKBACK_DAYS, CHURN_LABEL_THRESHOLD
+
+NS_PER_DAY = 86_400 * 10**9
+TREND_WEEKS = 4
+NO_LOGIN_DAYS = 999     # days_since_last_login for players never seen
+
+
+@dataclass(frozen=True)
+class Node:
+    """One registered feature or intermediate aggregation"""
+    name: str
+    fn: callable
+    deps: tuple = ()
+    table: str = None       # event table (or 'players') read directly, None for derived nodes
+    window: str = None      # 'lookback', 'weekly' or 'history'
+    output: bool = False    # exposed as a player_features column
+
+
+REGISTRY = {}
+FEATURE_COLUMNS = []        # output features in player_features column order
+
+
+def register(name, deps=(), table=None, window=None, output=False):
+    """Decorator adding fn(executor, *dep_values) -> value to the registry"""
+    def decorator(fn):
+        if name in REGISTRY:
+            raise ValueError(f"feature node {name!r} is already registered")
+        REGISTRY[name] = Node(name, fn, tuple(deps), table, window, output)
+        if output:
+            FEATURE_COLUMNS.append(name)
+        return fn
+    return decorator
+
+
+def plan(features):
+    """Registry nodes needed for `features`, dependencies first"""
+    order, seen = [], set()
+
+    def visit(name):
+        if name in seen:
+            return
+        if name not in REGISTRY:
+            raise KeyError(f"unknown feature {name!r}")
+        seen.add(name)
+        for dep in REGISTRY[name].deps:
+            visit(dep)
+        order.append(name)
+
+    for name in features:
+        visit(name)
+    return order
+
+
+def lineage(feature):
+    """Tables, windows and nodes a feature is derived from"""
+    nodes = plan([feature])
+    return {
+        'tables': sorted({REGISTRY[n].table for n in nodes if REGISTRY[n].table}),
+        'windows': sorted({REGISTRY[n].window for n in nodes if REGISTRY[n].window}),
+        'nodes': nodes,
+    }
+
+
+def definition_hash(features=None):
+    """Hash of everything `features` are computed from: this module's code plus the planned nodes.
+
+    Part of the feature cache key (feature_cache.py), so editing a feature or a
+    shared helper invalidates the cached tables that depend on it.
+    """
+    features = FEATURE_COLUMNS if features is None else list(features)
+    h = hashlib.sha256(inspect.getsource(sys.modules[__name__]).encode())
+    h.update(repr(sorted(features)).encode())
+    for name in plan(features):
+        node = REGISTRY[name]
+        # nodes may be registered from other modules
+        h.update(repr((node.name, node.deps, node.table, node.window, node.output)).encode())
+        h.update(inspect.getsource(node.fn).encode())
+    return h.hexdigest()
+
+
+# ---------- segment helpers ----------
+def _gather(starts, ends):
+    """Row indices of the concatenated [starts[i], ends[i]) ranges and per-player counts"""
+    counts = np.maximum(ends - starts, 0)
+    first = np.cumsum(counts) - counts
+    rows = np.repeat(starts - first, counts) + np.arange(counts.sum())
+    return rows, counts
+
+
+def _segments(counts):
+    return np.repeat(np.arange(len(counts)), counts)
+
+
+def _time_ranges(table, pos, start=None, end=None):
+    """(starts, ends): rows of the players at `pos` with start <= time < end (vectorized range_at).
+
+    Each player's non-missing rows are sorted by time, so the key segment * 3 + (time >= start) + (time >= end)
+    is sorted over the gathered rows and one searchsorted finds both bounds of every player.
+    """
+    known = pos >= 0
+    p = np.maximum(pos, 0)
+    first = np.where(known, table.offsets[p], 0)
+    rows, counts = _gather(first, np.where(known, table.valid_ends[p], 0))
+    t = np.asarray(table[table.time_column][rows]).view('int64')
+    keys = _segments(counts) * 3
+    keys += t >= (_time_key(start) if start is not None else np.iinfo(np.int64).min)
+    if end is not None:
+        keys += t >= _time_key(end)
+    base = np.arange(len(pos)) * 3
+    found = np.searchsorted(keys, np.concatenate([base + 1, base + 2]), side='left')
+    before = np.cumsum(counts) - counts     # gathered rows of the players before each player
+    starts = first + found[:len(pos)] - before
+    return starts, first + found[len(pos):] - before
+
+
+def _segment_sum(values, counts):
+    """Per-player sums of values laid out in counts-sized segments (0 for empty ones)"""
+    out = np.zeros(len(counts))
+    nonempty = counts > 0
+    if nonempty.any():
+        starts = np.cumsum(counts) - counts
+        out[nonempty] = np.add.reduceat(values, starts[nonempty])
+    return out
+
+
+def _segment_nunique(seg, codes, n):
+    """Distinct non-negative codes per segment"""
+    keep = codes >= 0
+    if not keep.any():
+        return np.zeros(n, dtype=np.int64)
+    width = int(codes[keep].max()) + 1
+    pairs = np.unique(seg[keep].astype(np.int64) * width + codes[keep])
+    return np.bincount(pairs // width, minlength=n)
+
+
+def _codes(column, rows):
+    """Integer codes of column[rows], -1 where missing (string, id or category columns)"""
+    if isinstance(column, CategoricalColumn):
+        return np.asarray(column.codes[rows]).astype(np.int64)
+    return pd.factorize(column[rows])[0]
+
+
+def _round(values, decimals):
+    """Python round() per value: np.round scales by 10**decimals and can land on the other side of a half"""
+    return np.array([round(v, decimals) for v in values.tolist()], dtype=float)
+
+
+def _float(column, rows):
+    return np.asarray(column[rows]).astype(float)
+
+
+class FeatureExecutor:
+    """Evaluates registry nodes for one set of players, caching every node it computes.
+
+    window_start None means the store already holds only the lookback window
+    (in-memory make_features); otherwise each player's rows are cut to
+    [window_start, reference_time) with searchsorted. Either way events at or after
+    reference_time are left out, so both paths see the same rows. all_sessions names
+    the table with the full session history used for the days-since-last-login fallback.
+    """
+
+    def __init__(self, players_df, store, reference_time, window_start=None, all_sessions='sessions',
+                 lookback_days=CHURN_LOOKBACK_DAYS, churn_threshold=CHURN_LABEL_THRESHOLD):
+        self.players_df = players_df
+        self.player_ids = players_df['player_id'].to_numpy()
+        self.store = store
+        self.reference_time = reference_time
+        self.window_start = window_start
+        self.all_sessions = all_sessions
+        self.lookback_days = lookback_days
+        self.churn_threshold = churn_threshold
+        self.cache = {}
+
+    def __len__(self):
+        return len(self.player_ids)
+
+    def get(self, name):
+        """Value of a registry node, computing its missing dependencies first"""
+        for node_name in plan([name]):
+            if node_name not in self.cache:
+                node = REGISTRY[node_name]
+                self.cache[node_name] = node.fn(self, *(self.cache[d] for d in node.deps))
+        return self.cache[name]
+
+    def compute(self, features=None):
+        """player_features frame with player_id and `features` (all output features by default)"""
+        features = FEATURE_COLUMNS if features is None else list(features)
+        not_output = [f for f in features if f not in REGISTRY or not REGISTRY[f].output]
+        if not_output:
+            raise ValueError(f"unknown features {not_output}; available: {FEATURE_COLUMNS}")
+        out = pd.DataFrame({'player_id': self.player_ids})
+        for name in sorted(features, key=FEATURE_COLUMNS.index):
+            out[name] = self.get(name)
+        return out
+
+    def window(self, table):
+        """(rows, counts): each player's rows of `table` inside the lookback window"""
+        t = self.store[table]
+        pos = t.positions(self.player_ids)
+        # events at or after reference_time are in the future of a snapshot taken before the end of the data
+        starts, ends = _time_ranges(t, pos, self.window_start, self.reference_time)
+        return _gather(starts, ends)
+
+
+# ---------- shared sub-aggregations ----------
+@register('sessions.window', table='sessions', window='lookback')
+def _sessions_window(ex):
+    return ex.window('sessions')
+
+
+@register('sessions.login', deps=('sessions.window',), table='sessions', window='lookback')
+def _sessions_login(ex, window):
+    rows, counts = window
+    login = np.asarray(ex.store['sessions']['login_time'][rows]).astype('datetime64[ns]')
+    return login, _segments(counts)
+
+
+@register('sessions.ids', deps=('sessions.window',), table='sessions', window='lookback')
+def _sessions_ids(ex, window):
+    rows, _ = window
+    return _codes(ex.store['sessions']['session_id'], rows)
+
+
+@register('sessions.last_login', deps=('sessions.login',), table='sessions', window='lookback')
+def _sessions_last_login(ex, login):
+    times, seg = login
+    out = np.full(len(ex), np.datetime64('NaT'), dtype='datetime64[ns]')
+    valid = ~np.isnat(times)
+    # NaT is the smallest int64, so the maximum ignores it
+    np.maximum.at(out.view('int64'), seg[valid], times[valid].view('int64'))
+    return out
+
+
+@register('sessions.history_last_login', table='all_sessions', window='history')
+def _history_last_login(ex):
+    table = ex.store[ex.all_sessions]
+    out = np.full(len(ex), np.datetime64('NaT'), dtype='datetime64[ns]')
+    pos = table.positions(ex.player_ids)
+    # only logins before reference_time count
+    _, ends = _time_ranges(table, pos, None, ex.reference_time)
+    has = (pos >= 0) & (ends > table.offsets[np.maximum(pos, 0)])
+    out[has] = table[table.time_column][ends[has] - 1]
+    return out
+
+
+@register('sessions.weekly', deps=('sessions.login', 'sessions.ids'), table='sessions', window='weekly')
+def _sessions_weekly(ex, login, ids):
+    """Distinct sessions per player in each of the TREND_WEEKS weeks before reference_time (oldest first)"""
+    times, seg = login
+    t = times.view('int64')
+    ref = pd.Timestamp(ex.reference_time).as_unit('ns').value
+    week = 7 * NS_PER_DAY
+    in_range = ~np.isnat(times) & (t < ref) & (t >= ref - TREND_WEEKS * week)
+    # week 0 is [ref - 7d, ref); bins are half-open like EventTable.range
+    back = (ref - t[in_range] - 1) // week
+    cell = seg[in_range] * TREND_WEEKS + (TREND_WEEKS - 1 - back)
+    counts = _segment_nunique(cell, ids[in_range], len(ex) * TREND_WEEKS)
+    return counts.reshape(len(ex), TREND_WEEKS)
+
+
+@register('bets.window', table='bets', window='lookback')
+def _bets_window(ex):
+    return ex.window('bets')
+
+
+@register('bets.totals', deps=('bets.window',), table='bets', window='lookback')
+def _bets_totals(ex, window):
+    """One pass over the windowed bets: amount sums, known-amount counts, wins and GGR"""
+    rows, counts = window
+    bets = ex.store['bets']
+    bet = _float(bets['bet_amount'], rows)
+    win = _float(bets['win_amount'], rows)
+    seg = _segments(counts)
+    known = ~np.isnan(bet)
+    ggr = bet - win
+    return {
+        'amount': _segment_sum(np.where(known, bet, 0.0), counts),
+        'known_amount': _segment_sum(bet[known], np.bincount(seg[known], minlength=len(counts))),
+        'n_known': np.bincount(seg[known], minlength=len(counts)),
+        'wins': np.bincount(seg[win > 0], minlength=len(counts)),
+        'ggr': _segment_sum(np.where(np.isnan(ggr), 0.0, ggr), counts),
+    }
+
+
+@register('deposits.window', table='deposits', window='lookback')
+def _deposits_window(ex):
+    return ex.window('deposits')
+
+
+@register('withdrawals.window', table='withdrawals', window='lookback')
+def _withdrawals_window(ex):
+    return ex.window('withdrawals')
+
+
+@register('bonuses.window', table='bonuses', window='lookback')
+def _bonuses_window(ex):
+    return ex.window('bonuses')
+
+
+# ---------- output features (player_features column order) ----------
+@register('days_active_last_30', deps=('sessions.login',), output=True)
+def _days_active(ex, login):
+    times, seg = login
+    valid = ~np.isnat(times)
+    days = times[valid].astype('datetime64[D]').view('int64')
+    return _segment_nunique(seg[valid], days - days.min() if len(days) else days, len(ex))
+
+
+@register('total_bets', deps=('bets.window',), output=True)
+def _total_bets(ex, window):
+    return window[1]
+
+
+@register('total_bet_amount', deps=('bets.totals',), output=True)
+def _total_bet_amount(ex, totals):
+    return _round(totals['amount'], 2)
+
+
+@register('avg_bet_size', deps=('bets.totals',), output=True)
+def _avg_bet_size(ex, totals):
+    n = totals['n_known']
+    # amounts are in cents: rounding the sum first drops summation-order noise (rollups add daily sums)
+    return _round(np.where(n > 0, _round(totals['known_amount'], 2) / np.maximum(n, 1), 0.0), 2)
+
+
+@register('total_deposit', deps=('deposits.window',), output=True)
+def _total_deposit(ex, window):
+    rows, counts = window
+    amount = _float(ex.store['deposits']['amount'], rows)
+    return _round(_segment_sum(np.nan_to_num(amount), counts), 2)
+
+
+@register('total_withdrawal', deps=('withdrawals.window',), output=True)
+def _total_withdrawal(ex, window):
+    rows, counts = window
+    amount = _float(ex.store['withdrawals']['amount'], rows)
+    return _round(_segment_sum(np.nan_to_num(amount), counts), 2)
+
+
+@register('win_rate', deps=('bets.totals', 'total_bets'), output=True)
+def _win_rate(ex, totals, total_bets):
+    return _round(np.where(total_bets > 0, totals['wins'] / np.maximum(total_bets, 1), 0.0), 3)
+
+
+@register('net_ggr', deps=('bets.totals',), output=True)
+def _net_ggr(ex, totals):
+    # net GGR for the casino in the lookback window: bets minus payouts
+    return _round(totals['ggr'], 2)
+
+
+@register('unique_games_played', deps=('bets.window',), output=True)
+def _unique_games(ex, window):
+    rows, counts = window
+    return _segment_nunique(_segments(counts), _codes(ex.store['bets']['game_name'], rows), len(ex))
+
+
+@register('bonus_used', deps=('bonuses.window',), output=True)
+def _bonus_used(ex, window):
+    return window[1] > 0
+
+
+@register('offers_received', deps=('bonuses.window',), output=True)
+def _offers_received(ex, window):
+    return window[1]
+
+
+@register('offers_redeemed', deps=('bonuses.window',), output=True)
+def _offers_redeemed(ex, window):
+    rows, counts = window
+    redeemed = pd.notna(ex.store['bonuses']['redeemed_date'][rows])
+    return np.bincount(_segments(counts)[redeemed], minlength=len(ex))
+
+
+@register('sessions_per_week', deps=('sessions.login', 'sessions.ids'), output=True)
+def _sessions_per_week(ex, login, ids):
+    n_sessions = _segment_nunique(login[1], ids, len(ex))
+    return _round(n_sessions / (ex.lookback_days / 7.0), 2)
+
+
+@register('session_trend_weekly', deps=('sessions.weekly',), output=True)
+def _session_trend(ex, weekly):
+    # least-squares slope of the weekly session counts
+    x = np.arange(TREND_WEEKS) - (TREND_WEEKS - 1) / 2
+    slope = weekly @ x / (x @ x)
+    return _round(np.where(weekly.sum(axis=1) > 0, slope, 0.0), 3)
+
+
+@register('days_since_last_login', deps=('sessions.last_login', 'sessions.history_last_login'), output=True)
+def _days_since_last_login(ex, last_login, history_last_login):
+    # no session in the lookback: fall back to the last login ever
+    last = np.where(np.isnat(last_login), history_last_login, last_login)
+    ref = pd.Timestamp(ex.reference_time).as_unit('ns').value
+    days = (ref - last.view('int64')) // NS_PER_DAY
+    return np.where(np.isnat(last), NO_LOGIN_DAYS, days)
+
+
+@register('friends_count', table='players', output=True)
+def _friends_count(ex):
+    return ex.players_df['friends_count'].to_numpy().astype(int)
+
+
+@register('messages_sent', table='players', output=True)
+def _messages_sent(ex):
+    return ex.players_df['messages_sent'].to_numpy().astype(int)
+
+
+@register('churn_label', deps=('days_since_last_login',), output=True)
+def _churn_label(ex, days_since_last_login):
+    return (days_since_last_login > ex.churn_threshold).astype(int)
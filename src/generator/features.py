@@ -0,0 +1,132 @@
+"""
+Per-player feature aggregation over a lookback window.
+
+Features are evaluated lazily through the registry in feature_graph.py: pass
+`features=[...]` to compute only those columns (and the aggregations they need).
+Pass `cache=FeatureCache(dir)` (feature_cache.py) to reuse a table computed
+earlier from the same definitions, data and window.
+
+With workers > 1 players are split into contiguous ranges balanced by event
+count; the event store is written once to a shared directory (/dev/shm when
+available) and each worker memory-maps it, so no event data is pickled.
+"""
+
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+import pandas as pd
+
+from instrumentation import RunReport, get_report, set_report, stage, timed
+from event_store import EventStore, EventTable, shared_dir
+from feature_cache import frames_fingerprint, store_fingerprint
+from .feature_graph import FeatureExecutor, definition_hash
+from .config import END_DATE, CHURN_LOOKBACK_DAYS, CHURN_LABEL_THRESHOLD
+
+
+@timed('make_features')
+def make_features(players_df, sdf, bdf, ddf, wdf, rdf, reference_time=END_DATE, all_sessions_df=None,
+                  lookback_days=CHURN_LOOKBACK_DAYS, churn_threshold=CHURN_LABEL_THRESHOLD, workers=1, features=None,
+                  cache=None):
+    """player_features for the lookback-window frames; `features` narrows the output columns (default all)"""
+    # full session history for the days-since-last-login fallback
+    if all_sessions_df is None:
+        all_sessions_df = sdf
+    if cache is not None:
+        with stage('fingerprint_frames'):
+            data = frames_fingerprint({'players': players_df, 'sessions': sdf, 'bets': bdf, 'deposits': ddf,
+                                       'withdrawals': wdf, 'bonuses': rdf, 'all_sessions': all_sessions_df})
+        return _cached(cache, 'frames', data, reference_time, lookback_days, churn_threshold, features,
+                       lambda: _from_frames(players_df, sdf, bdf, ddf, wdf, rdf, reference_time, all_sessions_df,
+                                            lookback_days, churn_threshold, workers, features))
+    return _from_frames(players_df, sdf, bdf, ddf, wdf, rdf, reference_time, all_sessions_df,
+                        lookback_days, churn_threshold, workers, features)
+
+
+def _from_frames(players_df, sdf, bdf, ddf, wdf, rdf, reference_time, all_sessions_df, lookback_days,
+                 churn_threshold, workers, features):
+    # index every table once; each player's events are then contiguous slices
+    player_ids = players_df['player_id'].to_numpy()
+    store = EventStore.from_frames({
+        'sessions': sdf, 'bets': bdf, 'deposits': ddf, 'withdrawals': wdf, 'bonuses': rdf,
+    }, player_ids)
+    store.tables['all_sessions'] = EventTable.from_frame(all_sessions_df, 'login_time', player_ids)
+    return _run(players_df, store, 'all_sessions', reference_time, None, lookback_days, churn_threshold, workers,
+                features)
+
+
+@timed('make_features_from_store')
+def make_features_from_store(players_df, store, reference_time=END_DATE, lookback_days=CHURN_LOOKBACK_DAYS,
+                             churn_threshold=CHURN_LABEL_THRESHOLD, workers=1, features=None, cache=None):
+    """make_features over an EventStore holding the full history, e.g. EventStore.open(path).
+
+    The lookback window is applied per player with searchsorted, so a memory-mapped
+    store is only paged in for the rows actually aggregated; pass slices of
+    players_df to extract training sets in blocks.
+    """
+    window_start = reference_time - timedelta(days=lookback_days)
+    args = (players_df, store, 'sessions', reference_time, window_start, lookback_days, churn_threshold, workers,
+            features)
+    if cache is None:
+        return _run(*args)
+    with stage('fingerprint_store'):
+        data = [frames_fingerprint({'players': players_df}), store_fingerprint(store)]
+    return _cached(cache, 'store', data, reference_time, lookback_days, churn_threshold, features,
+                   lambda: _run(*args))
+
+
+def _cached(cache, source, data, reference_time, lookback_days, churn_threshold, features, compute):
+    """Feature table from `cache`, or compute() and store it"""
+    key = cache.key(definition=definition_hash(features), source=source, data=data,
+                    reference_time=reference_time, lookback_days=lookback_days, churn_threshold=churn_threshold,
+                    features=features)
+    with stage('feature_cache_get'):
+        df = cache.get(key)
+    if df is None:
+        df = compute()
+        with stage('feature_cache_put') as st:
+            cache.put(key, df)
+            st.add_rows(len(df))
+    get_report().meta['feature_cache'] = dict(cache.stats)
+    return df
+
+
+def _aggregate_in_worker(root, players_df, *args):
+    set_report(RunReport('worker', profile_dir=''))
+    store = EventStore.open(root)
+    with stage('aggregate_partition') as st:
+        features = _aggregate(players_df, store, *args)
+        st.add_rows(len(features))
+    return features, get_report().stages
+
+
+def _run(players_df, store, all_sessions, reference_time, window_start, lookback_days, churn_threshold, workers,
+         features=None):
+    args = (all_sessions, reference_time, window_start, lookback_days, churn_threshold, features)
+    if workers <= 1 or len(players_df) < 2:
+        return _aggregate(players_df, store, *args)
+
+    root, owned = store.root, store.root is None
+    if owned:
+        root = shared_dir('churn_store_')
+    try:
+        if owned:
+            with stage('share_event_store'):
+                store.save(root)
+        parts = store.partition(players_df['player_id'].to_numpy(), workers)
+        with ProcessPoolExecutor(max_workers=len(parts)) as pool:
+            results = list(pool.map(_aggregate_in_worker, [root] * len(parts),
+                                    [players_df.iloc[lo:hi] for lo, hi in parts], *([a] * len(parts) for a in args)))
+    finally:
+        if owned:
+            shutil.rmtree(root, ignore_errors=True)
+    for _, stages in results:
+        get_report().absorb(stages)
+    return pd.concat([features for features, _ in results], ignore_index=True)
+
+
+def _aggregate(players_df, store, all_sessions, reference_time, window_start, lookback_days, churn_threshold,
+               features=None):
+    """Feature rows for players_df; all_sessions names the table used for the last-login fallback"""
+    executor = FeatureExecutor(players_df, store, reference_time, window_start, all_sessions,
+                               lookback_days, churn_threshold)
+    return executor.compute(features)
@@ -0,0 +1,298 @@
+"""
+End-to-end generation run: players -> event logs -> data quality -> features -> outputs.
+
+Event logs come from the day-by-day simulation (simulation.py) by default, or
+from the independent per-table generators (events.py) with engine='independent'.
+"""
+
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+
+from instrumentation import RunReport, get_report, set_report, stage
+from event_store import EventStore, EventStoreWriter, TIME_COLUMNS
+from feature_cache import FeatureCache
+from outliers import OutlierCapper, cap_frames
+from .config import GeneratorConfig
+from .players import generate_players
+from .simulation import Simulation
+from .scenarios import run_scenarios, scenarios_for
+from .events import generate_sessions, generate_bets, generate_deposits, generate_withdrawals, generate_bonuses
+from .quality import inject_outliers, inject_missingness
+from .features import make_features, make_features_from_store
+from .ids import IdAllocator, to_uuid_ids
+
+EVENT_TABLES = ['sessions', 'bets', 'deposits', 'withdrawals', 'bonuses']
+EVENT_STORE_DIR = 'event_store'
+
+
+def seed_all(seed):
+    """Seed both RNGs the generators draw from"""
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def derive_seed(seed, *keys):
+    """Independent, reproducible 32-bit seed for a sub-task (chunk, phase, ...)"""
+    return int(np.random.SeedSequence([seed, *keys]).generate_state(1)[0])
+
+
+def _generate_chunk(players_chunk, config, seed, affected=None):
+    """Event tables for one chunk of players plus its scenario branches (name -> tables).
+
+    Seeded per chunk so output does not depend on worker count; `affected` maps
+    scenario name -> selected player_ids.
+    """
+    seed_all(seed)
+    start, end, spikes = config.start, config.end, config.tournaments
+    state = None
+    if config.engine == 'simulation':
+        with stage('simulate') as st:
+            sim = Simulation(players_chunk, start, end, spikes)
+            frames = sim.run()
+            st.add_rows(sum(len(df) for df in frames.values()))
+        state = sim.state
+    else:
+        frames = {
+            'sessions': generate_sessions(players_chunk, start, end, spikes),
+            'bets': generate_bets(players_chunk, start, end, spikes),
+            'deposits': generate_deposits(players_chunk, start, end, spikes),
+            'withdrawals': generate_withdrawals(players_chunk, start, end, spikes),
+            'bonuses': generate_bonuses(players_chunk, start, end, spikes),
+        }
+    branches = {}
+    if affected:
+        with stage('scenarios') as st:
+            branches = run_scenarios(players_chunk, state, end, scenarios_for(config), affected, spikes)
+            st.add_rows(sum(len(df) for b in branches.values() for df in b.values()))
+    return frames, branches
+
+
+def _generate_chunk_in_worker(players_chunk, config, seed, affected=None):
+    set_report(RunReport('worker', profile_dir=''))
+    frames, branches = _generate_chunk(players_chunk, config, seed, affected)
+    return frames, branches, get_report().stages
+
+
+def _concat_parts(parts):
+    """Concatenate per-chunk event tables, giving each chunk the next block of ids in chunk order"""
+    ids = IdAllocator()
+    parts = [ids.relabel(p) for p in parts]
+    return {t: pd.concat([p[t] for p in parts], ignore_index=True) for t in EVENT_TABLES}
+
+
+def _concat_branches(branch_parts, scenarios):
+    return {s.name: _concat_parts([b[s.name] for b in branch_parts]) for s in scenarios}
+
+
+def select_scenario_players(players_df, config):
+    """Scenario name -> affected player_ids, drawn once for the whole population"""
+    return {s.name: s.select(players_df, derive_seed(config.seed, 3, k))
+            for k, s in enumerate(scenarios_for(config))}
+
+
+def generate_events(players_df, config, affected=None):
+    """All event tables for `players_df`, chunked by config.chunk_size across config.workers processes.
+
+    Returns (events, scenario_events): table -> DataFrame, and scenario name ->
+    table -> DataFrame for the players in `affected` (see select_scenario_players).
+    """
+    chunks = [players_df.iloc[i:i + config.chunk_size] for i in range(0, len(players_df), config.chunk_size)]
+    seeds = [derive_seed(config.seed, 1, i) for i in range(len(chunks))]
+    if config.workers == 1 or len(chunks) == 1:
+        results = [_generate_chunk(c, config, s, affected) for c, s in zip(chunks, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=config.workers) as pool:
+            results = []
+            for frames, branches, stages in pool.map(_generate_chunk_in_worker, chunks, [config] * len(chunks),
+                                                     seeds, [affected] * len(chunks)):
+                get_report().absorb(stages)
+                results.append((frames, branches))
+    events = _concat_parts([frames for frames, _ in results])
+    scenario_events = _concat_branches([branches for _, branches in results], scenarios_for(config)) if affected else {}
+    return events, scenario_events
+
+
+def _generate_store_chunk(players_chunk, config, index, affected=None):
+    """Events of one chunk with outliers/missingness injected per chunk (store mode)"""
+    frames, branches = _generate_chunk(players_chunk, config, derive_seed(config.seed, 1, index), affected)
+    seed_all(derive_seed(config.seed, 2, index))
+    if not frames['bets'].empty and not frames['deposits'].empty:
+        frames['bets'], frames['deposits'] = inject_outliers(frames['bets'], frames['deposits'],
+                                                             outlier_frac=config.outlier_fraction)
+    return {t: inject_missingness(df, fraction=config.missing_fraction) for t, df in frames.items()}, branches
+
+
+def _generate_store_chunk_in_worker(players_chunk, config, index, affected=None):
+    set_report(RunReport('worker', profile_dir=''))
+    frames, branches = _generate_store_chunk(players_chunk, config, index, affected)
+    return frames, branches, get_report().stages
+
+
+def _report_outliers(capper):
+    report = capper.report()
+    get_report().meta['outliers'] = report.to_dict('records')
+    for row in report.itertuples():
+        print(f"  {row.table}: capped {row.flagged} of {row.rows} {row.column} values ({row.fraction:.2%})")
+
+
+def feature_cache(config):
+    """FeatureCache under config.feature_cache_dir, or None when caching is off"""
+    return FeatureCache(config.feature_cache_dir) if config.feature_cache_dir else None
+
+
+def window_features(players_df, frames, reference_time, config, all_sessions_df=None, cache=None):
+    """make_features over the lookback window before reference_time"""
+    agg_start = reference_time - timedelta(days=config.lookback_days)
+    with stage('filter_lookback') as st:
+        recent = {t: frames[t][frames[t][TIME_COLUMNS[t]] >= agg_start] for t in EVENT_TABLES}
+        st.add_rows(sum(len(df) for df in recent.values()))
+    return make_features(players_df, *(recent[t] for t in EVENT_TABLES), reference_time=reference_time,
+                         all_sessions_df=frames['sessions'] if all_sessions_df is None else all_sessions_df,
+                         lookback_days=config.lookback_days, churn_threshold=config.churn_threshold,
+                         workers=config.workers, cache=cache)
+
+
+def scenario_features(players_df, history_sessions, scenario_events, affected, config, cache=None):
+    """player_features_<name> tables: features at the end of each scenario's horizon.
+
+    history_sessions(player_ids) returns the observed sessions of those players,
+    used for the days-since-last-login fallback.
+    """
+    out = {}
+    for scenario in scenarios_for(config):
+        frames = scenario_events[scenario.name]
+        ids = affected[scenario.name]
+        players = players_df[players_df['player_id'].isin(ids)]
+        all_sessions = pd.concat([history_sessions(ids), frames['sessions']], ignore_index=True)
+        reference_time = config.end + timedelta(days=scenario.horizon_days)
+        print(f"Aggregating features for scenario '{scenario.name}' ({len(players)} players)...")
+        out[f"player_features_{scenario.name}"] = window_features(players, frames, reference_time, config,
+                                                                  all_sessions_df=all_sessions, cache=cache)
+    return out
+
+
+def run_to_store(config=None):
+    """Out-of-core run: event chunks stream into a memory-mapped EventStore under config.output_dir.
+
+    Only one chunk of events is in memory at a time; features are then computed
+    from the mapped store. Returns the players, player_features and one
+    player_features_<scenario> frame per scenario (scenario events stay in memory,
+    they cover only the affected players and the horizon).
+    """
+    config = config or GeneratorConfig()
+    get_report().meta.update(config.to_dict())
+    seed_all(config.seed)
+    root = os.path.join(config.output_dir, EVENT_STORE_DIR)
+
+    print(f"Generating data for {config.n_players} players into {root}...")
+    players_df = generate_players(config.n_players, config.end, random.Random(derive_seed(config.seed, 4)))
+    affected = select_scenario_players(players_df, config)
+    chunks = [players_df.iloc[i:i + config.chunk_size] for i in range(0, len(players_df), config.chunk_size)]
+    indexes = list(range(len(chunks)))
+    ids = IdAllocator()
+    capper = OutlierCapper(players_df) if config.cap_outliers else None
+    branch_parts = []
+
+    def write(chunk, frames, branches):
+        if capper is not None:
+            # limits come from the chunks seen so far (including this one)
+            with stage('cap_outliers'):
+                frames = {t: capper.process(t, df) for t, df in frames.items()}
+        frames = ids.relabel(frames)
+        if config.id_format == 'uuid':
+            frames = to_uuid_ids(frames, config.seed)
+        with stage('write_store') as st:
+            writer.append(chunk['player_id'].to_numpy(), frames)
+            st.add_rows(sum(len(df) for df in frames.values()))
+        branch_parts.append(branches)
+
+    with stage('events'), EventStoreWriter(root) as writer:
+        if config.workers == 1 or len(chunks) == 1:
+            for chunk, i in zip(chunks, indexes):
+                write(chunk, *_generate_store_chunk(chunk, config, i, affected))
+        else:
+            with ProcessPoolExecutor(max_workers=config.workers) as pool:
+                results = pool.map(_generate_store_chunk_in_worker, chunks, [config] * len(chunks), indexes,
+                                   [affected] * len(chunks))
+                for chunk, (frames, branches, stages) in zip(chunks, results):
+                    get_report().absorb(stages)
+                    write(chunk, frames, branches)
+
+    if capper is not None:
+        _report_outliers(capper)
+    print("Aggregating features from the event store...")
+    store = EventStore.open(root)
+    cache = feature_cache(config)
+    out = {'players': players_df}
+    out['player_features'] = make_features_from_store(players_df, store, reference_time=config.end,
+                                                      lookback_days=config.lookback_days,
+                                                      churn_threshold=config.churn_threshold, workers=config.workers,
+                                                      cache=cache)
+    scenario_events = _concat_branches(branch_parts, scenarios_for(config))
+    out.update(scenario_features(players_df, store['sessions'].select, scenario_events, affected, config, cache))
+    return out
+
+
+def run(config=None):
+    """Generate every table for `config`; returns a dict of name -> DataFrame (nothing is written)"""
+    config = config or GeneratorConfig()
+    get_report().meta.update(config.to_dict())
+    seed_all(config.seed)
+
+    print(f"Generating data for {config.n_players} players...")
+    print("1/2 Generating player profiles...")
+    players_df = generate_players(config.n_players, config.end, random.Random(derive_seed(config.seed, 4)))
+    affected = select_scenario_players(players_df, config)
+    print(f"2/2 Generating sessions, bets, deposits, withdrawals and bonuses ({config.workers} worker(s))...")
+    with stage('events'):
+        events, scenario_events = generate_events(players_df, config, affected)
+    if config.id_format == 'uuid':
+        events = to_uuid_ids(events, config.seed)
+
+    seed_all(derive_seed(config.seed, 2))
+    print("Injecting data quality variations...")
+    print("Adding outliers...")
+    if not events['bets'].empty and not events['deposits'].empty:
+        events['bets'], events['deposits'] = inject_outliers(events['bets'], events['deposits'],
+                                                             outlier_frac=config.outlier_fraction)
+    print("Adding missing values...")
+    events = {t: inject_missingness(df, fraction=config.missing_fraction) for t, df in events.items()}
+    if config.cap_outliers:
+        print("Capping outlying amounts...")
+        with stage('cap_outliers'):
+            events, capper = cap_frames(players_df, events)
+        _report_outliers(capper)
+
+    # ---------- Aggregation: compute features for the lookback window ----------
+    print("Aggregating features...")
+    cache = feature_cache(config)
+    out = {'players': players_df, **events}
+    out['player_features'] = window_features(players_df, events, config.end, config, cache=cache)
+
+    # ---------- What-if scenarios (e.g. the concept-drift test set) ----------
+    sessions = events['sessions']
+    out.update(scenario_features(players_df, lambda ids: sessions[sessions['player_id'].isin(ids)],
+                                 scenario_events, affected, config, cache))
+    return out
+
+
+def save_outputs(frames, config):
+    """Write each frame to config.output_dir in config.output_format; returns the paths written"""
+    os.makedirs(config.output_dir, exist_ok=True)
+    # in npy mode the event tables are already on disk; the remaining frames are small
+    fmt = 'csv' if config.output_format == 'npy' else config.output_format
+    paths = []
+    with stage(f"save_{fmt}") as st:
+        for name, df in frames.items():
+            path = os.path.join(config.output_dir, f"{name}.{fmt}")
+            if fmt == 'parquet':
+                df.to_parquet(path, index=False)
+            else:
+                df.to_csv(path, index=False)
+            st.add_rows(len(df))
+            paths.append(path)
+    return paths
@@ -0,0 +1,69 @@
+"""
+Player profile generation.
+"""
+
+import random
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+from .temporal import TemporalSampler
+
+MAX_ACCOUNT_AGE_DAYS = 400  # registrations fall in the MAX_ACCOUNT_AGE_DAYS days before the end date
+
+
+# helper utilities
+def rand_dates(start, end, n):
+    """n uniform datetimes in [start, end) — prefer TemporalSampler for arrays"""
+    return list(TemporalSampler(start, end).sample(n).astype(object))
+
+def weighted_choice(choices, weights):
+    return random.choices(choices, weights=weights, k=1)[0]
+
+
+@timed('players')
+def generate_players(n, end=None, rng=None):
+    """n player profiles registered up to MAX_ACCOUNT_AGE_DAYS before `end` (default: now).
+
+    `rng` (a random.Random, default the seeded module RNG) draws registration days, countries and sources.
+    """
+    rng = rng or random
+    end = end or datetime.now()
+    players = []
+    countries = ['GE','UK','DE','FR','IT','ES','SE','NO']
+    acquisition_sources = ['organic','ad_campaign','affiliate','email']
+    for i in range(n):
+        pid = i + 1
+        reg_days_ago = rng.randint(0, MAX_ACCOUNT_AGE_DAYS)
+        registration_date = (end - timedelta(days=reg_days_ago)).date()
+        vip = int(np.clip(np.round(np.random.exponential(0.4)), 0, 5))
+        country = rng.choice(countries)
+        acquisition = rng.choice(acquisition_sources)
+        # player archetype: casual / regular / whale / bot
+        archetype = weighted_choice(['casual','regular','whale','bot'], [0.55,0.35,0.08,0.02])
+        # social / engagement attributes
+        if archetype == 'whale':
+            friends_count = int(abs(np.random.normal(30, 20)))
+            messages_sent = int(abs(np.random.normal(200, 150)))
+        elif archetype == 'regular':
+            friends_count = int(abs(np.random.normal(10, 8)))
+            messages_sent = int(abs(np.random.normal(40, 60)))
+        elif archetype == 'casual':
+            friends_count = int(abs(np.random.normal(3, 4)))
+            messages_sent = int(abs(np.random.normal(5, 10)))
+        else:  # bot
+            friends_count = int(abs(np.random.normal(0, 1)))
+            messages_sent = int(abs(np.random.normal(0, 1)))
+        players.append({
+            'player_id': pid,
+            'username': f'user_{pid}',
+            'registration_date': registration_date,
+            'country': country,
+            'vip_level': vip if archetype!='casual' else 0,
+            'acquisition': acquisition,
+            'friends_count': friends_count,
+            'messages_sent': messages_sent,
+            'archetype': archetype
+        })
+    return pd.DataFrame(players)
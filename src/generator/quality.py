@@ -0,0 +1,40 @@
+"""
+Data quality variations: extreme outliers and missing values.
+"""
+
+import random
+import numpy as np
+
+from instrumentation import timed
+from .config import OUTLIER_FRACTION, MISSING_FRACTION
+from .ids import ID_COLUMNS
+
+
+@timed('inject_outliers')
+def inject_outliers(bets_df, deposits_df, outlier_frac=OUTLIER_FRACTION):
+    n = int(len(bets_df) * outlier_frac)
+    if n > 0:  # only if we have enough data
+        idx = np.random.choice(bets_df.index, size=max(1,n), replace=False)
+        bets_df.loc[idx, 'bet_amount'] *= np.random.uniform(50, 500, size=len(idx))
+    # deposit outliers
+    m = int(len(deposits_df) * outlier_frac)
+    if m > 0:  # only if we have enough data
+        idxd = np.random.choice(deposits_df.index, size=m, replace=False)
+        deposits_df.loc[idxd, 'amount'] *= np.random.uniform(50, 200, size=m)
+    return bets_df, deposits_df
+
+
+@timed('inject_missingness')
+def inject_missingness(df, fraction=MISSING_FRACTION, skip=tuple(ID_COLUMNS.values())):
+    """Blank random cells; event id columns (`skip`) stay complete so they keep their int64 dtype"""
+    if df.empty:  # skip if dataframe is empty
+        return df
+    df = df.copy()
+    columns = [c for c in df.columns if c not in skip]
+    n = int(len(df) * len(columns) * fraction)
+    if n > 0:  # only if we have enough data
+        for _ in range(n):
+            i = random.choice(columns)
+            ridx = random.choice(df.index)
+            df.at[ridx, i] = None
+    return df
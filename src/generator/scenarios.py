@@ -0,0 +1,94 @@
+"""
+Named what-if scenarios continued from the end state of the simulation.
+
+A Scenario picks a random subset of players and, from the end of the observed
+period, simulates `horizon_days` more days for them with its transformations
+applied: session/bet/deposit rate multipliers, an amount shift and extra
+per-archetype dropout hazard. Branches start from a copy of each chunk's final
+PlayerState inside the same generation job, so only the affected players and
+only the horizon are simulated — nothing is regenerated and discarded.
+
+    scenarios = (
+        Scenario('test_drift', fraction=0.2, session_rate=0.3, deposit_rate=0.2),
+        Scenario('vip_outage', archetypes=('whale',), dropout_hazard={'whale': 0.05}),
+    )
+    run(GeneratorConfig(scenarios=scenarios))   # -> player_features_test_drift, player_features_vip_outage
+"""
+
+from dataclasses import dataclass, field
+from datetime import timedelta
+import numpy as np
+
+from .config import DRIFT_FRACTION
+from .ids import IdAllocator
+from .simulation import Simulation, PlayerState, ARCHETYPES
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """A parameterized change in behaviour applied after the observed period"""
+    name: str
+    fraction: float = 1.0           # share of eligible players affected
+    horizon_days: int = 30
+    session_rate: float = 1.0
+    bet_rate: float = 1.0           # bets per session
+    deposit_rate: float = 1.0
+    amount_shift: float = 1.0       # multiplier on bet and deposit amounts
+    dropout_hazard: dict = field(default_factory=dict)   # archetype -> extra daily decline hazard
+    archetypes: tuple = ()          # eligible archetypes (empty = all)
+
+    def __post_init__(self):
+        if not 0 < self.fraction <= 1 or self.horizon_days < 1:
+            raise ValueError(f"scenario {self.name!r}: fraction must be in (0, 1] and horizon_days >= 1")
+        unknown = (set(self.dropout_hazard) | set(self.archetypes)) - set(ARCHETYPES)
+        if unknown:
+            raise ValueError(f"scenario {self.name!r}: unknown archetypes {sorted(unknown)}")
+
+    def select(self, players_df, seed):
+        """player_ids affected by this scenario (reproducible for a seed)"""
+        eligible = players_df
+        if self.archetypes:
+            eligible = players_df[players_df['archetype'].isin(self.archetypes)]
+        n = int(len(eligible) * self.fraction)
+        rng = np.random.default_rng(seed)
+        return np.sort(rng.choice(eligible['player_id'].to_numpy(), size=n, replace=False))
+
+    def apply(self, state):
+        """Set the state's modifier arrays for every player in it"""
+        state.session_rate[:] = self.session_rate
+        state.bet_rate[:] = self.bet_rate
+        state.deposit_rate[:] = self.deposit_rate
+        state.amount_scale[:] = self.amount_shift
+        hazard = np.array([self.dropout_hazard.get(a, 0.0) for a in ARCHETYPES])
+        state.extra_hazard[:] = hazard[state.archetype]
+        return state
+
+
+def default_scenarios(drift_fraction=DRIFT_FRACTION):
+    """The drift test set: a share of players with sessions x0.3 and deposits x0.2 over the next 30 days"""
+    return (Scenario('test_drift', fraction=drift_fraction, session_rate=0.3, deposit_rate=0.2),)
+
+
+def scenarios_for(config):
+    """The scenarios of a GeneratorConfig (default_scenarios() when it names none)"""
+    if config.scenarios is None:
+        return default_scenarios(config.drift_fraction)
+    return tuple(config.scenarios)
+
+
+def run_scenarios(players_df, state, end, scenarios, affected, spikes=()):
+    """Event frames of each scenario's continuation for the affected players in players_df.
+
+    state is the final PlayerState of the simulation of players_df (None starts
+    the affected players from a fresh state, e.g. with the independent generators);
+    affected maps scenario name -> selected player_ids.
+    """
+    out = {}
+    for scenario in scenarios:
+        mask = players_df['player_id'].isin(affected[scenario.name]).to_numpy()
+        players = players_df[mask]
+        branch = state.subset(mask) if state is not None else PlayerState(players)
+        scenario.apply(branch)
+        horizon_end = end + timedelta(days=scenario.horizon_days)
+        out[scenario.name] = Simulation(players, end, horizon_end, spikes, ids=IdAllocator(), state=branch).run()
+    return out
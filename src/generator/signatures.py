@@ -0,0 +1,132 @@
+"""
+Behavioural signatures that separate scripted play (the `bot` archetype) from people.
+
+Registered as feature-graph nodes (not part of player_features), computed from
+each player's time-sorted event slices in one vectorized pass:
+
+    hour_entropy        entropy of the login hour-of-day histogram, normalized to [0, 1]
+                        (1 = logins spread evenly over all 24 hours)
+    inter_bet_cv        coefficient of variation of the gaps between consecutive bets
+    bet_size_cv         coefficient of variation of bet amounts
+    session_length_cv   coefficient of variation of session lengths
+
+Players with fewer than MIN_EVENTS events behind a signature get NaN.
+
+    sig = signatures_from_frames(players_df, sessions_df, bets_df, reference_time)
+    sig = compute_signatures(players_df, EventStore.open(root), reference_time)   # blocks of players
+    features[~bot_mask(sig)]            # drop bot-like players before training / labelling
+
+The signatures can be joined onto player_features as extra model inputs.
+"""
+
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+
+from event_store import EventStore
+from .feature_graph import FeatureExecutor, register, _float, _segments
+from .config import END_DATE, CHURN_LOOKBACK_DAYS
+
+NS_PER_HOUR = 3600 * 10**9
+MIN_EVENTS = 10             # fewer events -> NaN signature
+BLOCK_PLAYERS = 50_000      # players per executor in compute_signatures (bounds the gathered rows)
+SIGNATURE_COLUMNS = ['hour_entropy', 'inter_bet_cv', 'bet_size_cv', 'session_length_cv']
+# a player is bot-like when every rule holds; the defaults separate the generator's bot archetype
+# (round-the-clock logins, many very short sessions). Bet-size CV is scale-free and does not.
+BOT_RULES = {
+    'hour_entropy': ('>=', 0.85),
+    'session_length_cv': ('>=', 0.9),
+}
+
+
+def _segment_cv(values, seg, n, min_count=MIN_EVENTS):
+    """Per-segment std / mean of the non-NaN values (two-pass, population std)"""
+    keep = ~np.isnan(values)
+    values, seg = values[keep], seg[keep]
+    count = np.bincount(seg, minlength=n)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.bincount(seg, weights=values, minlength=n) / count
+        var = np.bincount(seg, weights=(values - mean[seg]) ** 2, minlength=n) / count
+        cv = np.sqrt(var) / mean
+    return np.where((count >= min_count) & (mean > 0), cv, np.nan)
+
+
+@register('bets.times', deps=('bets.window',), table='bets', window='lookback')
+def _bet_times(ex, window):
+    rows, counts = window
+    return np.asarray(ex.store['bets']['bet_time'][rows]).astype('datetime64[ns]'), _segments(counts)
+
+
+@register('hour_entropy', deps=('sessions.login',))
+def _hour_entropy(ex, login):
+    times, seg = login
+    valid = ~np.isnat(times)
+    hour = (times[valid].view('int64') // NS_PER_HOUR) % 24
+    counts = np.bincount(seg[valid] * 24 + hour, minlength=len(ex) * 24).reshape(len(ex), 24)
+    total = counts.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        p = counts / total[:, None]
+        entropy = -np.where(counts > 0, p * np.log2(p), 0.0).sum(axis=1) / np.log2(24)
+    return np.where(total >= MIN_EVENTS, entropy, np.nan)
+
+
+@register('inter_bet_cv', deps=('bets.times',))
+def _inter_bet_cv(ex, bet_times):
+    # rows are sorted by time within each player (missing times last), so gaps are adjacent differences
+    times, seg = bet_times
+    t = times.view('int64')
+    pair = (seg[1:] == seg[:-1]) & ~np.isnat(times[1:]) & ~np.isnat(times[:-1])
+    gaps = (t[1:][pair] - t[:-1][pair]) / 1e9
+    return _segment_cv(gaps, seg[1:][pair], len(ex), MIN_EVENTS - 1)
+
+
+@register('bet_size_cv', deps=('bets.window',))
+def _bet_size_cv(ex, window):
+    rows, counts = window
+    return _segment_cv(_float(ex.store['bets']['bet_amount'], rows), _segments(counts), len(ex))
+
+
+@register('sessions.minutes', deps=('sessions.window', 'sessions.login'), table='sessions', window='lookback')
+def _session_minutes(ex, window, login):
+    """Length of each windowed session in minutes (NaN when either end is missing)"""
+    rows, _ = window
+    times, _ = login
+    logout = np.asarray(ex.store['sessions']['logout_time'][rows]).astype('datetime64[ns]')
+    minutes = (logout - times).astype('timedelta64[s]').astype(float) / 60
+    minutes[np.isnat(logout) | np.isnat(times)] = np.nan
+    return minutes
+
+
+@register('session_length_cv', deps=('sessions.minutes', 'sessions.login'))
+def _session_length_cv(ex, minutes, login):
+    return _segment_cv(minutes, login[1], len(ex))
+
+
+def compute_signatures(players_df, store, reference_time=END_DATE, lookback_days=CHURN_LOOKBACK_DAYS,
+                       columns=SIGNATURE_COLUMNS, block_players=BLOCK_PLAYERS):
+    """Signatures over the lookback window of an EventStore holding the full history, block by block"""
+    window_start = reference_time - timedelta(days=lookback_days)
+    parts = []
+    for lo in range(0, len(players_df), block_players):
+        ex = FeatureExecutor(players_df.iloc[lo:lo + block_players], store, reference_time, window_start,
+                             lookback_days=lookback_days)
+        parts.append(pd.DataFrame({'player_id': ex.player_ids, **{c: ex.get(c) for c in columns}}))
+    if not parts:
+        return pd.DataFrame(columns=['player_id'] + list(columns))
+    return pd.concat(parts, ignore_index=True)
+
+
+def signatures_from_frames(players_df, sessions_df, bets_df, reference_time=END_DATE,
+                           lookback_days=CHURN_LOOKBACK_DAYS, columns=SIGNATURE_COLUMNS):
+    """compute_signatures for in-memory sessions/bets frames"""
+    store = EventStore.from_frames({'sessions': sessions_df, 'bets': bets_df}, players_df['player_id'].to_numpy())
+    return compute_signatures(players_df, store, reference_time, lookback_days, columns, len(players_df) or 1)
+
+
+def bot_mask(signatures, rules=None):
+    """Boolean array: players whose signatures satisfy every rule (NaN never does)"""
+    mask = np.ones(len(signatures), dtype=bool)
+    for column, (op, threshold) in (rules or BOT_RULES).items():
+        values = signatures[column].to_numpy(dtype=float)
+        mask &= (values >= threshold) if op == '>=' else (values <= threshold)
+    return mask
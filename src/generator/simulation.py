@@ -0,0 +1,319 @@
+"""
+Day-by-day behavioural simulation: all players advance together with array-based state.
+
+Each player carries an engagement level, a balance, a churn state and pending
+bonus redemptions. Every simulated day:
+
+    0. players join on their registration day (or the first simulated day if
+       they registered earlier); nothing happens to them before that
+    1. healthy players may start declining (daily hazard, higher when broke);
+       declining players lose engagement geometrically and churn below CHURN_ENGAGEMENT
+    2. active players deposit (more likely when broke) and withdraw (when flush)
+    3. sessions ~ Poisson(rate * engagement * day intensity); bets are spread over
+       the day's sessions and move the balance
+    4. bonuses are issued (at-risk players are targeted, churned players get
+       win-back offers); redemptions can reactivate declining or churned players
+
+so activity decays for days to weeks before a player goes silent, and churn
+labels carry real temporal structure. Output tables have the same columns as
+the independent generators in events.py.
+
+    frames = simulate(players_df, start, end)    # {'sessions': df, 'bets': df, ...}
+"""
+
+import copy
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+from .events import BONUS_TYPES, GAMES
+from .ids import IdAllocator
+from .temporal import TemporalSampler, UNIFORM_PROFILE, SESSION_PROFILE, BOT_PROFILE
+
+# ---------- CONFIG ----------
+ARCHETYPES = ['casual', 'regular', 'whale', 'bot']
+# per-archetype parameters, in ARCHETYPES order
+PARAMS = {
+    'sessions_per_day': [1 / 7, 5 / 7, 8 / 7, 20 / 7],   # at engagement 1.0
+    'bets_per_session': [3.0, 4.0, 19.0, 15.0],
+    'bet_loc': [5.0, 5.0, 50.0, 0.5],
+    'bet_scale': [10.0, 10.0, 200.0, 0.5],
+    'bet_floor': [0.0, 0.0, 10.0, 0.0],
+    'session_minutes': [30.0, 30.0, 30.0, 5.0],
+    'decline_hazard': [0.0015, 0.001, 0.0008, 0.001],   # daily chance a healthy player starts to decline
+    'deposit_per_day': [0.01, 0.04, 0.17, 0.0],
+    'deposit_when_broke': [0.35, 0.5, 0.7, 0.0],
+    'deposit_loc': [50.0, 50.0, 500.0, 0.0],
+    'deposit_scale': [100.0, 100.0, 1000.0, 0.0],
+    'deposit_floor': [0.0, 0.0, 50.0, 0.0],
+    'withdraw_per_day': [0.02, 0.05, 0.1, 0.0],         # when balance > WITHDRAW_BALANCE
+    'bonus_per_period': [0.05, 0.15, 0.35, 0.0],        # expected bonuses per player over the whole period
+    'bonus_loc': [10.0, 100.0, 100.0, 0.0],
+}
+BROKE_HAZARD_MULTIPLIER = 1.5   # decline hazard multiplier while the balance is exhausted
+DECLINE_RATE = (0.75, 0.92)     # daily engagement retention while declining (uniform range)
+CHURN_ENGAGEMENT = 0.05         # below this a declining player stops playing
+ENGAGEMENT_REVERSION = 0.1      # daily pull of healthy engagement towards the player's target
+ENGAGEMENT_NOISE = 0.03
+WITHDRAW_BALANCE = 200.0
+AT_RISK_BONUS_MULTIPLIER = 5.0  # bonus targeting of declining players
+WINBACK_PER_DAY = 0.003         # daily chance a churned player gets a win-back offer
+REDEEM_PROB = (0.7, 0.3)        # active, churned
+REACTIVATION_PROB = (0.5, 0.25) # on redemption: declining, churned
+MARKETING_OFFER_PROB = 0.05
+# ----------------------------
+
+HEALTHY, DECLINING, CHURNED = 0, 1, 2
+# low-cardinality string columns are collected as int8 codes and decoded once in frames()
+CATEGORIES = {
+    'device_type': ['mobile', 'desktop', 'tablet'],
+    'platform': ['iOS', 'Android', 'Windows', 'macOS'],
+    'game_name': GAMES,
+    'payment_method': ['card', 'paypal', 'crypto', 'bank'],
+    'method': ['bank', 'card'],
+    'bonus_type': BONUS_TYPES + ['marketing_offer'],
+}
+DAY = np.timedelta64(1, 'D')
+MINUTE = np.timedelta64(1, 'm')
+
+
+def _codes(column, n, choices=None):
+    """n uniform draws from CATEGORIES[column] (or the first `choices` of them) as int8 codes"""
+    return np.random.randint(0, choices or len(CATEGORIES[column]), size=n).astype(np.int8)
+
+
+class PlayerState:
+    """Per-player simulation state; one array entry per player"""
+
+    def __init__(self, players_df):
+        n = len(players_df)
+        self.archetype = pd.Categorical(players_df['archetype'], categories=ARCHETYPES).codes.astype(np.int64)
+        self.params = {k: np.asarray(v)[self.archetype] for k, v in PARAMS.items()}
+        self.is_bot = self.archetype == ARCHETYPES.index('bot')
+        self.target = np.random.uniform(0.6, 1.0, size=n)
+        self.engagement = np.clip(self.target + np.random.normal(0, 0.1, size=n), 0.1, 1.0)
+        self.balance = np.zeros(n)
+        self.status = np.full(n, HEALTHY, dtype=np.int8)
+        self.decline_rate = np.ones(n)
+        self.redeem_day = np.full(n, -1, dtype=np.int64)     # days since the epoch, -1 = none pending
+        self.redeem_amount = np.zeros(n)
+        # days since the epoch; Simulation.step sets `registered` for the day being simulated
+        self.registered_day = (pd.to_datetime(players_df['registration_date']).to_numpy()
+                               .astype('datetime64[D]').astype(np.int64))
+        self.registered = np.ones(n, dtype=bool)
+        # scenario modifiers (see scenarios.py)
+        self.session_rate = np.ones(n)
+        self.bet_rate = np.ones(n)
+        self.deposit_rate = np.ones(n)
+        self.amount_scale = np.ones(n)
+        self.extra_hazard = np.zeros(n)
+
+    @property
+    def active(self):
+        return self.registered & (self.status != CHURNED)
+
+    def subset(self, mask):
+        """Copy of the state for the players selected by a boolean mask"""
+        sub = copy.copy(self)
+        for name, value in vars(self).items():
+            if isinstance(value, np.ndarray):
+                setattr(sub, name, value[mask].copy())
+        sub.params = {k: v[mask] for k, v in self.params.items()}
+        return sub
+
+    def counts(self):
+        """Players per status, for reports"""
+        return {name: int((self.status == code).sum())
+                for name, code in (('healthy', HEALTHY), ('declining', DECLINING), ('churned', CHURNED))}
+
+
+class Simulation:
+    """Advances a PlayerState day by day and collects the generated events"""
+
+    def __init__(self, players_df, start, end, spikes=(), ids=None, state=None):
+        self.players_df = players_df
+        # pass the state of an earlier Simulation to continue it (e.g. a scenario branch)
+        self.state = state if state is not None else PlayerState(players_df)
+        self.ids = ids or IdAllocator()
+        self.session_times = TemporalSampler(start, end, SESSION_PROFILE.with_spikes(spikes))
+        self.bot_times = TemporalSampler(start, end, BOT_PROFILE.with_spikes(spikes))
+        self.any_times = TemporalSampler(start, end, UNIFORM_PROFILE.with_spikes(spikes))
+        self.intensity = self.session_times.day_intensity()
+        self.n_days = self.session_times.n_days
+        self.epoch_day = int(self.session_times.first_day.astype(np.int64))
+        self.end = np.datetime64(pd.Timestamp(end).to_pydatetime(), 's')
+        self.events = {t: [] for t in ('sessions', 'bets', 'deposits', 'withdrawals', 'bonuses')}
+
+    # ---------- state transitions ----------
+    def _update_engagement(self):
+        st = self.state
+        n = len(st.status)
+        healthy = (st.status == HEALTHY) & st.registered
+        broke = (st.balance <= 0) & ~st.is_bot
+        hazard = st.params['decline_hazard'] * np.where(broke, BROKE_HAZARD_MULTIPLIER, 1.0) + st.extra_hazard
+        starts = healthy & (np.random.random(n) < hazard)
+        st.status[starts] = DECLINING
+        st.decline_rate[starts] = np.random.uniform(*DECLINE_RATE, size=int(starts.sum()))
+
+        healthy &= ~starts
+        drift = ENGAGEMENT_REVERSION * (st.target - st.engagement) + np.random.normal(0, ENGAGEMENT_NOISE, size=n)
+        st.engagement = np.where(healthy, np.clip(st.engagement + drift, 0.1, 1.0), st.engagement)
+        declining = st.status == DECLINING
+        st.engagement[declining] *= st.decline_rate[declining]
+        st.status[declining & (st.engagement < CHURN_ENGAGEMENT)] = CHURNED
+
+    def _money(self, day):
+        st = self.state
+        n = len(st.status)
+        p = st.params
+        active = st.active & ~st.is_bot
+        broke = st.balance <= 0
+        prob = np.where(broke, p['deposit_when_broke'], p['deposit_per_day']) * st.engagement * st.deposit_rate
+        deposit = active & (np.random.random(n) < prob)
+        idx = np.flatnonzero(deposit)
+        amount = np.round((np.abs(np.random.normal(p['deposit_loc'][idx], p['deposit_scale'][idx]))
+                           + p['deposit_floor'][idx]) * st.amount_scale[idx], 2)
+        st.balance[idx] += amount
+        self._emit('deposits', idx, {
+            'deposit_time': self.any_times.sample_in_days(np.full(len(idx), day)),
+            'amount': amount,
+            'payment_method': _codes('payment_method', len(idx)),
+        }, 'deposit_time')
+
+        flush = active & (st.balance > WITHDRAW_BALANCE) & (np.random.random(n) < p['withdraw_per_day'])
+        idx = np.flatnonzero(flush)
+        amount = np.round(st.balance[idx] * np.random.uniform(0.3, 0.9, size=len(idx)), 2)
+        st.balance[idx] -= amount
+        self._emit('withdrawals', idx, {
+            'withdrawal_time': self.any_times.sample_in_days(np.full(len(idx), day)),
+            'amount': amount,
+            'method': _codes('method', len(idx)),
+        }, 'withdrawal_time')
+
+    def _play(self, day):
+        st = self.state
+        p = st.params
+        can_play = st.active & ((st.balance > 0) | st.is_bot)
+        rate = np.where(can_play, p['sessions_per_day'] * st.session_rate * st.engagement * self.intensity[day], 0.0)
+        n_sessions = np.random.poisson(rate)
+        idx = np.repeat(np.arange(len(n_sessions)), n_sessions)
+        if len(idx) == 0:
+            return
+        bot = st.is_bot[idx]
+        login = np.empty(len(idx), dtype='datetime64[s]')
+        login[~bot] = self.session_times.sample_in_days(np.full(int((~bot).sum()), day))
+        login[bot] = self.bot_times.sample_in_days(np.full(int(bot.sum()), day))
+        length = np.maximum(1, np.random.normal(p['session_minutes'][idx], 20).astype(np.int64))
+        self._emit('sessions', idx, {
+            'login_time': login,
+            'logout_time': login + length * MINUTE,
+            'device_type': _codes('device_type', len(idx)),
+            'platform': _codes('platform', len(idx)),
+            'country': self.players_df['country'].to_numpy()[idx],
+        }, 'login_time')
+
+        # bets land inside one of the player's sessions of the day
+        n_bets = np.random.poisson(p['bets_per_session'] * st.bet_rate * n_sessions)
+        bet_player = np.repeat(np.arange(len(n_bets)), n_bets)
+        first_session = np.concatenate([[0], np.cumsum(n_sessions)[:-1]])
+        session = first_session[bet_player] + (np.random.random(len(bet_player)) * n_sessions[bet_player]).astype(np.int64)
+        in_session = (np.random.random(len(bet_player)) * length[session] * 60).astype(np.int64)
+        bet_time = np.minimum(login[session] + in_session.astype('timedelta64[s]'), self.end - np.timedelta64(1, 's'))
+        amount = ((np.abs(np.random.normal(p['bet_loc'][bet_player], p['bet_scale'][bet_player])) + p['bet_floor'][bet_player])
+                  * st.amount_scale[bet_player])
+        win = np.random.binomial(1, 0.48, size=len(bet_player)).astype(bool)
+        win_amount = np.where(win, amount * np.random.uniform(0.5, 2.0, size=len(bet_player)), 0.0)
+        st.balance += np.bincount(bet_player, weights=win_amount - amount, minlength=len(st.balance))
+        self._emit('bets', bet_player, {
+            'game_name': _codes('game_name', len(bet_player)),
+            'bet_amount': np.round(amount, 2),
+            'win_amount': np.round(win_amount, 2),
+            'bet_time': bet_time,
+        }, 'bet_time')
+
+    def _bonuses(self, day):
+        st = self.state
+        n = len(st.status)
+        p = st.params
+        # redemptions due today credit the balance and may bring players back
+        due = np.flatnonzero(st.redeem_day == self.epoch_day + day)
+        st.balance[due] += st.redeem_amount[due]
+        churned = st.status[due] == CHURNED
+        back_prob = np.where(churned, REACTIVATION_PROB[1], np.where(st.status[due] == DECLINING, REACTIVATION_PROB[0], 0.0))
+        back = due[np.random.random(len(due)) < back_prob]
+        st.status[back] = HEALTHY
+        st.engagement[back] = np.maximum(st.engagement[back], 0.5)
+        st.redeem_day[due] = -1
+
+        prob = p['bonus_per_period'] / max(self.n_days, 1) * np.where(st.status == DECLINING, AT_RISK_BONUS_MULTIPLIER, 1.0)
+        prob = np.where(st.status == CHURNED, np.where(st.is_bot, 0.0, WINBACK_PER_DAY), prob) * st.registered
+        idx = np.flatnonzero(np.random.random(n) < prob)
+        issued = self.any_times.sample_in_days(np.full(len(idx), day))
+        amount = np.round(np.abs(np.random.normal(p['bonus_loc'][idx], 50)), 2)
+        delay = np.random.randint(0, 11, size=len(idx))
+        redeem_prob = np.where(st.status[idx] == CHURNED, REDEEM_PROB[1], REDEEM_PROB[0])
+        redeemed = np.random.random(len(idx)) < redeem_prob
+        st.redeem_day[idx[redeemed]] = self.epoch_day + day + delay[redeemed]
+        st.redeem_amount[idx[redeemed]] = amount[redeemed]
+        redeemed_date = issued + delay * DAY
+        redeemed_date[~redeemed] = np.datetime64('NaT')
+
+        offer = np.random.random(len(idx)) < MARKETING_OFFER_PROB
+        n_offer = int(offer.sum())
+        rows = np.concatenate([idx, idx[offer]])
+        self._emit('bonuses', rows, {
+            'bonus_type': np.concatenate([_codes('bonus_type', len(idx), len(BONUS_TYPES)),
+                                         np.full(n_offer, len(BONUS_TYPES), dtype=np.int8)]),
+            'bonus_amount': np.concatenate([amount, np.zeros(n_offer)]),
+            'issued_date': np.concatenate([issued, issued[offer] + np.random.randint(1, 8, size=n_offer) * DAY]),
+            'redeemed_date': np.concatenate([redeemed_date, np.full(n_offer, np.datetime64('NaT'), dtype='datetime64[s]')]),
+        }, 'issued_date')
+
+    def _emit(self, table, rows, columns, time_column):
+        if len(rows):
+            self.events[table].append((rows, columns, time_column))
+
+    # ---------- driver ----------
+    def step(self, day):
+        self.state.registered = self.state.registered_day <= self.epoch_day + day
+        self._update_engagement()
+        self._money(day)
+        self._play(day)
+        self._bonuses(day)
+
+    def run(self):
+        for day in range(self.n_days):
+            self.step(day)
+        return self.frames()
+
+    def frames(self):
+        """Collected events as DataFrames sorted by (player, time), ids allocated in that order"""
+        layouts = {
+            'sessions': ['session_id', 'player_id', 'login_time', 'logout_time', 'device_type', 'platform', 'country'],
+            'bets': ['bet_id', 'player_id', 'game_name', 'bet_amount', 'win_amount', 'bet_time'],
+            'deposits': ['deposit_id', 'player_id', 'deposit_time', 'amount', 'payment_method'],
+            'withdrawals': ['withdrawal_id', 'player_id', 'withdrawal_time', 'amount', 'method'],
+            'bonuses': ['bonus_id', 'player_id', 'bonus_type', 'bonus_amount', 'issued_date', 'redeemed_date'],
+        }
+        player_ids = self.players_df['player_id'].to_numpy()
+        out = {}
+        for table, columns in layouts.items():
+            parts = self.events[table]
+            if not parts:
+                out[table] = pd.DataFrame(columns=columns)
+                continue
+            rows = np.concatenate([r for r, _, _ in parts])
+            data = {c: np.concatenate([cols[c] for _, cols, _ in parts]) for c in parts[0][1]}
+            order = np.lexsort((data[parts[0][2]], rows))
+            data = {c: np.asarray(CATEGORIES[c], dtype=object)[v[order]] if c in CATEGORIES else v[order]
+                    for c, v in data.items()}
+            data[columns[0]] = self.ids.allocate(table, len(rows))
+            data['player_id'] = player_ids[rows[order]]
+            out[table] = pd.DataFrame(data, columns=columns)
+        return out
+
+
+@timed('simulate')
+def simulate(players_df, start, end, spikes=(), ids=None):
+    """Event tables for players_df from the day-by-day simulation"""
+    return Simulation(players_df, start, end, spikes, ids).run()
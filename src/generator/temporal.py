@@ -0,0 +1,112 @@
+"""
+Vectorized event timestamp sampling with hour-of-day, day-of-week and event-spike seasonality.
+
+    sampler = TemporalSampler(start, end, SESSION_PROFILE.with_spikes(tournaments))
+    login_times = sampler.sample(10_000)      # datetime64[s] array in [start, end)
+
+The period is cut into hourly cells on a whole-day grid; each cell's weight is the product of its
+hour-of-day weight (weekday or weekend table), its day-of-week weight, every
+spike covering it and the fraction of the hour inside [start, end). Sampling
+picks cells from the cumulative weights and a uniform second within the cell,
+so n timestamps cost two random draws each and no Python-level loop.
+sample_in_days() draws within given grid days (used by the day-by-day
+simulation) and day_intensity() exposes the per-day weight.
+"""
+
+from dataclasses import dataclass, replace
+import numpy as np
+import pandas as pd
+
+HOURS_PER_DAY = 24
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = SECONDS_PER_HOUR * HOURS_PER_DAY
+
+
+def hour_weights(evening=1.0, daytime=1.0, night=1.0):
+    """24 hourly weights from band weights: night 0-8, daytime 9-17, evening 18-23"""
+    return (night,) * 9 + (daytime,) * 9 + (evening,) * 6
+
+
+@dataclass(frozen=True)
+class SeasonalityProfile:
+    """Relative event intensity by hour (weekday/weekend), weekday and date range.
+
+    spikes are (start, end, multiplier) periods, e.g. tournaments, whose
+    intensity is multiplied while they run.
+    """
+    weekday_hours: tuple = hour_weights()
+    weekend_hours: tuple = hour_weights()
+    day_of_week: tuple = (1.0,) * 7          # Mon .. Sun
+    spikes: tuple = ()
+
+    def with_spikes(self, spikes):
+        """Copy of this profile with extra (start, end, multiplier) spikes"""
+        return replace(self, spikes=tuple(self.spikes) + tuple(tuple(s) for s in spikes))
+
+
+UNIFORM_PROFILE = SeasonalityProfile()
+# players prefer evenings, weekends spread more into the daytime
+SESSION_PROFILE = SeasonalityProfile(weekday_hours=hour_weights(6, 2, 1), weekend_hours=hour_weights(5, 3, 1))
+# bots play around the clock
+BOT_PROFILE = UNIFORM_PROFILE
+
+
+def _seconds(value):
+    """datetime-like -> int64 seconds since the epoch"""
+    return pd.Timestamp(value).value // 10 ** 9
+
+
+class TemporalSampler:
+    """Draws timestamps in [start, end) following a SeasonalityProfile"""
+
+    def __init__(self, start, end, profile=UNIFORM_PROFILE):
+        self.start, self.end = _seconds(start), _seconds(end)
+        self.profile = profile
+        # grid of whole days; hours outside [start, end) get zero weight
+        first = self.start - self.start % SECONDS_PER_DAY
+        self.n_days = max(0, -(-(self.end - first) // SECONDS_PER_DAY))
+        self.first_day = np.datetime64(int(first), 's').astype('datetime64[D]')
+        cells = first + np.arange(self.n_days * HOURS_PER_DAY, dtype=np.int64) * SECONDS_PER_HOUR
+        self.lo = np.clip(cells, self.start, self.end)
+        self.span = np.clip(cells + SECONDS_PER_HOUR, self.start, self.end) - self.lo
+
+        hour = (cells // SECONDS_PER_HOUR) % HOURS_PER_DAY
+        # 1970-01-01 was a Thursday (weekday 3)
+        dow = (cells // SECONDS_PER_DAY + 3) % 7
+        weekday = np.asarray(profile.weekday_hours, dtype=float)
+        weekend = np.asarray(profile.weekend_hours, dtype=float)
+        weights = np.where(dow >= 5, weekend[hour] / weekend.mean(), weekday[hour] / weekday.mean())
+        weights *= np.asarray(profile.day_of_week, dtype=float)[dow]
+        for spike_start, spike_end, multiplier in profile.spikes:
+            weights[(cells >= _seconds(spike_start)) & (cells < _seconds(spike_end))] *= multiplier
+        self.weights = weights * self.span / SECONDS_PER_HOUR
+        total = self.weights.sum()
+        self.cdf = np.cumsum(self.weights) / total if total > 0 else np.empty(0)
+
+    def day_intensity(self):
+        """Relative activity of each grid day (1.0 = an ordinary full day; spikes raise it)"""
+        return self.weights.reshape(self.n_days, HOURS_PER_DAY).sum(axis=1) / HOURS_PER_DAY
+
+    def sample(self, n, rng=None):
+        """n timestamps as a datetime64[s] array (rng: a Generator or the seeded np.random module)"""
+        rng = np.random if rng is None else rng
+        if n == 0 or len(self.cdf) == 0:
+            return np.full(n, np.datetime64('NaT'), dtype='datetime64[s]')
+        cell = np.minimum(np.searchsorted(self.cdf, rng.random(n), side='right'), len(self.cdf) - 1)
+        return self._at(cell, rng)
+
+    def sample_in_days(self, days, rng=None):
+        """One timestamp per entry of `days` (grid day indexes), hour drawn from that day's profile"""
+        rng = np.random if rng is None else rng
+        days = np.asarray(days, dtype=np.int64)
+        if len(days) == 0:
+            return np.empty(0, dtype='datetime64[s]')
+        daily = self.weights.reshape(self.n_days, HOURS_PER_DAY)
+        cdf = np.cumsum(daily, axis=1)
+        cdf /= np.maximum(cdf[:, -1:], 1e-12)
+        hour = np.minimum((cdf[days] <= rng.random(len(days))[:, None]).sum(axis=1), HOURS_PER_DAY - 1)
+        return self._at(days * HOURS_PER_DAY + hour, rng)
+
+    def _at(self, cell, rng):
+        offset = (rng.random(len(cell)) * self.span[cell]).astype(np.int64)
+        return (self.lo[cell] + offset).astype('datetime64[s]')
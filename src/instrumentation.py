@@ -0,0 +1,251 @@
+"""
+instrumentation.py
+Lightweight timing, row counting and memory sampling for pipeline stages.
+
+    from instrumentation import stage, timed, get_report
+
+    @timed('bets')
+    def generate_bets(...): ...          # rows of the returned DataFrame are counted
+
+    with stage('save_csv') as st:
+        ...
+        st.add_rows(len(df))
+
+    get_report().write_json('run_report.json')
+
+Environment switches:
+    CHURN_PROFILE_DIR   dump a cProfile file per top-level stage (<dir>/<stage>.prof, view with snakeviz)
+    CHURN_TRACE_MEMORY  set to 1 to record the Python-heap peak per stage via tracemalloc (slower)
+
+Memory per stage: heap_peak_mb is the tracemalloc peak while the stage ran
+(nested stages do not hide it from their parent); rss_growth_mb is how much the
+stage raised the process's peak resident memory, and rss_cumulative_peak_mb the
+process-wide peak (ru_maxrss) when the stage ended, which includes everything
+that ran before it.
+
+Every stage also records wall-clock start/end timestamps and the pid, so samples
+from an external profiler (py-spy record --pid <pid> --format raw) can be lined up
+with stages.
+"""
+
+import cProfile
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+
+def peak_rss_mb():
+    """Process-wide peak resident memory in MB (None where unsupported)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def count_rows(result):
+    """Rows in a stage result: DataFrames, or tuples/lists of them"""
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return len(result)
+    if isinstance(result, (tuple, list)) and any(isinstance(r, (pd.DataFrame, pd.Series)) for r in result):
+        return sum(len(r) for r in result if isinstance(r, (pd.DataFrame, pd.Series)))
+    return None
+
+
+class Stage:
+    """Handle yielded by RunReport.stage for adding row counts"""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+
+    def add_rows(self, n):
+        self.rows += int(n)
+
+
+class RunReport:
+    """Collects per-stage timings for one pipeline run"""
+
+    def __init__(self, name='run', profile_dir=None, trace_memory=None):
+        self.name = name
+        self.profile_dir = profile_dir if profile_dir is not None else os.getenv('CHURN_PROFILE_DIR')
+        if trace_memory is None:
+            trace_memory = os.getenv('CHURN_TRACE_MEMORY', '0') == '1'
+        self.trace_memory = trace_memory
+        self.started_at = datetime.now()
+        self.stages = {}
+        self.events = []
+        self._depth = 0
+        self._heap_peaks = []       # per open stage: heap peak seen before its current child (bytes)
+        self.meta = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block; repeated stages with the same name are aggregated"""
+        st = Stage(name)
+        # only one profiler can be active per thread, so nested stages are covered by their parent
+        profiler = cProfile.Profile() if self.profile_dir and self._depth == 0 else None
+        if self.trace_memory:
+            self._enter_heap()
+        start_rss = peak_rss_mb()
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        start_ts = time.time()
+        self._depth += 1
+        self._entry(name, self._depth)
+        if profiler:
+            profiler.enable()
+        try:
+            yield st
+        finally:
+            if profiler:
+                profiler.disable()
+            wall = time.perf_counter() - start_wall
+            cpu = time.process_time() - start_cpu
+            heap_peak = self._exit_heap() / 2 ** 20 if self.trace_memory else None
+            rss = peak_rss_mb()
+            rss_growth = round(rss - start_rss, 1) if rss is not None else None
+            self._record(st, wall, cpu, heap_peak, rss, rss_growth, start_ts)
+            self._depth -= 1
+            if profiler:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                calls = self.stages[name]['calls']
+                suffix = '' if calls == 1 else f".{calls}"
+                profiler.dump_stats(os.path.join(self.profile_dir, f"{name}{suffix}.prof"))
+
+    def _enter_heap(self):
+        # reset_peak is global: fold the peak so far into the parent before this stage resets it
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self._heap_peaks:
+            self._heap_peaks[-1] = max(self._heap_peaks[-1], tracemalloc.get_traced_memory()[1])
+        self._heap_peaks.append(0)
+        tracemalloc.reset_peak()
+
+    def _exit_heap(self):
+        """Heap peak of the stage being left, including its children; carried over to the parent"""
+        peak = max(self._heap_peaks.pop(), tracemalloc.get_traced_memory()[1])
+        if self._heap_peaks:
+            self._heap_peaks[-1] = max(self._heap_peaks[-1], peak)
+        return peak
+
+    def _entry(self, name, depth):
+        """Aggregate for `name`, created on first entry so parents list before children"""
+        return self.stages.setdefault(name, {
+            'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'rows': 0,
+            'heap_peak_mb': None, 'rss_growth_mb': None, 'rss_cumulative_peak_mb': None, 'depth': depth,
+        })
+
+    def _record(self, st, wall, cpu, heap_peak, rss, rss_growth, start_ts):
+        agg = self._entry(st.name, self._depth)
+        agg['calls'] += 1
+        agg['wall_s'] = round(agg['wall_s'] + wall, 4)
+        agg['cpu_s'] = round(agg['cpu_s'] + cpu, 4)
+        agg['rows'] += st.rows
+        agg['rows_per_s'] = round(agg['rows'] / agg['wall_s'], 1) if agg['wall_s'] > 0 else None
+        if heap_peak is not None:
+            agg['heap_peak_mb'] = round(max(agg['heap_peak_mb'] or 0.0, heap_peak), 1)
+        if rss_growth is not None:
+            agg['rss_growth_mb'] = max(agg['rss_growth_mb'] or 0.0, rss_growth)
+        agg['rss_cumulative_peak_mb'] = rss
+        self.events.append({'stage': st.name, 'start': round(start_ts, 3), 'end': round(start_ts + wall, 3)})
+
+    def absorb(self, stages):
+        """Fold stage totals recorded in another process into this report.
+
+        Times from parallel workers are summed, so they can exceed the wall time
+        of the enclosing stage.
+        """
+        for name, s in stages.items():
+            agg = self._entry(name, self._depth + s['depth'])
+            agg['calls'] += s['calls']
+            agg['wall_s'] = round(agg['wall_s'] + s['wall_s'], 4)
+            agg['cpu_s'] = round(agg['cpu_s'] + s['cpu_s'], 4)
+            agg['rows'] += s['rows']
+            agg['rows_per_s'] = round(agg['rows'] / agg['wall_s'], 1) if agg['wall_s'] > 0 else None
+            for key in ('heap_peak_mb', 'rss_growth_mb', 'rss_cumulative_peak_mb'):
+                if s.get(key) is not None:
+                    agg[key] = max(agg[key] or 0.0, s[key])
+
+    def timed(self, name=None):
+        """Decorator form of stage(); counts rows of DataFrame results"""
+        def decorator(func):
+            stage_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(stage_name) as st:
+                    result = func(*args, **kwargs)
+                    rows = count_rows(result)
+                    if rows is not None:
+                        st.add_rows(rows)
+                    return result
+            return wrapper
+        return decorator
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'started_at': self.started_at.isoformat(),
+            'pid': os.getpid(),
+            'total_wall_s': round(sum(s['wall_s'] for s in self.stages.values() if s['depth'] == 1), 4),
+            'rss_peak_mb': peak_rss_mb(),
+            'meta': self.meta,
+            'stages': self.stages,
+            'events': self.events,
+        }
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+
+    def summary(self):
+        """Human-readable table of stages"""
+        lines = [f"{'stage':<28}{'calls':>6}{'wall_s':>10}{'cpu_s':>10}{'rows':>12}{'+rss_mb':>10}"]
+        for name, s in self.stages.items():
+            label = '  ' * (s['depth'] - 1) + name
+            lines.append(f"{label:<28}{s['calls']:>6}{s['wall_s']:>10.3f}{s['cpu_s']:>10.3f}{s['rows']:>12}"
+                         f"{str(s['rss_growth_mb']):>10}")
+        return '\n'.join(lines)
+
+
+# ---------- module-level report used by stage()/timed() ----------
+_report = RunReport()
+
+
+def get_report():
+    return _report
+
+
+def set_report(report):
+    """Install a new current report (returns the previous one)"""
+    global _report
+    previous, _report = _report, report
+    return previous
+
+
+def stage(name):
+    return _report.stage(name)
+
+
+def timed(name=None):
+    """Decorator timing calls against whichever report is current at call time"""
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return _report.timed(stage_name)(func)(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,127 @@
+"""
+loader.py
+Bulk loads generator output (DataFrames or the generated CSVs) into the database tables.
+
+Generator columns are mapped onto the ORM schema in models/models.py (integer
+event ids become the primary keys), rows that violate NOT NULL constraints
+(e.g. after inject_missingness) are dropped, and rows are inserted in chunks
+with executemany.
+
+Usage:
+    python loader.py <csv_dir> [database_url]
+"""
+
+import os
+import sys
+import pandas as pd
+from sqlalchemy import create_engine, insert
+
+from models.models import Base, Player, Session, Bet, Deposit, Withdrawal, Bonus
+
+CHUNK_SIZE = 10_000
+
+# table -> (model, {generator column: table column})
+TABLE_MAPPINGS = {
+    'players': (Player, {
+        'player_id': 'player_id', 'registration_date': 'registration_date',
+        'country': 'country', 'vip_level': 'vip_level',
+    }),
+    'sessions': (Session, {
+        'session_id': 'id', 'player_id': 'player_id', 'login_time': 'session_start', 'logout_time': 'session_end',
+        'device_type': 'platform', 'platform': 'os_family', 'country': 'country',
+    }),
+    'bets': (Bet, {
+        'bet_id': 'id', 'player_id': 'player_id', 'game_name': 'game_name', 'bet_amount': 'bet_amount',
+        'win_amount': 'win_amount', 'bet_time': 'bet_timestamp',
+    }),
+    'deposits': (Deposit, {
+        'deposit_id': 'id', 'player_id': 'player_id', 'amount': 'amount', 'payment_method': 'payment_method',
+        'deposit_time': 'deposit_timestamp',
+    }),
+    'withdrawals': (Withdrawal, {
+        'withdrawal_id': 'id', 'player_id': 'player_id', 'amount': 'amount', 'method': 'payment_method',
+        'withdrawal_time': 'withdrawal_timestamp',
+    }),
+    'bonuses': (Bonus, {
+        'bonus_id': 'id', 'player_id': 'player_id', 'bonus_type': 'bonus_type', 'bonus_amount': 'bonus_amount',
+        'issued_date': 'bonus_timestamp', 'redeemed_date': 'redeemed_at',
+    }),
+}
+
+DATE_COLUMNS = {
+    'players': ['registration_date'],
+    'sessions': ['login_time', 'logout_time'],
+    'bets': ['bet_time'],
+    'deposits': ['deposit_time'],
+    'withdrawals': ['withdrawal_time'],
+    'bonuses': ['issued_date', 'redeemed_date'],
+}
+
+
+def to_table_frame(table, df):
+    """Rename/derive generator columns to match `table`; drops rows the table would reject"""
+    model, mapping = TABLE_MAPPINGS[table]
+    df = df[[c for c in mapping if c in df.columns]].rename(columns=mapping)
+    for col in DATE_COLUMNS[table]:
+        target = mapping[col]
+        if target in df.columns:
+            df[target] = pd.to_datetime(df[target], errors='coerce')
+    if table == 'sessions':
+        df['session_length_minutes'] = (df['session_end'] - df['session_start']).dt.total_seconds() / 60
+    elif table == 'bets':
+        df['game_category'] = df['game_name']
+    elif table == 'bonuses':
+        df['is_redeemed'] = df['redeemed_at'].notna()
+
+    if 'id' in df.columns and not pd.api.types.is_numeric_dtype(df['id']):
+        # UUID event ids (--uuid-ids) cannot key Integer tables; let the database number the rows
+        df = df.drop(columns='id')
+
+    required = [c.name for c in model.__table__.columns
+                if not c.nullable and c.name in df.columns]
+    df = df.dropna(subset=['player_id'] + required)
+    # ids come back as floats once missing values were injected
+    df['player_id'] = df['player_id'].astype('int64').astype(str)
+    if 'id' in df.columns:
+        df['id'] = df['id'].astype('int64')
+    return df
+
+
+def _records(df):
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+def bulk_load(engine, frames, chunk_size=CHUNK_SIZE, create=True):
+    """Insert generator DataFrames (dict of table -> df) in FK order; returns rows loaded per table"""
+    if create:
+        Base.metadata.create_all(bind=engine)
+    loaded = {}
+    with engine.begin() as conn:
+        for table, (model, _) in TABLE_MAPPINGS.items():
+            if table not in frames or frames[table] is None or frames[table].empty:
+                continue
+            df = to_table_frame(table, frames[table])
+            for start in range(0, len(df), chunk_size):
+                conn.execute(insert(model.__table__), _records(df.iloc[start:start + chunk_size]))
+            loaded[table] = len(df)
+    return loaded
+
+
+def load_csv_dir(engine, path, chunk_size=CHUNK_SIZE):
+    """Load whichever generator CSVs exist in `path`"""
+    frames = {}
+    for table in TABLE_MAPPINGS:
+        csv = os.path.join(path, f"{table}.csv")
+        if os.path.exists(csv):
+            frames[table] = pd.read_csv(csv)
+    return bulk_load(engine, frames, chunk_size=chunk_size)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python loader.py <csv_dir> [database_url]")
+        sys.exit(1)
+    url = sys.argv[2] if len(sys.argv) > 2 else os.getenv("DATABASE_URL", "sqlite:///churn.db")
+    counts = load_csv_dir(create_engine(url), sys.argv[1])
+    for table, n in counts.items():
+        print(f"{table}: {n} rows")
@@ -0,0 +1,284 @@
+"""
+model_registry.py
+File-backed model registry and the hot-swappable model used by the scoring service.
+
+Each version is an immutable directory; CURRENT names the active one:
+
+    <root>/
+        CURRENT                         version id (replaced atomically on activate)
+        <version>/meta.json             feature names, created_at, model class
+        <version>/model.joblib          the fitted estimator (uncompressed, so arrays can be memory-mapped)
+        <version>/preprocessing.joblib  optional transformer applied before the model (e.g. a StandardScaler)
+        <version>/metrics.json          optional ModelMetrics (models/schemas.py), e.g. from evaluation.py
+
+    registry = ModelRegistry('model_registry')
+    version = registry.register(model, feature_names, preprocessing=scaler, metrics=metrics, activate=True)
+
+    live = LiveModel(registry)          # loads CURRENT
+    model = live.get()                  # take one reference per request ...
+    model.predict_proba(X)              # ... and use it for the whole request
+    live.swap('20250101-120000-ab12cd') # load first, then switch the reference
+    live.watch()                        # or follow CURRENT from a background thread
+
+Versions are written to a temporary directory and renamed into place, so a
+reader never sees a partial version. Artifacts are loaded with
+joblib.load(mmap_mode='r'): large NumPy arrays inside them are mapped from the
+page cache instead of read and copied. Loaded versions are cached in-process,
+so swapping back to a recent version is instant.
+
+A swap only replaces the LiveModel's reference once the new version is fully
+loaded; requests holding the previous LoadedModel finish with it, and nothing
+waits on a lock while a version loads.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from models.schemas import ModelMetrics
+
+# ---------- CONFIG ----------
+REGISTRY_DIR = os.getenv('MODEL_REGISTRY_DIR', 'model_registry')
+CURRENT_FILE = 'CURRENT'
+META_FILE = 'meta.json'
+MODEL_FILE = 'model.joblib'
+PREPROCESSING_FILE = 'preprocessing.joblib'
+METRICS_FILE = 'metrics.json'
+WATCH_INTERVAL = 5.0        # seconds between CURRENT checks in LiveModel.watch()
+TMP_PREFIX = '.tmp-'
+# ----------------------------
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    """One registry version, ready to score"""
+    version: str
+    model: object
+    feature_names: tuple
+    preprocessing: object = None
+    metrics: ModelMetrics = None
+    loaded_at: datetime = None
+
+    def predict_proba(self, X):
+        """Churn probability per row of X (columns in feature_names order)"""
+        X = np.asarray(X, dtype=np.float64)
+        if self.preprocessing is not None:
+            X = self.preprocessing.transform(_with_names(self.preprocessing, X))
+        if hasattr(self.model, 'predict_proba'):
+            return self.model.predict_proba(_with_names(self.model, X))[:, list(self.model.classes_).index(1)]
+        return np.asarray(self.model.predict(X), dtype=np.float64)     # lightgbm.Booster: probabilities
+
+    def matrix(self, df):
+        """Feature matrix of a player_features frame, in the model's column order"""
+        return df[list(self.feature_names)].to_numpy(dtype=np.float64)
+
+
+def _with_names(estimator, X):
+    """X as a DataFrame when the estimator was fitted on one (sklearn warns about bare arrays otherwise)"""
+    names = getattr(estimator, 'feature_names_in_', None)
+    return pd.DataFrame(np.asarray(X), columns=names) if names is not None else X
+
+
+def _write_atomic(path, text):
+    fd, tmp = tempfile.mkstemp(prefix=TMP_PREFIX, dir=os.path.dirname(path))
+    with os.fdopen(fd, 'w') as f:
+        f.write(text)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+class ModelRegistry:
+    """Directory of immutable model versions plus the CURRENT pointer"""
+
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = os.path.expanduser(root)
+        os.makedirs(self.root, exist_ok=True)
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def path(self, version):
+        return os.path.join(self.root, version)
+
+    def versions(self):
+        """Registered versions, oldest first"""
+        out = []
+        for name in os.listdir(self.root):
+            meta = os.path.join(self.root, name, META_FILE)
+            if not name.startswith(TMP_PREFIX) and os.path.exists(meta):
+                with open(meta) as f:
+                    out.append((json.load(f)['created_at'], name))
+        return [name for _, name in sorted(out)]
+
+    def register(self, model, feature_names, preprocessing=None, metrics=None, version=None, activate=False):
+        """Store a fitted model (and its preprocessing/metrics) as a new version; returns the version id"""
+        created_at = datetime.now()
+        feature_names = [str(c) for c in feature_names]
+        if version is None:
+            digest = hashlib.sha256(f"{created_at.isoformat()}|{os.getpid()}|{','.join(feature_names)}".encode())
+            version = f"{created_at:%Y%m%d-%H%M%S}-{digest.hexdigest()[:6]}"
+        if os.path.exists(self.path(version)):
+            raise ValueError(f"model version {version!r} already exists")
+        tmp = tempfile.mkdtemp(prefix=TMP_PREFIX, dir=self.root)
+        try:
+            joblib.dump(model, os.path.join(tmp, MODEL_FILE))
+            if preprocessing is not None:
+                joblib.dump(preprocessing, os.path.join(tmp, PREPROCESSING_FILE))
+            if metrics is not None:
+                metrics = metrics if isinstance(metrics, ModelMetrics) else ModelMetrics(**metrics)
+                metrics = metrics.model_copy(update={'model_version': version})
+                with open(os.path.join(tmp, METRICS_FILE), 'w') as f:
+                    f.write(metrics.model_dump_json())
+            with open(os.path.join(tmp, META_FILE), 'w') as f:
+                json.dump({'version': version, 'created_at': created_at.isoformat(), 'feature_names': feature_names,
+                           'model_class': f"{type(model).__module__}.{type(model).__name__}"}, f)
+            os.chmod(tmp, 0o755)
+            os.rename(tmp, self.path(version))
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version):
+        """Point CURRENT at `version`"""
+        if not os.path.exists(os.path.join(self.path(version), META_FILE)):
+            raise KeyError(f"unknown model version {version!r}")
+        _write_atomic(os.path.join(self.root, CURRENT_FILE), version)
+
+    def current_version(self):
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def feature_names(self, version):
+        """Model input columns of a version, from its meta.json (the model itself is not loaded)"""
+        try:
+            with open(os.path.join(self.path(version), META_FILE)) as f:
+                return json.load(f)['feature_names']
+        except FileNotFoundError:
+            raise KeyError(f"unknown model version {version!r}")
+
+    def metrics(self, version):
+        """ModelMetrics of a version (None if it has none)"""
+        path = os.path.join(self.path(version), METRICS_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return ModelMetrics.model_validate_json(f.read())
+
+    def metrics_history(self):
+        """ModelMetrics of every version that has them, oldest first"""
+        return [m for m in (self.metrics(v) for v in self.versions()) if m is not None]
+
+    def load(self, version=None, mmap=True):
+        """LoadedModel for `version` (default CURRENT), cached in-process since versions never change"""
+        version = version or self.current_version()
+        if version is None:
+            raise KeyError("no model version is active")
+        with self._lock:
+            cached = self._cache.get(version)
+        if cached is not None:
+            return cached
+        path = self.path(version)
+        if not os.path.exists(os.path.join(path, META_FILE)):
+            raise KeyError(f"unknown model version {version!r}")
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        mmap_mode = 'r' if mmap else None
+        preprocessing = os.path.join(path, PREPROCESSING_FILE)
+        loaded = LoadedModel(
+            version=version,
+            model=joblib.load(os.path.join(path, MODEL_FILE), mmap_mode=mmap_mode),
+            feature_names=tuple(meta['feature_names']),
+            preprocessing=joblib.load(preprocessing, mmap_mode=mmap_mode) if os.path.exists(preprocessing) else None,
+            metrics=self.metrics(version),
+            loaded_at=datetime.now(),
+        )
+        with self._lock:
+            return self._cache.setdefault(version, loaded)
+
+    def evict(self, keep=()):
+        """Drop cached versions except `keep` (their memory is freed once no request holds them)"""
+        with self._lock:
+            for version in list(self._cache):
+                if version not in keep:
+                    del self._cache[version]
+
+    def delete(self, version):
+        if version == self.current_version():
+            raise ValueError(f"cannot delete the active model version {version!r}")
+        self.evict(keep=[v for v in self._cache if v != version])
+        shutil.rmtree(self.path(version))
+
+
+class LiveModel:
+    """The version a service scores with; swap() replaces it atomically"""
+
+    def __init__(self, registry, version=None):
+        self.registry = registry
+        self._model = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if version or registry.current_version():
+            self.swap(version)
+
+    def get(self):
+        """Current LoadedModel (None before the first version is activated)"""
+        return self._model
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    def swap(self, version=None):
+        """Load `version` (default CURRENT) and make it the live model; returns it"""
+        model = self.registry.load(version)      # loaded before the switch, outside the lock
+        with self._lock:
+            previous, self._model = self._model, model
+        if previous is not None and previous.version != model.version:
+            # keep the previous version cached for a quick rollback, drop older ones
+            self.registry.evict(keep=(model.version, previous.version))
+        return model
+
+    def refresh(self):
+        """Swap to CURRENT if it changed; returns True when a swap happened"""
+        version = self.registry.current_version()
+        if version is None or (self._model is not None and self._model.version == version):
+            return False
+        self.swap(version)
+        return True
+
+    def watch(self, interval=WATCH_INTERVAL):
+        """Follow CURRENT from a daemon thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:      # keep serving the loaded version
+                    print(f"[model_registry] refresh failed: {e}")
+
+        self._thread = threading.Thread(target=loop, name='model-watch', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
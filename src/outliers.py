@@ -0,0 +1,224 @@
+"""
+outliers.py
+Streaming robust outlier detection and winsorizing for bet and deposit amounts.
+
+Amounts are compared with the median and MAD (median absolute deviation) of
+their player segment (archetype or VIP level), on a log1p scale. Both
+statistics come from one DDSketch per table, so a segment's state is a few
+hundred bucket counts however many events pass through, and sketches built on
+separate shards merge. A value is flagged when
+
+    log1p(amount) > median + MAD_THRESHOLD * 1.4826 * MAD        (a robust z-score above the threshold)
+
+and capped to that limit. Only large amounts are capped: small bets are common,
+never anomalous. Segments with fewer than MIN_SEGMENT_ROWS values use the
+limit of all events of the table instead.
+
+    capper = OutlierCapper(players_df, segment='archetype')
+    for chunk in chunks:                         # one pass: fit on what has been seen so far, then cap
+        chunk = capper.process('bets', chunk)
+    capper.report()                              # rows, flagged, fraction and amount removed per table
+
+    capper.update('bets', history)               # or fit first (e.g. on training data) ...
+    capped = capper.transform('bets', new_bets)  # ... and cap later batches with fixed limits
+    capper.save('outlier_limits.json')
+
+Usage:
+    python outliers.py <players.csv> <csv_dir> [out_dir]   # fit on <csv_dir>, write capped CSVs to out_dir
+"""
+
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+from sketches import DDSketch
+
+# ---------- CONFIG ----------
+AMOUNT_COLUMNS = {'bets': 'bet_amount', 'deposits': 'amount'}
+SEGMENTS = ('archetype', 'vip_level')
+MAD_THRESHOLD = 3.5         # robust (modified) z-score above which an amount is an outlier
+MAD_SCALE = 1.4826          # MAD -> standard deviation for normal data
+MIN_MAD = 0.05              # floor on the log-scale MAD, so near-constant segments are not capped at their median
+MIN_SEGMENT_ROWS = 200      # smaller segments fall back to the table-wide limit
+RELATIVE_ACCURACY = 0.005
+CHUNK_ROWS = 200_000        # rows per chunk when streaming CSVs
+# ----------------------------
+
+
+class OutlierCapper:
+    """Per-segment median/MAD sketches of amount columns, with flagging and capping"""
+
+    def __init__(self, players_df, segment='archetype', columns=None, threshold=MAD_THRESHOLD,
+                 relative_accuracy=RELATIVE_ACCURACY):
+        if segment not in SEGMENTS:
+            raise ValueError(f"segment must be one of {SEGMENTS}, got {segment!r}")
+        self.segment = segment
+        self.columns = dict(columns or AMOUNT_COLUMNS)
+        self.threshold = threshold
+        self.relative_accuracy = relative_accuracy
+        codes, self.segments = pd.factorize(players_df[segment], sort=True)
+        self.player_segment = pd.Series(codes, index=pd.Index(players_df['player_id']))
+        # one group per segment, plus the table-wide group last
+        self.sketches = {t: DDSketch(len(self.segments) + 1, relative_accuracy=relative_accuracy)
+                         for t in self.columns}
+        self.reset_counts()
+
+    def reset_counts(self):
+        self.counts = {t: {'rows': 0, 'flagged': 0, 'amount_removed': 0.0} for t in self.columns}
+
+    def _groups(self, player_ids):
+        """Segment index of each event's player (-1 for players not in players_df)"""
+        return self.player_segment.reindex(pd.Index(player_ids)).fillna(-1).to_numpy(dtype=np.int64)
+
+    def _values(self, table, df):
+        return np.log1p(np.clip(df[self.columns[table]].to_numpy(dtype=np.float64), 0, None))
+
+    def update(self, table, df):
+        """Add a chunk of `table` events to the statistics"""
+        x = self._values(table, df)
+        g = self._groups(df['player_id'])
+        sketch = self.sketches[table]
+        known = g >= 0
+        sketch.add(np.concatenate([x[known], x]),
+                   np.concatenate([g[known], np.full(len(x), len(self.segments), dtype=np.int64)]))
+        return self
+
+    def merge(self, other):
+        """Combine with a capper fitted on another shard (same players and settings)"""
+        if self.segment != other.segment or not self.segments.equals(other.segments):
+            raise ValueError("Cannot merge outlier statistics over different segments")
+        for t in self.columns:
+            self.sketches[t].merge(other.sketches[t])
+        return self
+
+    def _limits(self, table):
+        """(median, mad, upper) on the log scale per group; upper is inf until the group has enough values"""
+        sketch = self.sketches[table]
+        median = sketch.quantile(0.5)
+        mad = np.maximum(sketch.mad(median), MIN_MAD)
+        upper = median + self.threshold * MAD_SCALE * mad
+        n = sketch.count()
+        fallback = upper[-1] if n[-1] >= MIN_SEGMENT_ROWS else np.inf
+        upper = np.where(n >= MIN_SEGMENT_ROWS, upper, fallback)
+        return median, mad, upper
+
+    def limits(self, table):
+        """Per-segment statistics and the amount above which values are capped"""
+        median, mad, upper = self._limits(table)
+        return pd.DataFrame({
+            'segment': list(self.segments) + ['all'],
+            'n': self.sketches[table].count(),
+            'median': np.expm1(median),
+            'mad_log': mad,
+            'cap': np.expm1(upper),
+        })
+
+    def _caps(self, table, df):
+        """Cap (in amount units) applying to each row of df"""
+        _, _, upper = self._limits(table)
+        g = self._groups(df['player_id'])
+        return np.expm1(upper[np.where(g >= 0, g, len(self.segments))])
+
+    def flag(self, table, df):
+        """Boolean mask of the rows of df whose amount is above their segment's cap"""
+        amount = df[self.columns[table]].to_numpy(dtype=np.float64)
+        return np.nan_to_num(amount, nan=-np.inf) > self._caps(table, df)
+
+    def transform(self, table, df, flag_column=None):
+        """Copy of df with outlying amounts capped (optionally with a boolean flag column)"""
+        if table not in self.columns or df.empty:
+            return df
+        column = self.columns[table]
+        cap = self._caps(table, df)
+        amount = df[column].to_numpy(dtype=np.float64)
+        flagged = np.nan_to_num(amount, nan=-np.inf) > cap
+        df = df.copy()
+        df[column] = np.where(flagged, cap, amount)
+        if flag_column:
+            df[flag_column] = flagged
+        counts = self.counts[table]
+        counts['rows'] += len(df)
+        counts['flagged'] += int(flagged.sum())
+        counts['amount_removed'] += float((amount[flagged] - cap[flagged]).sum())
+        return df
+
+    def process(self, table, df, flag_column=None):
+        """Streaming step: add the chunk to the statistics, then cap it"""
+        if table not in self.columns or df.empty:
+            return df
+        return self.update(table, df).transform(table, df, flag_column)
+
+    def report(self):
+        """Rows seen, rows capped and amount removed per table"""
+        rows = [{'table': t, 'column': self.columns[t], **c,
+                 'fraction': c['flagged'] / c['rows'] if c['rows'] else 0.0} for t, c in self.counts.items()]
+        return pd.DataFrame(rows, columns=['table', 'column', 'rows', 'flagged', 'fraction', 'amount_removed'])
+
+    # ---------- persistence ----------
+    def to_dict(self):
+        return {
+            'segment': self.segment, 'columns': self.columns, 'threshold': self.threshold,
+            'relative_accuracy': self.relative_accuracy, 'segments': [str(s) for s in self.segments],
+            'sketches': {t: {'keys': s.keys.tolist(), 'counts': s.counts.tolist()} for t, s in self.sketches.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, d, players_df):
+        capper = cls(players_df, d['segment'], d['columns'], d['threshold'], d['relative_accuracy'])
+        if [str(s) for s in capper.segments] != d['segments']:
+            raise ValueError(f"players_df segments {list(capper.segments)} do not match the saved {d['segments']}")
+        for t, s in d['sketches'].items():
+            capper.sketches[t].keys = np.asarray(s['keys'], dtype=np.int64)
+            capper.sketches[t].counts = np.asarray(s['counts'], dtype=np.int64)
+        return capper
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path, players_df):
+        with open(path) as f:
+            return cls.from_dict(json.load(f), players_df)
+
+
+def cap_frames(players_df, frames, segment='archetype', chunk_rows=CHUNK_ROWS):
+    """Cap bets/deposits of in-memory event frames chunk by chunk; returns (frames, capper)"""
+    capper = OutlierCapper(players_df, segment)
+    out = dict(frames)
+    for table in capper.columns:
+        if table in frames:
+            df = frames[table]
+            parts = [capper.process(table, df.iloc[i:i + chunk_rows]) for i in range(0, len(df), chunk_rows)]
+            out[table] = pd.concat(parts) if parts else df
+    return out, capper
+
+
+def cap_csv(players_path, csv_dir, out_dir, segment='archetype', chunksize=CHUNK_ROWS):
+    """Fit on the CSVs of csv_dir in one streaming pass, then write capped copies to out_dir"""
+    capper = OutlierCapper(pd.read_csv(players_path), segment)
+    paths = {t: os.path.join(csv_dir, f"{t}.csv") for t in capper.columns}
+    paths = {t: p for t, p in paths.items() if os.path.exists(p)}
+    for table, path in paths.items():
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            capper.update(table, chunk)
+    os.makedirs(out_dir, exist_ok=True)
+    for table, path in paths.items():
+        out = os.path.join(out_dir, f"{table}.csv")
+        for i, chunk in enumerate(pd.read_csv(path, chunksize=chunksize)):
+            capper.transform(table, chunk).to_csv(out, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    return capper
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("usage: python outliers.py <players.csv> <csv_dir> [out_dir]")
+        sys.exit(1)
+    out_dir = sys.argv[3] if len(sys.argv) > 3 else os.path.join(sys.argv[2], 'capped')
+    capper = cap_csv(sys.argv[1], sys.argv[2], out_dir)
+    for table in capper.columns:
+        print(f"{table} limits:")
+        print(capper.limits(table).to_string(index=False))
+    print(capper.report().to_string(index=False))
@@ -0,0 +1,179 @@
+"""
+predictions.py
+Churn prediction write-back: append-only history plus the latest score per player.
+
+Scores are no longer written into player_features (one UPDATE per player per
+run, history lost, dead tuples on Postgres). Every run appends its rows to
+`predictions` (models/models.py), which on Postgres is range-partitioned by
+prediction_date into one partition per day, and keeps the narrow
+`latest_predictions` table (one row per player, looked up by primary key) in
+step:
+
+    write_predictions(engine, ids, proba, model_version='20250101-120000-ab12cd', feature_date=date(2025, 1, 1))
+    latest_predictions(engine, ['17', '42'])    # newest score per player
+    prediction_history(engine, '17')            # every score of a player
+    drop_expired(engine, retention_days=180)    # drops whole daily partitions
+
+On Postgres, a missing daily partition is created in the writing transaction
+and rows are streamed in with COPY (psycopg2 or psycopg 3). Retention drops
+whole partitions, so it leaves no dead rows to vacuum. Other databases (SQLite in
+tests) use one plain table, executemany inserts and DELETE for retention.
+
+Usage:
+    python predictions.py write <player_features.csv> [database_url]    # score with the CURRENT model
+    python predictions.py drop [retention_days] [database_url]
+"""
+
+import io
+import os
+import re
+import sys
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, delete, insert, select, text
+
+from models.models import Base, LatestPrediction, Prediction
+from serving import _upsert
+
+# ---------- CONFIG ----------
+CHURN_THRESHOLD = 0.5
+RETENTION_DAYS = 180
+WRITE_CHUNK_SIZE = 50_000       # rows per COPY / executemany
+FETCH_CHUNK_SIZE = 5_000        # ids per query
+# ----------------------------
+
+PREDICTIONS = Prediction.__table__
+LATEST = LatestPrediction.__table__
+COLUMNS = [c.name for c in PREDICTIONS.columns]
+PARTITION_PATTERN = re.compile(r'^predictions_p(\d{8})$')
+
+
+def partition_name(day):
+    return f"predictions_p{day:%Y%m%d}"
+
+
+def create_partitions(conn, days):
+    """Create the daily partitions of `days` that do not exist yet (Postgres only)"""
+    if conn.dialect.name != 'postgresql':
+        return
+    for day in sorted(set(days)):
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {partition_name(day)} PARTITION OF predictions "
+                          f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"))
+
+
+def _copy(conn, frame):
+    """COPY frame into predictions on Postgres, executemany insert elsewhere"""
+    if conn.dialect.name != 'postgresql':
+        conn.execute(insert(PREDICTIONS), frame.to_dict('records'))
+        return
+    buf = io.StringIO()
+    frame.to_csv(buf, index=False, header=False)    # missing values become empty, which COPY reads as NULL
+    sql = f"COPY predictions ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+    cursor = conn.connection.cursor()               # the DBAPI connection of this transaction
+    try:
+        if hasattr(cursor, 'copy_expert'):          # psycopg2
+            buf.seek(0)
+            cursor.copy_expert(sql, buf)
+        else:                                       # psycopg 3
+            with cursor.copy(sql) as copy:
+                copy.write(buf.getvalue())
+    finally:
+        cursor.close()
+
+
+def write_predictions(engine, player_ids, probabilities, model_version, feature_date=None, predicted_at=None,
+                      threshold=CHURN_THRESHOLD, chunk_size=WRITE_CHUNK_SIZE, create=True):
+    """Append one prediction per player and update latest_predictions, in one transaction; returns rows written"""
+    if create:
+        Base.metadata.create_all(bind=engine, tables=[PREDICTIONS, LATEST])
+    predicted_at = predicted_at or datetime.now()
+    probabilities = np.asarray(probabilities, dtype=float)
+    frame = pd.DataFrame({
+        'prediction_date': predicted_at.date(),
+        'player_id': [str(p) for p in player_ids],
+        'predicted_at': predicted_at,
+        'model_version': model_version,
+        'churn_probability': probabilities,
+        'churn_label': probabilities >= threshold,
+        'feature_date': feature_date,
+    }, columns=COLUMNS)
+    latest = [c.name for c in LATEST.columns]
+    with engine.begin() as conn:
+        create_partitions(conn, [predicted_at.date()])
+        for start in range(0, len(frame), chunk_size):
+            block = frame.iloc[start:start + chunk_size]
+            _copy(conn, block)
+            _upsert(conn, LATEST, block[latest].to_dict('records'), 'player_id', newer='predicted_at')
+    return len(frame)
+
+
+def latest_predictions(engine, player_ids):
+    """Newest prediction of each given player that has one, ordered by player_id"""
+    player_ids = [str(p) for p in player_ids]
+    parts = []
+    with engine.connect() as conn:
+        for start in range(0, len(player_ids), FETCH_CHUNK_SIZE):
+            chunk = player_ids[start:start + FETCH_CHUNK_SIZE]
+            parts.append(pd.DataFrame(conn.execute(
+                select(LATEST).where(LATEST.c.player_id.in_(chunk)).order_by(LATEST.c.player_id)).all()))
+    parts = [p for p in parts if len(p)]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=[c.name for c in LATEST.columns])
+
+
+def prediction_history(engine, player_id, since=None):
+    """Every stored prediction of one player, oldest first"""
+    query = select(PREDICTIONS).where(PREDICTIONS.c.player_id == str(player_id))
+    if since is not None:
+        # bounding prediction_date as well lets Postgres skip older partitions
+        since = since.date() if isinstance(since, datetime) else since
+        query = query.where(PREDICTIONS.c.prediction_date >= since)
+    with engine.connect() as conn:
+        rows = conn.execute(query.order_by(PREDICTIONS.c.predicted_at)).all()
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def drop_expired(engine, retention_days=RETENTION_DAYS, today=None):
+    """Remove predictions older than retention_days; returns the days removed.
+
+    Postgres drops whole daily partitions; latest_predictions is not touched.
+    """
+    cutoff = (today or date.today()) - timedelta(days=retention_days)
+    with engine.begin() as conn:
+        if conn.dialect.name == 'postgresql':
+            names = conn.execute(text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = 'predictions'")).scalars().all()
+            days = sorted(datetime.strptime(m.group(1), '%Y%m%d').date()
+                          for m in map(PARTITION_PATTERN.match, names) if m)
+            days = [d for d in days if d < cutoff]
+            for day in days:
+                conn.execute(text(f"DROP TABLE {partition_name(day)}"))
+        else:
+            days = sorted(conn.execute(select(PREDICTIONS.c.prediction_date).distinct()
+                                       .where(PREDICTIONS.c.prediction_date < cutoff)).scalars().all())
+            conn.execute(delete(PREDICTIONS).where(PREDICTIONS.c.prediction_date < cutoff))
+    return days
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ('write', 'drop') or (sys.argv[1] == 'write' and len(sys.argv) < 3):
+        print("usage: python predictions.py write <player_features.csv> [database_url]\n"
+              "       python predictions.py drop [retention_days] [database_url]")
+        sys.exit(1)
+    url = sys.argv[3] if len(sys.argv) > 3 else os.getenv("DATABASE_URL", "sqlite:///churn.db")
+    engine = create_engine(url)
+    if sys.argv[1] == 'write':
+        from model_registry import REGISTRY_DIR, ModelRegistry
+
+        model = ModelRegistry(REGISTRY_DIR).load()
+        features = pd.read_csv(sys.argv[2])
+        feature_date = pd.to_datetime(features['feature_date']).max().date() if 'feature_date' in features else None
+        n = write_predictions(engine, features['player_id'], model.predict_proba(model.matrix(features)),
+                              model.version, feature_date=feature_date)
+        print(f"predictions: {n} rows appended (model {model.version})")
+    else:
+        retention = int(sys.argv[2]) if len(sys.argv) > 2 else RETENTION_DAYS
+        days = drop_expired(engine, retention)
+        print(f"predictions: dropped {len(days)} day(s) older than {retention} days")
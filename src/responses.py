@@ -0,0 +1,227 @@
+"""
+responses.py
+Fast encodings of batch prediction responses, and a cache of scored batches.
+
+FastAPI's default path builds one PredictionResponse per player, validates it
+and serializes it through jsonable_encoder, which dominates the time of a large
+/predict/batch. Here the response body is built straight from the id and
+probability arrays:
+
+    body, media_type = encode_batch(ids, proba, feature_date, predicted_at, seconds, fmt='arrow')
+    body, encoding = compress(body, request.headers.get('accept-encoding'))
+
+- json: the BatchPredictionResponse layout, encoded with orjson (stdlib json
+  when orjson is not installed).
+- arrow: one Arrow IPC stream record batch with columns player_id,
+  churn_probability, churn_label, confidence_score, feature_date and
+  predicted_at, for bulk consumers that read it with pyarrow/pandas/polars
+  without parsing.
+
+compress negotiates zstd (when the optional zstandard package is installed)
+or gzip from Accept-Encoding, and leaves small bodies alone.
+
+BatchCache keeps the scores of the stored feature vectors for the live model
+version until the vectors are refreshed, so repeated pulls of the same daily
+batch (CRM exports) only score players they have not seen yet; ids without a
+vector are remembered too, so they are not looked up again before the next
+refresh. The cache holds at most MAX_CACHED_PLAYERS ids and evicts the least
+recently used. Responses carry each vector's own feature_date.
+"""
+
+import gzip
+import json
+import threading
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# ---------- CONFIG ----------
+JSON_MEDIA_TYPE = 'application/json'
+ARROW_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+MIN_COMPRESS_BYTES = 1024       # smaller bodies are sent as they are
+GZIP_LEVEL = 5
+ZSTD_LEVEL = 3
+CHURN_THRESHOLD = 0.5
+MAX_CACHED_PLAYERS = 1_000_000  # BatchCache entries (scores and known-absent ids), least recently used go first
+# ----------------------------
+
+
+def _labels(proba, threshold):
+    return proba >= threshold, np.abs(proba - 0.5) * 2
+
+
+def _per_row(value, n):
+    """A date/datetime repeated n times, or the given per-row sequence"""
+    return [value] * n if isinstance(value, date) else list(value)
+
+
+def encode_json(ids, proba, feature_date, predicted_at, seconds, threshold=CHURN_THRESHOLD):
+    """BatchPredictionResponse JSON bytes, without building PredictionResponse objects.
+
+    feature_date and predicted_at are single values or one per row (cached rows keep the time they were scored).
+    """
+    proba = np.asarray(proba, dtype=np.float64)
+    labels, confidence = _labels(proba, threshold)
+    feature_date, predicted_at = _per_row(feature_date, len(proba)), _per_row(predicted_at, len(proba))
+    # formatted once per distinct value, not per row
+    iso = {t: t.isoformat() for t in set(predicted_at) | set(feature_date)}
+    predictions = [{'player_id': pid, 'churn_probability': p, 'churn_label': label, 'confidence_score': c,
+                    'feature_date': iso[d], 'predicted_at': iso[t]}
+                   for pid, p, label, c, d, t in zip(ids, proba.tolist(), labels.tolist(), confidence.tolist(),
+                                                     feature_date, predicted_at)]
+    body = {'predictions': predictions, 'total_processed': len(predictions), 'processing_time_seconds': seconds}
+    if orjson is not None:
+        return orjson.dumps(body)
+    return json.dumps(body, separators=(',', ':')).encode()
+
+
+def encode_arrow(ids, proba, feature_date, predicted_at, seconds, threshold=CHURN_THRESHOLD):
+    """Arrow IPC stream of one columnar record batch"""
+    if pyarrow is None:
+        raise ValueError("the arrow format needs pyarrow")
+    proba = np.asarray(proba, dtype=np.float64)
+    labels, confidence = _labels(proba, threshold)
+    timestamp = pyarrow.timestamp('us')
+    batch = pyarrow.record_batch(
+        [pyarrow.array(list(ids), type=pyarrow.string()), pyarrow.array(proba), pyarrow.array(labels),
+         pyarrow.array(confidence), pyarrow.array(_per_row(feature_date, len(proba)), type=pyarrow.date32()),
+         pyarrow.array(_per_row(predicted_at, len(proba)), type=timestamp)],
+        schema=pyarrow.schema([('player_id', pyarrow.string()), ('churn_probability', pyarrow.float64()),
+                               ('churn_label', pyarrow.bool_()), ('confidence_score', pyarrow.float64()),
+                               ('feature_date', pyarrow.date32()), ('predicted_at', timestamp)],
+                              metadata={'processing_time_seconds': repr(seconds)}))
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+FORMATS = {'json': (encode_json, JSON_MEDIA_TYPE), 'arrow': (encode_arrow, ARROW_MEDIA_TYPE)}
+
+
+def negotiate_format(accept):
+    """'arrow' when the Accept header asks for Arrow IPC, else 'json'"""
+    return 'arrow' if accept and ARROW_MEDIA_TYPE in accept and pyarrow is not None else 'json'
+
+
+def encode_batch(ids, proba, feature_date, predicted_at, seconds, fmt='json', threshold=CHURN_THRESHOLD):
+    """(body, media type) of a batch response in `fmt`"""
+    encode, media_type = FORMATS[fmt]
+    return encode(ids, proba, feature_date, predicted_at, seconds, threshold), media_type
+
+
+def _accepted(accept_encoding):
+    """Codings with a non-zero q value in an Accept-Encoding header"""
+    out = set()
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        params = params.strip()
+        try:
+            q = float(params[2:]) if params.startswith('q=') else 1.0
+        except ValueError:
+            q = 1.0
+        if coding and q > 0:
+            out.add(coding.strip().lower())
+    return out
+
+
+def compress(body, accept_encoding, min_bytes=MIN_COMPRESS_BYTES):
+    """(body, Content-Encoding or None): zstd if accepted and available, then gzip"""
+    if len(body) < min_bytes:
+        return body, None
+    accepted = _accepted(accept_encoding)
+    if 'zstd' in accepted and zstandard is not None:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body), 'zstd'
+    if 'gzip' in accepted or '*' in accepted:
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), 'gzip'
+    return body, None
+
+
+class BatchCache:
+    """Scores of the stored feature vectors for one model version, valid until the vectors are refreshed.
+
+    stamp is the newest refreshed_at of player_feature_vectors; sync() with a
+    different stamp empties the cache. Ids stored as absent (no vector) are
+    neither returned nor reported missing until then. At most max_entries ids
+    are kept, least recently used evicted first. Thread-safe.
+    """
+
+    def __init__(self, max_entries=MAX_CACHED_PLAYERS):
+        self.stamp = None
+        self.version = None
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # player_id -> (probability, feature_date, predicted_at), None = no vector
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def sync(self, stamp):
+        """Drop everything if the vectors were refreshed since the last sync; returns True when it did"""
+        with self._lock:
+            if stamp == self.stamp:
+                return False
+            self._entries.clear()
+            self.stamp = stamp
+            return True
+
+    def lookup(self, version, player_ids):
+        """(cached ids, probabilities, feature dates, predicted_at values, ids not cached)"""
+        found, missing = [], []
+        with self._lock:
+            entries = self._entries if version == self.version else {}
+            for pid in player_ids:
+                if pid not in entries:
+                    missing.append(pid)
+                    continue
+                self._entries.move_to_end(pid)
+                if entries[pid] is not None:
+                    found.append((pid, entries[pid]))
+            self.hits += len(player_ids) - len(missing)
+            self.misses += len(missing)
+        return ([pid for pid, _ in found], np.array([p for _, (p, _, _) in found], dtype=np.float64),
+                [d for _, (_, d, _) in found], [t for _, (_, _, t) in found], missing)
+
+    def store(self, stamp, version, ids, proba, feature_dates, refreshed_at, predicted_at, absent=()):
+        """Cache scores computed from vectors read under `stamp` (rows refreshed after it are skipped).
+
+        absent are requested ids that had no vector under `stamp`.
+        """
+        with self._lock:
+            if stamp != self.stamp:
+                return          # the vectors were refreshed while these were scored
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+            for pid in absent:
+                self._entries[pid] = None
+                self._entries.move_to_end(pid)
+            for pid, p, d, r in zip(ids, np.asarray(proba, dtype=np.float64).tolist(), feature_dates, refreshed_at):
+                if stamp is None or r <= stamp:
+                    self._entries[pid] = (p, d, predicted_at)
+                    self._entries.move_to_end(pid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.stamp = self.version = None
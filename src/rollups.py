@@ -0,0 +1,277 @@
+"""
+rollups.py
+Per-player daily activity rollups and the features derived from them.
+
+Raw events are folded into one row per (player, day) as they land:
+
+    activity, games = daily_rollup(frames)          # generator event frames -> daily totals
+    apply_rollups(engine, activity, games)           # additive upsert into player_daily_activity
+
+player_daily_activity holds session/bet/deposit/withdrawal/bonus counts and
+sums per day; player_daily_games holds bets per game per day. Counters are
+added on conflict, so each batch of events must be applied exactly once; a
+later batch for the same day simply adds to it.
+
+Features then read about `lookback_days` rows per player instead of every raw
+bet and session:
+
+    features = features_from_db(engine, players_df, reference_time)
+    features = features_from_rollups(players_df, activity, games, reference_time)   # in memory
+
+Columns match generator.make_features. Windows are whole days: with a
+reference_time at midnight the values match the raw-event features; otherwise
+the partial first and last days of the window count in full.
+
+Usage:
+    python rollups.py <csv_dir> [database_url]       # roll up generator CSVs into the database
+"""
+
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import case, create_engine, func, select
+
+from models.models import Base, PlayerDailyActivity, PlayerDailyGame
+from event_store import TIME_COLUMNS
+from generator.feature_graph import FEATURE_COLUMNS, NO_LOGIN_DAYS, TREND_WEEKS, _round
+from generator.config import CHURN_LOOKBACK_DAYS, CHURN_LABEL_THRESHOLD
+
+CHUNK_SIZE = 10_000
+ACTIVITY = PlayerDailyActivity.__table__
+GAMES = PlayerDailyGame.__table__
+KEY = ['player_id', 'day']
+# additive counters of player_daily_activity (last_login is merged with max)
+COUNTERS = [
+    'sessions', 'session_minutes', 'bets', 'bets_with_amount', 'bet_amount', 'win_amount', 'winning_bets', 'ggr',
+    'deposits', 'deposit_amount', 'withdrawals', 'withdrawal_amount', 'bonuses', 'bonuses_redeemed',
+]
+
+
+def _player_key(values):
+    """player_id as stored in the database (see loader.py): integer ids become strings"""
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values):
+        values = values.astype('int64')
+    return values.astype(str)
+
+
+def _daily(df, time_column):
+    """Rows with a player and a timestamp, plus their (player_id, day) key"""
+    df = df[df['player_id'].notna() & df[time_column].notna()]
+    out = pd.DataFrame({'player_id': _player_key(df['player_id']).to_numpy(),
+                        'day': pd.to_datetime(df[time_column]).dt.floor('D').to_numpy()})
+    return df.reset_index(drop=True), out
+
+
+def daily_rollup(frames):
+    """(activity, games) daily totals of generator event frames (table name -> DataFrame)"""
+    parts = []
+    if 'sessions' in frames:
+        df, key = _daily(frames['sessions'], TIME_COLUMNS['sessions'])
+        login = pd.to_datetime(df['login_time'])
+        key['sessions'] = df['session_id'].notna().to_numpy().astype(int)
+        key['session_minutes'] = ((pd.to_datetime(df['logout_time']) - login).dt.total_seconds() / 60).fillna(0).to_numpy()
+        key['last_login'] = login.to_numpy()
+        parts.append(key.groupby(KEY).agg({'sessions': 'sum', 'session_minutes': 'sum', 'last_login': 'max'}))
+    games = pd.DataFrame(columns=KEY + ['game_name', 'bets'])
+    if 'bets' in frames:
+        df, key = _daily(frames['bets'], TIME_COLUMNS['bets'])
+        bet = df['bet_amount'].to_numpy(dtype=float)
+        win = df['win_amount'].to_numpy(dtype=float)
+        key['bets'] = 1
+        key['bets_with_amount'] = (~np.isnan(bet)).astype(int)
+        key['bet_amount'] = np.nan_to_num(bet)
+        key['win_amount'] = np.nan_to_num(win)
+        key['winning_bets'] = (win > 0).astype(int)
+        key['ggr'] = np.nan_to_num(bet - win)
+        parts.append(key.groupby(KEY).sum())
+        named = df['game_name'].notna().to_numpy()
+        games = (key.loc[named, KEY].assign(game_name=df.loc[named, 'game_name'].to_numpy())
+                 .groupby(KEY + ['game_name']).size().rename('bets').reset_index())
+    for table, count, amount in (('deposits', 'deposits', 'deposit_amount'),
+                                 ('withdrawals', 'withdrawals', 'withdrawal_amount')):
+        if table in frames:
+            df, key = _daily(frames[table], TIME_COLUMNS[table])
+            key[count] = 1
+            key[amount] = np.nan_to_num(df['amount'].to_numpy(dtype=float))
+            parts.append(key.groupby(KEY).sum())
+    if 'bonuses' in frames:
+        df, key = _daily(frames['bonuses'], TIME_COLUMNS['bonuses'])
+        key['bonuses'] = 1
+        key['bonuses_redeemed'] = df['redeemed_date'].notna().to_numpy().astype(int)
+        parts.append(key.groupby(KEY).sum())
+    return merge_rollups(*parts), games
+
+
+def merge_rollups(*activities):
+    """Combine daily activity frames (indexed or not by player_id, day): counters add, last_login is the max"""
+    frames = [a.reset_index() if 'player_id' not in a.columns else a for a in activities]
+    if not frames:
+        return pd.DataFrame(columns=KEY + COUNTERS + ['last_login'])
+    df = pd.concat(frames, ignore_index=True)
+    for c in COUNTERS:
+        if c not in df.columns:
+            df[c] = 0
+    if 'last_login' not in df.columns:
+        df['last_login'] = pd.NaT
+    agg = {c: 'sum' for c in COUNTERS}
+    agg['last_login'] = 'max'
+    return df.groupby(KEY, as_index=False).agg(agg)
+
+
+def _upsert(conn, table, rows, additive, maximum=()):
+    """INSERT ... ON CONFLICT DO UPDATE adding `additive` columns (max of `maximum` ones)"""
+    if conn.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif conn.dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise ValueError(f"rollup upserts need Postgres or SQLite, not {conn.dialect.name}")
+    stmt = dialect_insert(table)
+    new = stmt.excluded
+    values = {c: table.c[c] + new[c] for c in additive}
+    for c in maximum:
+        values[c] = case((table.c[c].is_(None), new[c]), (new[c] > table.c[c], new[c]), else_=table.c[c])
+    if 'updated_at' in table.c:
+        values['updated_at'] = new['updated_at']
+    conn.execute(stmt.on_conflict_do_update(index_elements=[c.name for c in table.primary_key], set_=values), rows)
+
+
+def _records(df):
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+def apply_rollups(engine, activity, games=None, chunk_size=CHUNK_SIZE, create=True):
+    """Add daily totals to the rollup tables; returns rows upserted per table"""
+    if create:
+        Base.metadata.create_all(bind=engine, tables=[ACTIVITY, GAMES])
+    activity = activity.assign(day=pd.to_datetime(activity['day']).dt.date,
+                               last_login=pd.to_datetime(activity['last_login']).dt.to_pydatetime(),
+                               updated_at=datetime.now())
+    counts = {'player_daily_activity': len(activity), 'player_daily_games': 0}
+    with engine.begin() as conn:
+        for start in range(0, len(activity), chunk_size):
+            _upsert(conn, ACTIVITY, _records(activity.iloc[start:start + chunk_size]), COUNTERS, ['last_login'])
+        if games is not None and len(games):
+            games = games.assign(day=pd.to_datetime(games['day']).dt.date, bets=games['bets'].astype(int))
+            for start in range(0, len(games), chunk_size):
+                _upsert(conn, GAMES, _records(games.iloc[start:start + chunk_size]), ['bets'])
+            counts['player_daily_games'] = len(games)
+    return counts
+
+
+def update_rollups(engine, frames, chunk_size=CHUNK_SIZE):
+    """Fold a newly landed batch of events into the rollup tables"""
+    activity, games = daily_rollup(frames)
+    return apply_rollups(engine, activity, games, chunk_size=chunk_size)
+
+
+def _window(reference_time, lookback_days):
+    """(first_day, last_day): the days overlapping [reference_time - lookback_days, reference_time)"""
+    ref = pd.Timestamp(reference_time)
+    return (ref - pd.Timedelta(days=lookback_days)).floor('D'), (ref - pd.Timedelta(1)).floor('D')
+
+
+def load_rollups(engine, reference_time, lookback_days=CHURN_LOOKBACK_DAYS, player_ids=None):
+    """(activity, games, last_login) for the lookback window; last_login covers all days up to reference_time"""
+    first_day, last_day = (d.date() for d in _window(reference_time, lookback_days))
+    activity_q = select(ACTIVITY).where(ACTIVITY.c.day.between(first_day, last_day))
+    games_q = select(GAMES.c.player_id, GAMES.c.day, GAMES.c.game_name).where(GAMES.c.day.between(first_day, last_day))
+    last_q = (select(ACTIVITY.c.player_id, func.max(ACTIVITY.c.last_login).label('last_login'))
+              .where(ACTIVITY.c.day <= last_day).group_by(ACTIVITY.c.player_id))
+    if player_ids is not None:
+        keys = list(_player_key(player_ids))
+        activity_q = activity_q.where(ACTIVITY.c.player_id.in_(keys))
+        games_q = games_q.where(GAMES.c.player_id.in_(keys))
+        last_q = last_q.where(ACTIVITY.c.player_id.in_(keys))
+    with engine.connect() as conn:
+        activity = pd.read_sql(activity_q, conn)
+        games = pd.read_sql(games_q, conn)
+        last = pd.read_sql(last_q, conn)
+    return activity, games, last.set_index('player_id')['last_login']
+
+
+def features_from_rollups(players_df, activity, games, reference_time, lookback_days=CHURN_LOOKBACK_DAYS,
+                          churn_threshold=CHURN_LABEL_THRESHOLD, last_login=None):
+    """player_features from daily rollups (activity may hold the full history).
+
+    last_login (player key -> latest login up to reference_time) defaults to the
+    maximum over `activity`.
+    """
+    first_day, last_day = _window(reference_time, lookback_days)
+    activity = activity.assign(day=pd.to_datetime(activity['day']), last_login=pd.to_datetime(activity['last_login']))
+    if last_login is None:
+        last_login = activity[activity['day'] <= last_day].groupby('player_id')['last_login'].max()
+    recent = activity[(activity['day'] >= first_day) & (activity['day'] <= last_day)]
+    totals = recent.groupby('player_id')[COUNTERS].sum()
+    days_active = recent[recent['last_login'].notna()].groupby('player_id').size()
+
+    # days back from the last day; week 0 holds the latest 7 days, as in feature_graph
+    back = (last_day - recent['day']).dt.days.to_numpy()
+    in_trend = back < TREND_WEEKS * 7
+    weekly = (recent[in_trend].assign(week=TREND_WEEKS - 1 - back[in_trend] // 7)
+              .pivot_table(index='player_id', columns='week', values='sessions', aggfunc='sum', fill_value=0)
+              .reindex(columns=range(TREND_WEEKS), fill_value=0))
+    games = games.assign(day=pd.to_datetime(games['day']))
+    games = games[(games['day'] >= first_day) & (games['day'] <= last_day)]
+    unique_games = games.groupby('player_id')['game_name'].nunique()
+
+    keys = _player_key(players_df['player_id']).to_numpy()
+    t = totals.reindex(keys, fill_value=0)
+    bets = t['bets'].to_numpy()
+    known = t['bets_with_amount'].to_numpy()
+    amount = _round(t['bet_amount'].to_numpy(), 2)    # cents: averages match make_features despite the daily sums
+    w = weekly.reindex(keys, fill_value=0).to_numpy(dtype=float)
+    x = np.arange(TREND_WEEKS) - (TREND_WEEKS - 1) / 2
+    slope = np.where(w.sum(axis=1) > 0, w @ x / (x @ x), 0.0)
+    last = pd.to_datetime(last_login.reindex(keys)).to_numpy(dtype='datetime64[ns]')
+    days_since = np.where(np.isnat(last), NO_LOGIN_DAYS,
+                          (pd.Timestamp(reference_time).as_unit('ns').value - last.view('int64')) // (86_400 * 10**9))
+
+    out = pd.DataFrame({
+        'player_id': players_df['player_id'].to_numpy(),
+        'days_active_last_30': days_active.reindex(keys, fill_value=0).to_numpy().astype(int),
+        'total_bets': bets.astype(int),
+        'total_bet_amount': amount,
+        'avg_bet_size': _round(np.where(known > 0, amount / np.maximum(known, 1), 0.0), 2),
+        'total_deposit': _round(t['deposit_amount'].to_numpy(), 2),
+        'total_withdrawal': _round(t['withdrawal_amount'].to_numpy(), 2),
+        'win_rate': _round(np.where(bets > 0, t['winning_bets'].to_numpy() / np.maximum(bets, 1), 0.0), 3),
+        'net_ggr': _round(t['ggr'].to_numpy(), 2),
+        'unique_games_played': unique_games.reindex(keys, fill_value=0).to_numpy().astype(int),
+        'bonus_used': t['bonuses'].to_numpy() > 0,
+        'offers_received': t['bonuses'].to_numpy().astype(int),
+        'offers_redeemed': t['bonuses_redeemed'].to_numpy().astype(int),
+        'sessions_per_week': _round(t['sessions'].to_numpy() / (lookback_days / 7.0), 2),
+        'session_trend_weekly': _round(slope, 3),
+        'days_since_last_login': days_since.astype(int),
+        'friends_count': players_df['friends_count'].to_numpy().astype(int),
+        'messages_sent': players_df['messages_sent'].to_numpy().astype(int),
+    })
+    out['churn_label'] = (out['days_since_last_login'] > churn_threshold).astype(int)
+    return out[['player_id'] + FEATURE_COLUMNS]
+
+
+def features_from_db(engine, players_df, reference_time, lookback_days=CHURN_LOOKBACK_DAYS,
+                     churn_threshold=CHURN_LABEL_THRESHOLD):
+    """player_features for players_df read from the rollup tables"""
+    activity, games, last_login = load_rollups(engine, reference_time, lookback_days, players_df['player_id'])
+    return features_from_rollups(players_df, activity, games, reference_time, lookback_days, churn_threshold,
+                                 last_login=last_login)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python rollups.py <csv_dir> [database_url]")
+        sys.exit(1)
+    url = sys.argv[2] if len(sys.argv) > 2 else os.getenv("DATABASE_URL", "sqlite:///churn.db")
+    frames = {}
+    for table in TIME_COLUMNS:
+        csv = os.path.join(sys.argv[1], f"{table}.csv")
+        if os.path.exists(csv):
+            frames[table] = pd.read_csv(csv)
+    for table, n in update_rollups(create_engine(url), frames).items():
+        print(f"{table}: {n} rows")
@@ -0,0 +1,193 @@
+"""
+serving.py
+Read-optimized feature store for online scoring.
+
+Each player's model input vector is packed into a single bytea/BLOB column of
+the narrow player_feature_vectors table (models/models.py), next to a version
+naming its layout in feature_vector_schemas. Scoring then reads one short row
+per player instead of 30+ ORM columns, and thousands of vectors come back in
+one query that NumPy decodes without per-row work:
+
+    refresh_vectors(engine, player_features_df, feature_names)    # after each feature job
+    ids, X = fetch_vectors(engine, ['17', '42', ...], feature_names)
+    X.shape     # (len(ids), len(feature_names)); players without a vector are skipped
+
+A refresh upserts all rows (and prunes players no longer present) in one
+transaction, so concurrent readers keep seeing the previous vectors until it
+commits. On Postgres, fetch_vectors concatenates the vectors server-side with
+string_agg and np.frombuffer wraps the returned buffer without copying.
+
+Usage:
+    python serving.py <player_features.csv> [database_url]
+"""
+
+import hashlib
+import os
+import sys
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import LargeBinary, create_engine, delete, func, insert, literal, select
+
+from models.models import Base, FeatureVectorSchema, PlayerFeatureVector
+
+# ---------- CONFIG ----------
+VECTOR_DTYPE = '<f4'            # little-endian float32: half the bytes of float64, ~7 significant digits
+REFRESH_CHUNK_SIZE = 10_000
+FETCH_CHUNK_SIZE = 5_000        # ids per query on backends without array parameters (SQLite)
+NON_FEATURE_COLUMNS = ('player_id', 'churn_label')
+# ----------------------------
+
+SCHEMAS = FeatureVectorSchema.__table__
+VECTORS = PlayerFeatureVector.__table__
+
+
+def schema_version(feature_names, dtype=VECTOR_DTYPE):
+    """Short stable id of a vector layout"""
+    return hashlib.sha256(f"{np.dtype(dtype).str}|{','.join(feature_names)}".encode()).hexdigest()[:16]
+
+
+def default_feature_names(features_df):
+    """Every numeric/bool column except the id and the label (the model input used in benchmarks/run.py)"""
+    return [c for c in features_df.columns
+            if c not in NON_FEATURE_COLUMNS and (pd.api.types.is_numeric_dtype(features_df[c])
+                                                 or pd.api.types.is_bool_dtype(features_df[c]))]
+
+
+def pack(features_df, feature_names, dtype=VECTOR_DTYPE):
+    """One bytes object per row holding the row's features as `dtype`"""
+    matrix = np.ascontiguousarray(features_df[feature_names].to_numpy(dtype=float).astype(dtype))
+    width = matrix.shape[1] * matrix.itemsize
+    buf = matrix.tobytes()
+    return [buf[i:i + width] for i in range(0, len(buf), width)]
+
+
+def unpack(blob, n_features, dtype=VECTOR_DTYPE):
+    """Matrix view over concatenated vectors (no copy)"""
+    return np.frombuffer(blob, dtype=dtype).reshape(-1, n_features)
+
+
+def _upsert(conn, table, rows, key, newer=None):
+    """INSERT ... ON CONFLICT (key) DO UPDATE on Postgres/SQLite, delete + insert elsewhere.
+
+    With `newer` (a column name), Postgres/SQLite keep an existing row whose
+    `newer` value is later than the incoming one.
+    """
+    name = conn.dialect.name
+    if name in ('postgresql', 'sqlite'):
+        if name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(index_elements=[key],
+                                          set_={c.name: stmt.excluded[c.name] for c in table.columns if c.name != key},
+                                          where=(table.c[newer] <= stmt.excluded[newer]) if newer else None)
+        conn.execute(stmt, rows)
+    else:
+        conn.execute(delete(table).where(table.c[key].in_([r[key] for r in rows])))
+        conn.execute(insert(table), rows)
+
+
+def register_schema(conn, feature_names, dtype=VECTOR_DTYPE):
+    """Record a vector layout; returns its version"""
+    version = schema_version(feature_names, dtype)
+    if conn.execute(select(SCHEMAS.c.version).where(SCHEMAS.c.version == version)).first() is None:
+        conn.execute(insert(SCHEMAS), [{'version': version, 'feature_names': list(feature_names),
+                                        'dtype': np.dtype(dtype).str, 'created_at': datetime.now()}])
+    return version
+
+
+def load_schema(conn, version):
+    """(feature_names, dtype) of a registered layout"""
+    row = conn.execute(select(SCHEMAS.c.feature_names, SCHEMAS.c.dtype).where(SCHEMAS.c.version == version)).first()
+    if row is None:
+        raise KeyError(f"unknown feature vector version {version!r}")
+    return list(row.feature_names), row.dtype
+
+
+def refresh_vectors(engine, features_df, feature_names=None, dtype=VECTOR_DTYPE, feature_date=None,
+                    chunk_size=REFRESH_CHUNK_SIZE, prune=True, create=True):
+    """Upsert the packed vectors of features_df; returns (version, rows written).
+
+    prune deletes the vectors of players this call did not refresh, so the
+    table mirrors the latest feature job.
+    """
+    if create:
+        Base.metadata.create_all(bind=engine, tables=[SCHEMAS, VECTORS])
+    feature_names = list(feature_names or default_feature_names(features_df))
+    feature_date = feature_date or date.today()
+    refreshed_at = datetime.now()
+    player_ids = features_df['player_id'].astype(str).to_numpy()
+    with engine.begin() as conn:
+        version = register_schema(conn, feature_names, dtype)
+        for start in range(0, len(features_df), chunk_size):
+            block = features_df.iloc[start:start + chunk_size]
+            rows = [{'player_id': pid, 'version': version, 'vector': blob,
+                     'feature_date': feature_date, 'refreshed_at': refreshed_at}
+                    for pid, blob in zip(player_ids[start:start + chunk_size], pack(block, feature_names, dtype))]
+            _upsert(conn, VECTORS, rows, 'player_id')
+        if prune:
+            conn.execute(delete(VECTORS).where(VECTORS.c.refreshed_at < refreshed_at))
+    return version, len(features_df)
+
+
+def latest_refresh(engine):
+    """refreshed_at of the newest vector (None when there are none); changes whenever vectors are refreshed"""
+    with engine.connect() as conn:
+        return conn.execute(select(VECTORS.c.refreshed_at).order_by(VECTORS.c.refreshed_at.desc()).limit(1)).scalar()
+
+
+def _postgres_fetch(version, player_ids):
+    from sqlalchemy.dialects.postgresql import aggregate_order_by
+    pid = VECTORS.c.player_id
+    return (select(func.array_agg(aggregate_order_by(pid, pid)),
+                   func.string_agg(VECTORS.c.vector, aggregate_order_by(literal(b'', LargeBinary), pid)),
+                   func.array_agg(aggregate_order_by(VECTORS.c.feature_date, pid)),
+                   func.array_agg(aggregate_order_by(VECTORS.c.refreshed_at, pid)))
+            .where(VECTORS.c.version == version, pid.in_(player_ids)))
+
+
+def fetch_vectors(engine, player_ids, feature_names=None, version=None, dtype=VECTOR_DTYPE, with_dates=False):
+    """(ids, matrix) for the players that have vectors of the requested layout.
+
+    Give either feature_names (+ dtype) or a version. ids gives the row order;
+    reindex with pd.Index(ids).get_indexer(wanted) if needed. with_dates adds
+    each vector's feature_date and refreshed_at: (ids, matrix, feature_dates, refreshed_at).
+    """
+    if version is None:
+        version = schema_version(feature_names, dtype)
+    player_ids = [str(p) for p in player_ids]
+    with engine.connect() as conn:
+        names, dtype = load_schema(conn, version)
+        if conn.dialect.name == 'postgresql':
+            # one round trip; the server concatenates the vectors into a single buffer
+            row = conn.execute(_postgres_fetch(version, player_ids)).first()
+            ids, blob, feature_dates, refreshed = (row[0] or []), (row[1] or b''), (row[2] or []), (row[3] or [])
+        else:
+            ids, blobs, feature_dates, refreshed = [], [], [], []
+            for start in range(0, len(player_ids), FETCH_CHUNK_SIZE):
+                chunk = player_ids[start:start + FETCH_CHUNK_SIZE]
+                for pid, vector, feature_date, refreshed_at in conn.execute(
+                        select(VECTORS.c.player_id, VECTORS.c.vector, VECTORS.c.feature_date, VECTORS.c.refreshed_at)
+                        .where(VECTORS.c.version == version, VECTORS.c.player_id.in_(chunk))
+                        .order_by(VECTORS.c.player_id)):
+                    ids.append(pid)
+                    blobs.append(vector)
+                    feature_dates.append(feature_date)
+                    refreshed.append(refreshed_at)
+            blob = b''.join(blobs)
+    ids, X = np.asarray(ids, dtype=object), unpack(blob, len(names), dtype)
+    if with_dates:
+        return ids, X, np.asarray(feature_dates, dtype=object), np.asarray(refreshed, dtype=object)
+    return ids, X
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python serving.py <player_features.csv> [database_url]")
+        sys.exit(1)
+    url = sys.argv[2] if len(sys.argv) > 2 else os.getenv("DATABASE_URL", "sqlite:///churn.db")
+    version, n = refresh_vectors(create_engine(url), pd.read_csv(sys.argv[1]))
+    print(f"player_feature_vectors: {n} rows (layout {version})")
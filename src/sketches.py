@@ -0,0 +1,341 @@
+"""
+sketches.py
+Mergeable approximate aggregates for per-player feature computation.
+
+    - HyperLogLog:  distinct counts (active days, unique games)
+    - DDSketch:     quantiles with a relative error bound (bet size, session length),
+                    and the median absolute deviation derived from the same buckets
+
+Both sketches keep sparse per-group state (only occupied registers / buckets),
+are updated with vectorized NumPy operations over whole event columns and can
+be merged, so partial sketches built on separate shards combine into the same
+result as a single pass over all events. generator/approx.py registers them as
+optional feature-graph nodes; benchmarks/bench_sketches.py compares them with
+the exact pandas aggregates.
+"""
+
+import math
+import numpy as np
+import pandas as pd
+
+# ---------- CONFIG ----------
+HLL_PRECISION = 10          # 2**p registers; relative error ~ 1.04 / sqrt(2**p) = 3.3%
+PLAYER_HLL_PRECISION = 8    # per-player sketches: ~6.5%, a player's handful of days/games stays in linear counting
+DD_RELATIVE_ACCURACY = 0.01 # quantile values within +/-1% of the true value
+DD_MIN_VALUE = 0.01         # smaller values are counted in the zero bucket
+DD_MAX_VALUE = 1e7          # larger values are clipped to the top bucket
+# ----------------------------
+
+
+def hash64(values):
+    """Deterministic 64-bit hash of an array of values"""
+    values = np.asarray(values)
+    if values.dtype.kind == 'M':
+        return pd.util.hash_array(values.view('int64'), categorize=False)
+    if values.dtype.kind in 'UOS':
+        # strings are low-cardinality here; hash the distinct values once
+        return pd.util.hash_array(values.astype(object), categorize=True)
+    return pd.util.hash_array(values, categorize=False)
+
+
+def _datetimes(values):
+    """datetime64[ns] array of datetime-like values (parsed only when they are not datetimes already)"""
+    s = pd.Series(values)
+    if not pd.api.types.is_datetime64_any_dtype(s):
+        s = pd.to_datetime(s)
+    return s.to_numpy(dtype='datetime64[ns]')
+
+
+def days_since_epoch(times):
+    """Integer day index of datetime-like values (NaT -> -1)"""
+    t = _datetimes(times).astype('datetime64[D]')
+    days = t.astype('int64')
+    days[np.isnat(t)] = -1
+    return days
+
+
+def _combine(keys, values, reduce):
+    """Sorted distinct keys of sparse (keys, values) parts, reducing the values of equal keys with a ufunc"""
+    keys, values = np.concatenate(keys), np.concatenate(values)
+    if len(keys) == 0:
+        return keys, values
+    # the parts are mostly sorted runs, which a stable sort (timsort) merges in about linear time
+    order = np.argsort(keys, kind='stable')
+    keys, values = keys[order], values[order]
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+    starts = np.flatnonzero(first)
+    return keys[starts], reduce.reduceat(values, starts)
+
+
+def _check_compatible(a, b, *attrs):
+    for attr in attrs:
+        if getattr(a, attr) != getattr(b, attr):
+            raise ValueError(f"Cannot merge sketches with different {attr}: {getattr(a, attr)} != {getattr(b, attr)}")
+
+
+def _distinct(keys, size, counts=False):
+    """Sorted distinct values of non-negative int keys below `size` (and their counts).
+
+    A bincount (no sort at all) when the key range is small next to the input, np.unique otherwise.
+    """
+    if size <= max(4 * len(keys), 1 << 16):
+        c = np.bincount(keys, minlength=size)
+        flat = np.flatnonzero(c)
+        return (flat, c[flat]) if counts else flat
+    return np.unique(keys, return_counts=counts)
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter for `n_groups` independent groups.
+
+    Registers are stored sparsely as sorted (group * m + register) keys with
+    their ranks: a player with a few dozen distinct values touches a few dozen
+    of its 2**p registers, so memory and merge cost follow the occupied
+    registers rather than n_groups x 2**p. Values are deduplicated per group
+    before hashing, and each distinct value is hashed once.
+    """
+
+    def __init__(self, n_groups=1, precision=HLL_PRECISION):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.n_groups = n_groups
+        self.precision = precision
+        self.m = 1 << precision
+        self.keys = np.empty(0, dtype=np.int64)     # group * m + register, sorted
+        self.ranks = np.empty(0, dtype=np.uint8)
+
+    @classmethod
+    def for_error(cls, relative_error, n_groups=1):
+        """Smallest sketch whose standard error is at most `relative_error`"""
+        p = math.ceil(math.log2((1.04 / relative_error) ** 2))
+        return cls(n_groups, precision=min(max(p, 4), 16))
+
+    @property
+    def relative_error(self):
+        return 1.04 / math.sqrt(self.m)
+
+    @property
+    def registers(self):
+        """Dense (n_groups, m) uint8 register matrix"""
+        out = np.zeros(self.n_groups * self.m, dtype=np.uint8)
+        out[self.keys] = self.ranks
+        return out.reshape(self.n_groups, self.m)
+
+    def _absorb(self, keys, ranks):
+        self.keys, self.ranks = _combine([self.keys, *keys], [self.ranks, *ranks], np.maximum)
+
+    def add(self, values, groups=None):
+        """Add values (optionally tagged with a group index per value); missing values are ignored"""
+        codes, uniques = pd.factorize(values)
+        g = np.zeros(len(codes), dtype=np.int64) if groups is None else np.asarray(groups, dtype=np.int64)
+        keep = codes >= 0
+        if not keep.all():
+            codes, g = codes[keep], g[keep]
+        if len(codes) == 0:
+            return self
+        k = len(uniques)
+        pairs = _distinct(g * k + codes, self.n_groups * k)
+        h = hash64(np.asarray(uniques))[pairs % k]
+        p = self.precision
+        idx = (h >> np.uint64(64 - p)).astype(np.int64)
+        low = h & np.uint64((1 << (64 - p)) - 1)
+        # rank = position of the lowest set bit; isolating it gives an exact power of two
+        lowest = low & (~low + np.uint64(1))
+        with np.errstate(divide='ignore'):
+            rank = np.where(low == 0, 64 - p + 1, np.log2(lowest.astype(np.float64)) + 1).astype(np.uint8)
+        self._absorb([pairs // k * self.m + idx], [rank])
+        return self
+
+    def merge(self, *others):
+        for other in others:
+            _check_compatible(self, other, 'n_groups', 'precision')
+        self._absorb([o.keys for o in others], [o.ranks for o in others])
+        return self
+
+    def estimate(self):
+        """Estimated distinct count per group"""
+        m = self.m
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        group = self.keys // m
+        occupied = np.bincount(group, minlength=self.n_groups)
+        zeros = m - occupied
+        # empty registers (rank 0) each add 2**0 to the harmonic sum
+        total = np.bincount(group, weights=np.exp2(-self.ranks.astype(np.float64)), minlength=self.n_groups) + zeros
+        raw = alpha * m * m / total
+        with np.errstate(divide='ignore'):
+            linear = m * np.log(m / np.maximum(zeros, 1))
+        # linear counting is far more accurate while many registers are still empty
+        return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+class DDSketch:
+    """Relative-error quantile sketch (DDSketch) over non-negative values, per group.
+
+    Buckets are stored sparsely as sorted (group, bucket) pairs with counts, so
+    memory grows with the number of occupied buckets rather than groups x range.
+    """
+
+    def __init__(self, n_groups=1, relative_accuracy=DD_RELATIVE_ACCURACY,
+                 min_value=DD_MIN_VALUE, max_value=DD_MAX_VALUE):
+        self.n_groups = n_groups
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.min_key = math.ceil(math.log(min_value) / self._log_gamma)
+        self.max_key = math.ceil(math.log(max_value) / self._log_gamma)
+        # bucket 0 is the zero bucket, the rest map to keys min_key..max_key
+        self.width = self.max_key - self.min_key + 2
+        self.keys = np.empty(0, dtype=np.int64)     # group * width + bucket, sorted
+        self.counts = np.empty(0, dtype=np.int64)
+
+    def _absorb(self, keys, counts):
+        if len(self.keys) == 0 and len(keys) == 1:
+            self.keys, self.counts = keys[0], counts[0].astype(np.int64)     # already sorted and distinct
+            return
+        self.keys, self.counts = _combine([self.keys, *keys], [self.counts, *counts], np.add)
+        self.counts = self.counts.astype(np.int64)
+
+    def add(self, values, groups=None):
+        """Add values (NaN is ignored, values below min_value count as zero)"""
+        x = np.asarray(values, dtype=np.float64)
+        g = np.zeros(len(x), dtype=np.int64) if groups is None else np.asarray(groups, dtype=np.int64)
+        keep = ~np.isnan(x)
+        x, g = x[keep], g[keep]
+        if len(x) == 0:
+            return self
+        small = x < self.min_value
+        keys = np.ceil(np.log(np.where(small, self.min_value, x)) / self._log_gamma).astype(np.int64)
+        bucket = np.clip(keys, self.min_key, self.max_key) - self.min_key + 1
+        bucket[small] = 0
+        # count (group, bucket) pairs over the buckets this batch actually uses
+        lo = int(bucket.min())
+        width = int(bucket.max()) - lo + 1
+        flat, counts = _distinct(g * width + (bucket - lo), self.n_groups * width, counts=True)
+        self._absorb([flat // width * self.width + flat % width + lo], [counts])
+        return self
+
+    def merge(self, *others):
+        for other in others:
+            _check_compatible(self, other, 'n_groups', 'relative_accuracy', 'min_value', 'max_value')
+        self._absorb([o.keys for o in others], [o.counts for o in others])
+        return self
+
+    def count(self):
+        return np.bincount(self.keys // self.width, weights=self.counts, minlength=self.n_groups).astype(np.int64)
+
+    def _values(self, bucket):
+        """Representative value of each bucket (0 for the zero bucket)"""
+        values = 2 * np.power(self.gamma, bucket - 1 + self.min_key) / (self.gamma + 1)
+        return np.where(bucket == 0, 0.0, values)
+
+    def _rank_select(self, group, counts, q):
+        """(groups, positions) of the entry holding each group's q-quantile; entries sorted by group"""
+        cum = np.concatenate([[0], np.cumsum(counts)])
+        bounds = np.searchsorted(group, np.arange(self.n_groups + 1))
+        before = cum[bounds[:-1]]               # running total before each group starts
+        total = cum[bounds[1:]] - before
+        nonempty = np.flatnonzero(total > 0)
+        # counts are positive, so cum is strictly increasing and one searchsorted finds every group's entry
+        rank = before[nonempty] + q * (total[nonempty] - 1)
+        return nonempty, np.searchsorted(cum[1:], rank, side='right')
+
+    def quantile(self, q):
+        """Estimated q-quantile per group (NaN for empty groups)"""
+        out = np.full(self.n_groups, np.nan)
+        if len(self.keys) == 0:
+            return out
+        group = self.keys // self.width
+        first_group, pos = self._rank_select(group, self.counts, q)
+        out[first_group] = self._values(self.keys[pos] % self.width)
+        return out
+
+    def mad(self, center=None):
+        """Estimated median absolute deviation per group around `center` (default: the estimated median)"""
+        center = self.quantile(0.5) if center is None else np.asarray(center, dtype=np.float64)
+        out = np.full(self.n_groups, np.nan)
+        if len(self.keys) == 0:
+            return out
+        group = self.keys // self.width
+        dev = np.abs(self._values(self.keys % self.width) - center[group])
+        order = np.lexsort((dev, group))
+        first_group, pos = self._rank_select(group[order], self.counts[order], 0.5)
+        out[first_group] = dev[order][pos]
+        return out
+
+
+class PlayerSketches:
+    """Per-player sketches of the expensive feature aggregates.
+
+    Sketches built from different shards of the event tables (for the same
+    player list and settings) can be merged before reading the estimates.
+    """
+
+    def __init__(self, player_ids, hll_precision=PLAYER_HLL_PRECISION, relative_accuracy=DD_RELATIVE_ACCURACY):
+        self.player_index = pd.Index(player_ids)
+        n = len(self.player_index)
+        self.active_days = HyperLogLog(n, precision=hll_precision)
+        self.games = HyperLogLog(n, precision=hll_precision)
+        self.bet_size = DDSketch(n, relative_accuracy=relative_accuracy)
+        self.session_length = DDSketch(n, relative_accuracy=relative_accuracy)
+
+    def _groups(self, player_ids):
+        g = self.player_index.get_indexer(player_ids)
+        return g, g >= 0
+
+    def update(self, sessions_df=None, bets_df=None):
+        """Add a chunk of sessions and/or bets events"""
+        if sessions_df is not None and not sessions_df.empty:
+            g, ok = self._groups(sessions_df['player_id'])
+            login, logout = _datetimes(sessions_df['login_time']), _datetimes(sessions_df['logout_time'])
+            days = days_since_epoch(login)
+            ok_days = ok & (days >= 0)
+            self.active_days.add(days[ok_days], g[ok_days])
+            minutes = (logout - login).astype('timedelta64[s]').astype(np.float64) / 60
+            minutes[np.isnat(login) | np.isnat(logout)] = np.nan
+            self.session_length.add(minutes[ok], g[ok])
+        if bets_df is not None and not bets_df.empty:
+            g, ok = self._groups(bets_df['player_id'])
+            games = bets_df['game_name']      # factorized as it is: no object array, missing games are skipped
+            self.games.add(games if ok.all() else games[ok], g[ok])
+            self.bet_size.add(bets_df['bet_amount'].to_numpy(dtype=np.float64)[ok], g[ok])
+        return self
+
+    def merge(self, *others):
+        if any(not self.player_index.equals(o.player_index) for o in others):
+            raise ValueError("Cannot merge sketches built for different player lists")
+        self.active_days.merge(*(o.active_days for o in others))
+        self.games.merge(*(o.games for o in others))
+        self.bet_size.merge(*(o.bet_size for o in others))
+        self.session_length.merge(*(o.session_length for o in others))
+        return self
+
+    def to_frame(self):
+        """Approximate aggregates, one row per player"""
+        return pd.DataFrame({
+            'player_id': self.player_index,
+            'days_active': np.rint(self.active_days.estimate()).astype(int),
+            'unique_games_played': np.rint(self.games.estimate()).astype(int),
+            'median_bet_size': self.bet_size.quantile(0.5),
+            'p90_bet_size': self.bet_size.quantile(0.9),
+            'median_session_length': self.session_length.quantile(0.5),
+            'p90_session_length': self.session_length.quantile(0.9),
+        })
+
+
+def approx_player_aggregates(players_df, sdf, bdf, n_shards=1, **kwargs):
+    """Sketch-based per-player aggregates, optionally built shard by shard and merged"""
+    player_ids = players_df['player_id'].to_numpy()
+
+    def shard_of(df, shard):
+        # contiguous row ranges slice without copying
+        if df is None:
+            return None
+        bounds = np.linspace(0, len(df), n_shards + 1).astype(int)
+        return df.iloc[bounds[shard]:bounds[shard + 1]]
+
+    parts = [PlayerSketches(player_ids, **kwargs).update(shard_of(sdf, shard), shard_of(bdf, shard))
+             for shard in range(n_shards)]
+    return parts[0].merge(*parts[1:]).to_frame()
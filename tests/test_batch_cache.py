@@ -0,0 +1,68 @@
+"""Batch score cache of the scoring service over SQLite (run with pytest from the project root)"""
+
+import os
+import sys
+import tempfile
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sqlalchemy import create_engine
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/../src"))
+os.environ.setdefault('MODEL_REGISTRY_DIR', tempfile.mkdtemp(prefix='registry_'))
+
+import api
+from model_registry import LoadedModel
+from responses import BatchCache
+from serving import refresh_vectors
+
+FEATURES = ['total_bets', 'days_since_last_login']
+
+
+def _features(ids, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'player_id': ids, 'total_bets': rng.integers(0, 100, len(ids)).astype(float),
+                         'days_since_last_login': rng.integers(0, 60, len(ids)).astype(float)})
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(api, 'engine', create_engine(f"sqlite:///{tmp_path / 'serving.db'}"))
+    monkeypatch.setattr(api, 'batch_cache', BatchCache())
+    X = _features([str(i) for i in range(50)], seed=0)[FEATURES].to_numpy()
+    model = LogisticRegression().fit(X, (X[:, 1] > 30).astype(int))
+    return LoadedModel(version='v1', model=model, feature_names=tuple(FEATURES))
+
+
+def test_refresh_serves_new_scores(service):
+    first = _features(['1', '2', '3'], seed=1)
+    refresh_vectors(api.engine, first, FEATURES, feature_date=date(2024, 6, 1))
+    ids, proba, dates, predicted_at = api.cached_score(service, ['1', '2', '3', '404'])
+    assert list(ids) == ['1', '2', '3'] and dates == [date(2024, 6, 1)] * 3
+    np.testing.assert_allclose(proba, service.predict_proba(first[FEATURES]), rtol=1e-6)
+
+    # served from the cache, including the player without a vector
+    misses = api.batch_cache.misses
+    again = api.cached_score(service, ['1', '2', '3', '404'])
+    assert api.batch_cache.misses == misses
+    assert list(again[0]) == list(ids) and again[3] == predicted_at
+
+    second = _features(['1', '2', '3', '404'], seed=2)
+    refresh_vectors(api.engine, second, FEATURES, feature_date=date(2024, 6, 2))
+    ids, proba, dates, _ = api.cached_score(service, ['1', '2', '3', '404'])
+    assert list(ids) == ['1', '2', '3', '404'] and dates == [date(2024, 6, 2)] * 4
+    np.testing.assert_allclose(proba, service.predict_proba(second[FEATURES]), rtol=1e-6)
+
+
+def test_least_recently_used_players_are_evicted():
+    cache = BatchCache(max_entries=3)
+    cache.sync('t0')
+    cache.store('t0', 'v1', ['a', 'b', 'c'], [0.1, 0.2, 0.3], [date(2024, 6, 1)] * 3, ['t0'] * 3, 'now')
+    cache.lookup('v1', ['a'])
+    cache.store('t0', 'v1', ['d'], [0.4], [date(2024, 6, 1)], ['t0'], 'now', absent=['e'])
+    found, _, _, _, missing = cache.lookup('v1', ['a', 'b', 'c', 'd', 'e'])
+    assert len(cache) == 3
+    assert found == ['a', 'd'] and missing == ['b', 'c']
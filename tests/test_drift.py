@@ -0,0 +1,46 @@
+"""Drift monitor checks on zero-inflated and boolean features (run with pytest from the project root)"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/../src"))
+
+from drift import DriftMonitor
+
+N = 20_000
+
+
+def _features(nonzero_share, seed):
+    rng = np.random.default_rng(seed)
+    nonzero = rng.random(N) < nonzero_share
+    return pd.DataFrame({
+        'total_withdrawal': np.where(nonzero, rng.lognormal(4, 1, N), 0.0).round(2),
+        'bonus_used': rng.random(N) < nonzero_share,
+        'total_bet_amount': rng.lognormal(5, 1, N).round(2),
+    })
+
+
+def test_zero_inflated_shift_is_flagged():
+    monitor = DriftMonitor.fit(_features(0.05, seed=1))
+    report = monitor.check(_features(0.6, seed=2)).set_index('feature')
+    assert report.loc['total_withdrawal', 'status'] == 'drift'
+    assert report.loc['bonus_used', 'status'] == 'drift'
+    assert report.loc['total_withdrawal', 'psi'] > 0.2
+    assert report.loc['total_bet_amount', 'status'] == 'ok'
+
+
+def test_unchanged_batch_is_ok():
+    monitor = DriftMonitor.fit(_features(0.05, seed=1))
+    report = monitor.check(_features(0.05, seed=3))
+    assert (report['status'] == 'ok').all()
+
+
+def test_point_mass_survives_save_and_load(tmp_path):
+    monitor = DriftMonitor.fit(_features(0.05, seed=1))
+    monitor.save(tmp_path / 'drift.json')
+    loaded = DriftMonitor.load(tmp_path / 'drift.json')
+    batch = _features(0.6, seed=2)
+    pd.testing.assert_frame_equal(loaded.check(batch), monitor.check(batch))
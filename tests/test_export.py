@@ -0,0 +1,87 @@
+"""Keyset pages and streams of the at-risk export over SQLite (run with pytest from the project root)"""
+
+import base64
+import io
+import os
+import sys
+import tempfile
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, insert
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/../src"))
+os.environ.setdefault('MODEL_REGISTRY_DIR', tempfile.mkdtemp(prefix='registry_'))
+
+import api
+from export import csv_stream, fetch_page, iter_partitions, parquet_stream
+from models.models import Base, LatestPrediction, Player, PlayerFeatures
+
+N_PLAYERS = 600
+N_AT_RISK = 419     # not a multiple of any page or partition size below
+
+
+@pytest.fixture(scope='module')
+def engine(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('export') / 'export.db'}")
+    Base.metadata.create_all(bind=engine, tables=[Player.__table__, PlayerFeatures.__table__,
+                                                  LatestPrediction.__table__])
+    ids = [f"p{i:04d}" for i in range(N_PLAYERS)]
+    # 50 distinct probabilities over the at-risk rows, so every page boundary falls inside a run of ties
+    proba = [0.5 + (i % 50) / 100 if i < N_AT_RISK else 0.1 + (i % 30) / 100 for i in range(N_PLAYERS)]
+    with engine.begin() as conn:
+        conn.execute(insert(Player.__table__), [{'player_id': pid, 'country': 'DE', 'vip_level': 1} for pid in ids])
+        conn.execute(insert(PlayerFeatures.__table__), [{'player_id': pid, 'feature_date': date(2024, 6, 30),
+                                                         'total_bets': i} for i, pid in enumerate(ids)])
+        conn.execute(insert(LatestPrediction.__table__), [
+            {'player_id': pid, 'model_version': 'v1', 'churn_probability': p, 'churn_label': p >= 0.5,
+             'feature_date': date(2024, 6, 30), 'predicted_at': datetime(2024, 7, 1)} for pid, p in zip(ids, proba)])
+    return engine
+
+
+@pytest.fixture(scope='module')
+def expected(engine):
+    """player_ids of the export in (churn_probability, player_id) descending order"""
+    with engine.connect() as conn:
+        df = pd.read_sql("SELECT player_id, churn_probability FROM latest_predictions "
+                         "WHERE churn_probability >= 0.5", conn)
+    df = df.sort_values(['churn_probability', 'player_id'], ascending=False)
+    assert len(df) == N_AT_RISK
+    return df['player_id'].tolist()
+
+
+def test_pages_walk_every_row_once_across_ties(engine, expected):
+    pages, cursor = [], None
+    while True:
+        rows, cursor = fetch_page(engine, cursor=cursor, limit=37)
+        pages.append(rows)
+        if cursor is None:
+            break
+    assert [len(p) for p in pages] == [37] * 11 + [12]
+    assert [r['player_id'] for page in pages for r in page] == expected
+    ties = [a[-1]['churn_probability'] == b[0]['churn_probability'] for a, b in zip(pages, pages[1:])]
+    assert any(ties)
+
+
+def test_streams_match_pages(engine, expected):
+    partitions = list(iter_partitions(engine, page_size=100, partition_rows=30))
+    assert max(len(p) for p in partitions) == 30
+    assert [row[0] for p in partitions for row in p] == expected
+
+    csv = pd.read_csv(io.BytesIO(b''.join(csv_stream(engine, page_size=100, partition_rows=30))),
+                      dtype={'player_id': str})
+    assert csv['player_id'].tolist() == expected
+    pyarrow_parquet = pytest.importorskip('pyarrow.parquet')
+    table = pyarrow_parquet.read_table(io.BytesIO(b''.join(parquet_stream(engine, page_size=100, partition_rows=30))))
+    assert table.column('player_id').to_pylist() == expected
+    assert table.column('total_bets').to_pylist() == csv['total_bets'].tolist()
+
+
+@pytest.mark.parametrize('cursor', ['not-a-cursor', base64.urlsafe_b64encode(b'"p0001"').decode()])
+def test_invalid_cursor_is_a_bad_request(engine, monkeypatch, cursor):
+    monkeypatch.setattr(api, 'engine', engine)
+    with pytest.raises(HTTPException) as e:
+        api.export_page(min_probability=0.5, country=None, vip_level=None, cursor=cursor, limit=37)
+    assert e.value.status_code == 400
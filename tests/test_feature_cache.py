@@ -0,0 +1,29 @@
+"""FeatureCache recovery from unreadable entries (run with pytest from the project root)"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/../src"))
+
+from feature_cache import FeatureCache
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'pickle'])
+def test_corrupt_entry_is_a_miss_and_is_recomputed(tmp_path, fmt):
+    if fmt == 'parquet':
+        pytest.importorskip('pyarrow')
+    cache = FeatureCache(str(tmp_path), fmt=fmt)
+    key = cache.key(table='player_features')
+    cache.put(key, pd.DataFrame({'player_id': [1, 2], 'total_bets': [3, 4]}))
+    with open(cache.path(key), 'r+b') as f:
+        f.truncate(10)
+
+    assert cache.get(key) is None
+    assert not os.path.exists(cache.path(key))
+    assert cache.stats['corrupt'] == 1
+    df = cache.get_or_compute(key, lambda: pd.DataFrame({'player_id': [1], 'total_bets': [5]}))
+    assert df['total_bets'].tolist() == [5]
+    assert cache.get(key)['total_bets'].tolist() == [5]
@@ -0,0 +1,64 @@
+"""Feature windows: in-memory frames and the event store agree (run with pytest from the project root)"""
+
+import os
+import random
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/../src"))
+
+from event_store import EventStore
+from evaluation import build_snapshots
+from generator.config import GeneratorConfig
+from generator.features import make_features_from_store
+from generator.pipeline import window_features
+from generator.players import generate_players
+from generator.simulation import simulate
+
+START, END = datetime(2024, 1, 1), datetime(2024, 6, 30)
+
+
+@pytest.fixture(scope='module')
+def history():
+    np.random.seed(5)
+    random.seed(5)
+    players = generate_players(300, END, random.Random(5))
+    frames = simulate(players, START, END)
+    return players, frames, EventStore.from_frames(frames, players['player_id'].to_numpy())
+
+
+@pytest.mark.parametrize('reference_time', [END, datetime(2024, 5, 15)])
+def test_frame_and_store_paths_agree(history, reference_time):
+    players, frames, store = history
+    config = GeneratorConfig(start=START, end=END)
+    from_frames = window_features(players, frames, reference_time, config)
+    from_store = make_features_from_store(players, store, reference_time=reference_time)
+    pd.testing.assert_frame_equal(from_frames, from_store)
+
+
+def test_offer_after_reference_time_is_not_counted(history):
+    players, frames, original = history
+    pid = players['player_id'].iloc[0]
+    offer = pd.DataFrame({'bonus_id': [10**9], 'player_id': [pid], 'bonus_type': ['marketing_offer'],
+                          'bonus_amount': [0.0], 'issued_date': [pd.Timestamp(END) + pd.Timedelta(days=3)],
+                          'redeemed_date': [pd.NaT]})
+    frames = {**frames, 'bonuses': pd.concat([frames['bonuses'], offer], ignore_index=True)}
+    store = EventStore.from_frames(frames, players['player_id'].to_numpy())
+    from_frames = window_features(players, frames, END, GeneratorConfig(start=START, end=END))
+    from_store = make_features_from_store(players, store, reference_time=END)
+    pd.testing.assert_series_equal(from_frames['offers_received'], from_store['offers_received'])
+    before = make_features_from_store(players, original, reference_time=END, features=['offers_received'])
+    pd.testing.assert_series_equal(from_frames['offers_received'], before['offers_received'])
+
+
+def test_snapshots_skip_players_not_yet_registered(history):
+    players, _, store = history
+    t = datetime(2024, 4, 1)
+    snapshots = build_snapshots(players, store, [t], horizon_days=14)
+    registered = pd.to_datetime(players.set_index('player_id')['registration_date'])
+    assert set(snapshots['player_id']) == set(registered[registered <= t].index)
+    assert len(snapshots) < len(players)
@@ -0,0 +1,43 @@
+"""Generator timelines: registration dates and activity (run with pytest from the project root)"""
+
+import os
+import random
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/../src"))
+
+from generator.players import MAX_ACCOUNT_AGE_DAYS, generate_players
+from generator.simulation import simulate
+
+END = datetime(2024, 6, 30)
+
+
+def _players(n, seed):
+    np.random.seed(seed)
+    random.seed(seed)
+    return generate_players(n, END, random.Random(seed))
+
+
+def test_registrations_follow_end_date_and_seed():
+    players = _players(300, seed=7)
+    registered = players['registration_date']
+    assert registered.max() <= END.date()
+    assert (END.date() - registered.min()).days <= MAX_ACCOUNT_AGE_DAYS
+    assert players.equals(_players(300, seed=7))
+
+
+def test_no_activity_before_registration():
+    players = _players(400, seed=3)
+    frames = simulate(players, datetime(2024, 1, 1), END)
+    registered = pd.to_datetime(players.set_index('player_id')['registration_date'])
+    for table, column in (('sessions', 'login_time'), ('bets', 'bet_time'), ('deposits', 'deposit_time'),
+                          ('bonuses', 'issued_date')):
+        df = frames[table]
+        joined = pd.to_datetime(df['player_id'].map(registered))
+        assert (df[column] >= joined).all(), table
+    late = registered[registered > pd.Timestamp(2024, 3, 1)].index
+    assert frames['sessions']['player_id'].isin(late).any()
@@ -0,0 +1,32 @@
+"""Per-stage memory accounting of RunReport (run with pytest from the project root)"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/../src"))
+
+from instrumentation import RunReport
+
+
+def test_child_stage_keeps_parent_heap_peak():
+    report = RunReport('test', profile_dir='', trace_memory=True)
+    with report.stage('parent'):
+        big = bytearray(40 * 2 ** 20)
+        del big
+        with report.stage('child'):
+            small = bytearray(2 ** 20)
+            del small
+        with report.stage('sibling'):
+            pass
+    assert report.stages['parent']['heap_peak_mb'] >= 40
+    assert report.stages['child']['heap_peak_mb'] < 10
+    assert report.stages['sibling']['heap_peak_mb'] < 10
+
+
+def test_rss_growth_is_per_stage():
+    report = RunReport('test', profile_dir='')
+    with report.stage('idle'):
+        pass
+    s = report.stages['idle']
+    if s['rss_cumulative_peak_mb'] is not None:
+        assert s['rss_growth_mb'] < 5 <= s['rss_cumulative_peak_mb']
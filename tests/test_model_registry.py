@@ -0,0 +1,50 @@
+"""Scoring registry versions fitted on DataFrames (run with pytest from the project root)"""
+
+import os
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/../src"))
+
+from model_registry import ModelRegistry
+
+FEATURES = ['total_bets', 'days_since_last_login', 'net_ggr']
+
+
+def _training_frame(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n, len(FEATURES))), columns=FEATURES)
+    return X, (X['days_since_last_login'] + rng.normal(0, 0.5, n) > 0).astype(int)
+
+
+def _score(tmp_path, model, preprocessing=None):
+    registry = ModelRegistry(str(tmp_path))
+    version = registry.register(model, FEATURES, preprocessing=preprocessing, activate=True)
+    loaded = registry.load(version)
+    X, _ = _training_frame(seed=1)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')      # "X does not have valid feature names" fails the test
+        proba = loaded.predict_proba(loaded.matrix(X))
+    assert proba.shape == (len(X),) and ((proba >= 0) & (proba <= 1)).all()
+    return proba
+
+
+def test_dataframe_fitted_sklearn_model(tmp_path):
+    X, y = _training_frame()
+    scaler = StandardScaler().fit(X)
+    model = LogisticRegression().fit(pd.DataFrame(scaler.transform(X), columns=FEATURES), y)
+    expected = model.predict_proba(pd.DataFrame(scaler.transform(_training_frame(seed=1)[0]), columns=FEATURES))
+    np.testing.assert_allclose(_score(tmp_path, model, scaler), expected[:, 1])
+
+
+def test_dataframe_fitted_lightgbm_model(tmp_path):
+    lightgbm = pytest.importorskip('lightgbm')
+    X, y = _training_frame()
+    model = lightgbm.LGBMClassifier(n_estimators=20, verbose=-1).fit(X, y)
+    np.testing.assert_allclose(_score(tmp_path, model), model.predict_proba(_training_frame(seed=1)[0])[:, 1])
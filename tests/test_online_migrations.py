@@ -0,0 +1,69 @@
+"""Keyset backfill of models/online_migrations.py on SQLite, and Postgres when TEST_DATABASE_URL is set
+(run with pytest from the project root)"""
+
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine, text
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/.."))
+
+from models.online_migrations import backfill
+
+N_ROWS = 1234
+DELETED = range(200, 260)     # a gap in the keys inside the first batches
+
+
+def _engine(url):
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS backfill_test"))
+        conn.execute(text("CREATE TABLE backfill_test (id INTEGER PRIMARY KEY, amount INTEGER NOT NULL, "
+                          "doubled INTEGER)"))
+        conn.execute(text("INSERT INTO backfill_test (id, amount) VALUES (:id, :id)"),
+                     [{'id': i} for i in range(1, N_ROWS + 1) if i not in DELETED])
+    return engine
+
+
+def _backfill(engine, batches, **kw):
+    # a huge target keeps every batch "fast", so the batch size doubles deterministically
+    return backfill('backfill_test', 'doubled = amount * 2', where='doubled IS NULL', bind=engine,
+                    batch_size=100, sleep=0, target_batch_seconds=1e6, progress=batches.append, **kw)
+
+
+def _check(engine):
+    n_rows = N_ROWS - len(DELETED)
+    batches = []
+    assert _backfill(engine, batches) == n_rows
+    assert [b['batch_size'] for b in batches] == [100, 200, 400, 800]
+    # keys 200..259 are missing, so the first range (0, 100] is full and the second (100, 360] holds 200 rows
+    assert [b['scanned'] for b in batches] == [100, 300, 700, n_rows]
+    assert [b['updated'] for b in batches] == [b['scanned'] for b in batches]
+    assert batches[-1]['fraction'] == 1.0 and batches[-1]['eta_s'] is None
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM backfill_test WHERE doubled = amount * 2")).scalar() == n_rows
+
+    # an interrupted run is simply started again: only the rows still NULL are touched
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE backfill_test SET doubled = NULL WHERE id > 1000"))
+    batches = []
+    assert _backfill(engine, batches) == N_ROWS - 1000
+    assert batches[-1]['scanned'] == n_rows
+    assert _backfill(engine, []) == 0
+
+
+def test_backfill_sqlite(tmp_path):
+    _check(_engine(f"sqlite:///{tmp_path / 'backfill.db'}"))
+
+
+def test_backfill_postgres():
+    url = os.environ.get('TEST_DATABASE_URL')
+    if not url:
+        pytest.skip('TEST_DATABASE_URL is not set')
+    engine = _engine(url)
+    try:
+        _check(engine)
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE backfill_test"))
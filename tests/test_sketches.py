@@ -0,0 +1,49 @@
+"""Sparse sketch state: merged shards equal one pass, estimates stay close (run with pytest from the project root)"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/../src"))
+
+from sketches import PLAYER_HLL_PRECISION, DDSketch, HyperLogLog, PlayerSketches
+
+N_GROUPS = 500
+
+
+def _events(n, seed):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, N_GROUPS, n), rng.integers(0, 40, n), np.abs(rng.normal(5, 10, n)).round(2)
+
+
+def test_merged_shards_equal_one_pass():
+    groups, days, amounts = _events(50_000, seed=1)
+    whole_hll = HyperLogLog(N_GROUPS, precision=PLAYER_HLL_PRECISION).add(days, groups)
+    whole_dd = DDSketch(N_GROUPS).add(amounts, groups)
+    parts = np.array_split(np.arange(len(groups)), 3)
+    hll = HyperLogLog(N_GROUPS, precision=PLAYER_HLL_PRECISION).merge(
+        *(HyperLogLog(N_GROUPS, precision=PLAYER_HLL_PRECISION).add(days[p], groups[p]) for p in parts))
+    dd = DDSketch(N_GROUPS).merge(*(DDSketch(N_GROUPS).add(amounts[p], groups[p]) for p in parts))
+    np.testing.assert_array_equal(hll.registers, whole_hll.registers)
+    np.testing.assert_array_equal(dd.keys, whole_dd.keys)
+    np.testing.assert_array_equal(dd.counts, whole_dd.counts)
+
+
+def test_estimates_track_exact_aggregates():
+    groups, days, amounts = _events(50_000, seed=2)
+    exact = pd.DataFrame({'g': groups, 'day': days, 'amount': amounts}).groupby('g')
+    hll = HyperLogLog(N_GROUPS, precision=PLAYER_HLL_PRECISION).add(days, groups)
+    distinct = exact['day'].nunique().to_numpy()
+    assert np.mean(np.abs(hll.estimate() - distinct) / distinct) < hll.relative_error
+    dd = DDSketch(N_GROUPS).add(amounts, groups)
+    median = exact['amount'].median().to_numpy()
+    assert np.median(np.abs(dd.quantile(0.5) - median) / median) < 0.05
+
+
+def test_missing_games_are_skipped():
+    bets = pd.DataFrame({'player_id': [1, 1, 1, 2], 'game_name': ['slots', None, 'poker', None],
+                         'bet_amount': [1.0, 2.0, 3.0, 4.0]})
+    frame = PlayerSketches([1, 2]).update(bets_df=bets).to_frame()
+    assert frame['unique_games_played'].tolist() == [2, 0]